@@ -0,0 +1,353 @@
+import asyncio
+import os
+import time
+from collections import defaultdict, deque
+
+from aiohttp import web
+from neo4j.exceptions import ConstraintError
+
+from db.async_client import AsyncNeo4jClient
+from db.id_allocator import allocate_user_id
+from db.neo4j_client import violated_property
+from db.cypher import (
+    REGISTER_QUERY, LOGIN_QUERY, REHASH_QUERY, PROFILE_QUERY, UPDATE_PROFILE_QUERY,
+    BULK_FOLLOW_QUERY, BULK_UNFOLLOW_QUERY, FOLLOWERS_PAGE_QUERY, FOLLOWING_PAGE_QUERY,
+    MUTUAL_QUERY, RECOMMENDATIONS_QUERY, SEARCH_QUERY, POPULAR_QUERY,
+)
+from db.supernodes import SUPERNODE_THRESHOLD, fanout
+from services.auth_service import (
+    get_auth_service, AuthError, UserNotFound, InvalidPassword, RateLimited, AuthBusy,
+)
+
+# ============================================================
+# Headless HTTP API for the social graph use cases
+# ============================================================
+# Run from the app/ folder:
+#
+#     python -m api.server
+#
+# JSON endpoints for UC-1 .. UC-11 on the async Neo4j driver, so load
+# tests and other services can use the graph without Streamlit.
+# List endpoints take ?skip=&limit= (limit capped at MAX_PAGE_SIZE).
+# Every response carries a Server-Timing header and GET /metrics
+# reports per-route latency percentiles.
+#
+# This process does not share the Streamlit caches; UI pages pick up
+# API writes when their cache entries expire (queries.CACHE_TTL).
+
+API_HOST = os.environ.get("API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("API_PORT", "8080"))
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+routes = web.RouteTableDef()
+
+
+# ============================================================
+# Helpers
+# ============================================================
+def error(status, message):
+    return web.json_response({"error": message}, status=status)
+
+
+def page_params(request):
+    try:
+        skip = int(request.query.get("skip", 0))
+        limit = int(request.query.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise web.HTTPBadRequest(text="skip and limit must be integers")
+    if skip < 0 or limit < 1:
+        raise web.HTTPBadRequest(text="skip must be >= 0 and limit >= 1")
+    return skip, min(limit, MAX_PAGE_SIZE)
+
+
+def page(items, skip, limit):
+    return web.json_response({
+        "items": items,
+        "skip": skip,
+        "limit": limit,
+        "next": skip + limit if len(items) == limit else None,
+    })
+
+
+async def json_body(request, *required):
+    try:
+        body = await request.json()
+    except ValueError:
+        body = None
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="body must be a JSON object")
+    missing = [k for k in required if not body.get(k)]
+    if missing:
+        raise web.HTTPBadRequest(text=f"missing fields: {', '.join(missing)}")
+    return body
+
+
+def db(request):
+    return request.app["db"]
+
+
+# ============================================================
+# Request timing
+# ============================================================
+class RouteTimings:
+
+    def __init__(self, window=1000):
+        self.latencies = defaultdict(lambda: deque(maxlen=window))
+        self.counts = defaultdict(int)
+        self.errors = defaultdict(int)
+
+    def record(self, route, seconds, status):
+        self.latencies[route].append(seconds)
+        self.counts[route] += 1
+        if status >= 500:
+            self.errors[route] += 1
+
+    def summary(self):
+        out = {}
+        for route, values in self.latencies.items():
+            ordered = sorted(values)
+            pct = lambda p: round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 2)
+            out[route] = {
+                "count": self.counts[route],
+                "errors": self.errors[route],
+                "p50_ms": pct(0.50),
+                "p95_ms": pct(0.95),
+                "p99_ms": pct(0.99),
+            }
+        return out
+
+
+@web.middleware
+async def timing_middleware(request, handler):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        resource = request.match_info.route.resource
+        route = f"{request.method} {resource.canonical if resource else request.path}"
+        request.app["timings"].record(route, elapsed, status)
+
+    response.headers["Server-Timing"] = f"app;dur={elapsed * 1000:.1f}"
+    return response
+
+
+# ============================================================
+# UC-1 .. UC-4: User management
+# ============================================================
+@routes.post("/users")
+async def register(request):
+    body = await json_body(request, "username", "email", "name", "password")
+    auth = get_auth_service()
+    try:
+        password_hash = await auth.hash_password_async(body["password"])
+    except AuthBusy as e:
+        return error(503, str(e))
+
+    loop = asyncio.get_running_loop()
+    for _ in range(3):
+        # Block allocator hits the database once per USER_ID_BLOCK ids
+        user_id = await loop.run_in_executor(None, allocate_user_id)
+        try:
+            rows = await db(request).write(REGISTER_QUERY, {
+                "userId": user_id,
+                "username": body["username"],
+                "email": body["email"],
+                "name": body["name"],
+                "bio": body.get("bio") or f"Hello, I'm {body['name']}!",
+                "passwordHash": password_hash,
+            }, name="register")
+            return web.json_response(rows[0], status=201)
+        except ConstraintError as e:
+            prop = violated_property(e)
+            if prop in ("username", "email"):
+                return error(409, f"{prop} '{body[prop]}' is already taken")
+            if prop != "userId":
+                raise
+    return error(503, "could not allocate a userId")
+
+
+@routes.post("/login")
+async def login(request):
+    body = await json_body(request, "username", "password")
+    username = body["username"]
+    auth = get_auth_service()
+    start = time.perf_counter()
+    try:
+        auth.check_rate_limit(username)
+        rows = await db(request).read(LOGIN_QUERY, {"username": username}, name="login")
+        if not rows:
+            auth.record_failure(username)
+            raise UserNotFound("invalid username or password")
+
+        user = rows[0]
+        stored_hash = user.pop("passwordHash")
+        if not await auth.check_password_async(body["password"], stored_hash):
+            auth.record_failure(username)
+            raise InvalidPassword("invalid username or password")
+
+        auth.clear_failures(username)
+        if auth.needs_rehash(stored_hash):
+            try:
+                new_hash = await auth.hash_password_async(body["password"])
+                await db(request).write(REHASH_QUERY, {"uid": user["id"], "hash": new_hash}, name="login")
+                auth.record_rehash()
+            except AuthBusy:
+                pass
+        return web.json_response(user)
+    except RateLimited as e:
+        return error(429, str(e))
+    except AuthBusy as e:
+        return error(503, str(e))
+    except AuthError as e:
+        return error(401, str(e))
+    finally:
+        auth.record_latency(time.perf_counter() - start)
+
+
+@routes.get("/users/{uid}")
+async def profile(request):
+    _, limit = page_params(request)
+    rows = await db(request).read(PROFILE_QUERY, {
+        "uid": request.match_info["uid"],
+        "page": limit,
+        "threshold": SUPERNODE_THRESHOLD,
+    }, name="profile")
+    if not rows:
+        return error(404, "user not found")
+    return web.json_response(rows[0])
+
+
+@routes.put("/users/{uid}")
+async def edit_profile(request):
+    body = await json_body(request, "name", "email")
+    try:
+        rows = await db(request).write(UPDATE_PROFILE_QUERY, {
+            "uid": request.match_info["uid"],
+            "newName": body["name"],
+            "newEmail": body["email"],
+            "newBio": body.get("bio", ""),
+        }, name="update_profile")
+    except ConstraintError as e:
+        if violated_property(e) == "email":
+            return error(409, f"email '{body['email']}' is already in use")
+        raise
+    if not rows:
+        return error(404, "user not found")
+    return web.json_response(rows[0])
+
+
+# ============================================================
+# UC-5 .. UC-9: Social graph
+# ============================================================
+@routes.post("/users/{uid}/following")
+async def follow(request):
+    """Body: {"targetId": "0002"} or {"targetIds": ["0002", "0003"]}."""
+    body = await json_body(request)
+    targets = body.get("targetIds") or ([body["targetId"]] if body.get("targetId") else [])
+    if not targets:
+        return error(400, "targetId or targetIds required")
+    pairs = [{"followerId": request.match_info["uid"], "targetId": t} for t in targets]
+    rows = await db(request).write(BULK_FOLLOW_QUERY, {"pairs": pairs}, name="bulk_follow")
+    return web.json_response({"results": [{k: r[k] for k in ("targetId", "outcome")} for r in rows]})
+
+
+@routes.delete("/users/{uid}/following/{target}")
+async def unfollow(request):
+    pairs = [{"followerId": request.match_info["uid"], "targetId": request.match_info["target"]}]
+    rows = await db(request).write(BULK_UNFOLLOW_QUERY, {"pairs": pairs}, name="bulk_unfollow")
+    return web.json_response({"outcome": rows[0]["outcome"]})
+
+
+@routes.get("/users/{uid}/followers")
+async def followers(request):
+    skip, limit = page_params(request)
+    rows = await db(request).read(FOLLOWERS_PAGE_QUERY, {"uid": request.match_info["uid"], "skip": skip, "limit": limit}, name="connections")
+    return page(rows, skip, limit)
+
+
+@routes.get("/users/{uid}/following")
+async def following(request):
+    skip, limit = page_params(request)
+    rows = await db(request).read(FOLLOWING_PAGE_QUERY, {"uid": request.match_info["uid"], "skip": skip, "limit": limit}, name="connections")
+    return page(rows, skip, limit)
+
+
+@routes.get("/users/{uid}/mutual/{other}")
+async def mutual(request):
+    skip, limit = page_params(request)
+    rows = await db(request).read(MUTUAL_QUERY, {
+        "aid": request.match_info["uid"], "bid": request.match_info["other"], "skip": skip, "limit": limit,
+    }, name="mutual")
+    return page(rows, skip, limit)
+
+
+@routes.get("/users/{uid}/recommendations")
+async def recommendations(request):
+    _, limit = page_params(request)
+    rows = await db(request).read(RECOMMENDATIONS_QUERY, {
+        "uid": request.match_info["uid"], "limit": limit, "fanout": fanout(SUPERNODE_THRESHOLD),
+    }, name="recommendations")
+    return web.json_response({"items": rows})
+
+
+# ============================================================
+# UC-10, UC-11: Search & explore
+# ============================================================
+@routes.get("/search")
+async def search(request):
+    q = request.query.get("q", "").strip()
+    if not q:
+        return error(400, "q is required")
+    skip, limit = page_params(request)
+    rows = await db(request).read(SEARCH_QUERY, {"q": q, "skip": skip, "limit": limit, "exclude": []}, name="search")
+    return page(rows, skip, limit)
+
+
+@routes.get("/popular")
+async def popular(request):
+    _, limit = page_params(request)
+    rows = await db(request).read(POPULAR_QUERY, {"limit": limit}, name="popular")
+    return web.json_response({"items": rows})
+
+
+# ============================================================
+# Ops
+# ============================================================
+@routes.get("/health")
+async def health(request):
+    return web.json_response({"status": "ok"})
+
+
+@routes.get("/metrics")
+async def metrics(request):
+    return web.json_response({
+        "routes": request.app["timings"].summary(),
+        "auth": get_auth_service().stats(),
+    })
+
+
+# ============================================================
+# App
+# ============================================================
+def create_app(client=None):
+    app = web.Application(middlewares=[timing_middleware])
+    app["db"] = client or AsyncNeo4jClient()
+    app["timings"] = RouteTimings()
+
+    async def close_db(app):
+        await app["db"].close()
+
+    app.on_cleanup.append(close_db)
+    app.add_routes(routes)
+    return app
+
+
+if __name__ == "__main__":
+    web.run_app(create_app(), host=API_HOST, port=API_PORT)
@@ -0,0 +1,47 @@
+import os
+from neo4j import AsyncGraphDatabase, unit_of_work
+from db.neo4j_client import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, DB_NAME, APP_TAG, query_timeout
+
+# ============================================================
+# Async Neo4j client (HTTP API)
+# ============================================================
+# One pooled AsyncDriver per process. Reads and writes run as managed
+# transactions, so transient errors (leader switch, deadlock) are
+# retried by the driver. Results are returned as lists of dicts.
+# Each transaction carries the per-name timeout from neo4j_client.
+
+NEO4J_POOL_SIZE = int(os.environ.get("NEO4J_POOL_SIZE", "100"))
+NEO4J_ACQUIRE_TIMEOUT = 10.0   # seconds to wait for a pooled connection
+
+
+class AsyncNeo4jClient:
+
+    def __init__(self, uri=NEO4J_URI, user=NEO4J_USER, password=NEO4J_PASSWORD, db=DB_NAME,
+                 pool_size=NEO4J_POOL_SIZE):
+        self.driver = AsyncGraphDatabase.driver(
+            uri,
+            auth=(user, password),
+            max_connection_pool_size=pool_size,
+            connection_acquisition_timeout=NEO4J_ACQUIRE_TIMEOUT,
+        )
+        self.db = db
+
+    async def close(self):
+        await self.driver.close()
+
+    @staticmethod
+    async def _collect(tx, cypher, params):
+        result = await tx.run(cypher, params or {})
+        return [record.data() async for record in result]
+
+    def _work(self, name):
+        metadata = {"app": APP_TAG, "query": name or "unnamed", "source": "api"}
+        return unit_of_work(timeout=query_timeout(name), metadata=metadata)(self._collect)
+
+    async def read(self, cypher, params=None, name=None):
+        async with self.driver.session(database=self.db) as session:
+            return await session.execute_read(self._work(name), cypher, params)
+
+    async def write(self, cypher, params=None, name=None):
+        async with self.driver.session(database=self.db) as session:
+            return await session.execute_write(self._work(name), cypher, params)
@@ -0,0 +1,90 @@
+import contextvars
+import threading
+from contextlib import contextmanager
+
+# ============================================================
+# Causal consistency (bookmarks)
+# ============================================================
+# Reads are routed to any cluster member (READ access mode) and a
+# follower may lag behind the leader. To keep read-your-writes within
+# one client session (one Streamlit browser session), every write
+# records the bookmark it produced in that session's CausalContext, and
+# every later read or write passes those bookmarks along so the server
+# waits until it has caught up to them.
+#
+# The context is bound per thread of execution with bind_causal_context()
+# (streamlit_app.py does this at the top of each rerun via
+# queries.use_session_bookmarks). The write-behind flusher writes on
+# behalf of many sessions: it runs each flush under a context of its
+# own (causal_context()) and merges the resulting bookmarks into the
+# context of every session that submitted an event in it.
+#
+# Bookmarks are opaque strings: Neo4j's own, or "replica-sim:<tx>" from
+# the lagging replica stand-in (db/replica_sim.py).
+
+
+class CausalContext:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bookmarks = frozenset()
+        self.writes = 0
+
+    def advance(self, bookmarks):
+        """Record the bookmarks returned by a write; later reads wait for them."""
+        bookmarks = frozenset(bookmarks or ())
+        if not bookmarks:
+            return
+        with self._lock:
+            self.bookmarks = bookmarks
+            self.writes += 1
+
+    def merge(self, bookmarks):
+        """Add the bookmarks of a write made for this session elsewhere (write-behind)."""
+        bookmarks = frozenset(bookmarks or ())
+        if not bookmarks:
+            return
+        with self._lock:
+            self.bookmarks = self.bookmarks | bookmarks
+            self.writes += 1
+
+    def tag(self):
+        """Stable string for cache keys: results read under different bookmarks never mix."""
+        return ",".join(sorted(self.bookmarks))
+
+
+_current = contextvars.ContextVar("causal_context", default=None)
+
+
+def bind_causal_context(ctx):
+    _current.set(ctx)
+
+
+def current_causal_context():
+    return _current.get()
+
+
+@contextmanager
+def causal_context(ctx):
+    """Bind ctx for the duration of the block, then restore the previous one."""
+    token = _current.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _current.reset(token)
+
+
+def current_bookmarks():
+    ctx = _current.get()
+    return ctx.bookmarks if ctx else frozenset()
+
+
+def record_bookmarks(bookmarks):
+    ctx = _current.get()
+    if ctx is not None:
+        ctx.advance(bookmarks)
+
+
+def bookmark_tag():
+    ctx = _current.get()
+    return ctx.tag() if ctx else ""
@@ -0,0 +1,316 @@
+# ============================================================
+# Shared Cypher statements
+# ============================================================
+# Statements used by more than one entry point (Streamlit views and
+# the HTTP API). Kept free of Streamlit imports so non-UI processes can
+# use them. Parameters are documented per statement.
+
+# ---------------------------------------------------------
+# User management (UC-1 .. UC-4)
+# ---------------------------------------------------------
+# $userId, $username, $email, $name, $bio, $passwordHash
+REGISTER_QUERY = """
+CREATE (u:User {
+    userId: $userId,
+    username: $username,
+    email: $email,
+    name: $name,
+    bio: $bio,
+    passwordHash: $passwordHash
+})
+RETURN
+    u.userId AS id,
+    u.username AS username,
+    u.email AS email,
+    u.name AS name,
+    u.bio AS bio
+"""
+
+# $username
+LOGIN_QUERY = """
+MATCH (u:User {username: $username})
+RETURN u.userId AS id, u.username AS username, u.email AS email,
+       u.name AS name, u.bio AS bio, u.passwordHash AS passwordHash
+"""
+
+# $uid
+USER_QUERY = """
+MATCH (u:User {userId: $uid})
+RETURN u.userId AS id, u.username AS username, u.email AS email,
+       u.name AS name, u.bio AS bio
+"""
+
+# $ids: [userId]; one row per id that exists
+USERS_BY_ID_QUERY = """
+UNWIND $ids AS uid
+MATCH (u:User {userId: uid})
+RETURN u.userId AS id, u.username AS username, u.email AS email,
+       u.name AS name, u.bio AS bio
+"""
+
+# $limit
+LIST_USERS_QUERY = """
+MATCH (u:User)
+RETURN u.userId AS id, u.username AS username, u.name AS name,
+       u.email AS email, u.bio AS bio
+ORDER BY u.username
+LIMIT $limit
+"""
+
+# $uid, $hash
+REHASH_QUERY = """
+MATCH (u:User {userId: $uid})
+SET u.passwordHash = $hash
+"""
+
+# $uid, $page, $threshold
+# One round trip for every user. The degree decides the follower
+# preview (db/supernodes.py): below $threshold the first $page followers
+# by username; for a supernode the first $page the store returns, so
+# thousands of followers are never sorted. $threshold 0 turns that off.
+PROFILE_QUERY = """
+MATCH (u:User {userId: $uid})
+WITH u, COUNT { (u)<-[:FOLLOWS]-() } AS followerCount
+WITH u, followerCount,
+     $threshold > 0 AND (followerCount >= $threshold OR COUNT { (u)-[:FOLLOWS]->() } >= $threshold) AS supernode
+CALL {
+    WITH u, supernode
+    MATCH (u)<-[:FOLLOWS]-(f:User)
+    WHERE NOT supernode
+    WITH f ORDER BY f.username LIMIT $page
+    RETURN collect(f {id: f.userId, .username, .name, .bio}) AS orderedPage
+}
+CALL {
+    WITH u, supernode
+    MATCH (u)<-[:FOLLOWS]-(f:User)
+    WHERE supernode
+    WITH f LIMIT $page
+    RETURN collect(f {id: f.userId, .username, .name, .bio}) AS samplePage
+}
+CALL {
+    WITH u
+    MATCH (u)-[:FOLLOWS]->(t:User)
+    WITH t ORDER BY t.username
+    RETURN collect(t {id: t.userId, .username, .name, .bio}) AS followingList
+}
+RETURN
+    u.userId AS id,
+    u.username AS username,
+    u.email AS email,
+    u.name AS name,
+    u.bio AS bio,
+    followerCount,
+    size(followingList) AS followingCount,
+    CASE WHEN supernode THEN samplePage ELSE orderedPage END AS followerPage,
+    CASE WHEN supernode THEN 'sample' ELSE 'ordered' END AS followerPreview,
+    followingList[0..$page] AS followingPage,
+    [t IN followingList | t.id] AS followingIds
+"""
+
+# $uid, $newName, $newEmail, $newBio
+UPDATE_PROFILE_QUERY = """
+MATCH (u:User {userId: $uid})
+SET u.name = $newName,
+    u.email = $newEmail,
+    u.bio = $newBio
+RETURN
+    u.userId AS id,
+    u.username AS username,
+    u.email AS email,
+    u.name AS name,
+    u.bio AS bio
+"""
+
+# ---------------------------------------------------------
+# Social graph (UC-5 .. UC-9)
+# ---------------------------------------------------------
+# $pairs: [{followerId, targetId}]
+# MERGE locks both users, so concurrent writers (write-behind flushes,
+# the API) cannot both create the same edge. A new edge is tagged with
+# its row index for the outcome, then the tag is removed.
+BULK_FOLLOW_QUERY = """
+UNWIND range(0, size($pairs) - 1) AS i
+WITH i, $pairs[i] AS pair
+OPTIONAL MATCH (f:User {userId: pair.followerId})
+OPTIONAL MATCH (t:User {userId: pair.targetId})
+FOREACH (_ IN CASE WHEN f IS NOT NULL AND t IS NOT NULL AND f <> t THEN [1] ELSE [] END |
+    MERGE (f)-[r:FOLLOWS]->(t)
+    ON CREATE SET r._createdBy = i
+)
+WITH i, pair, f, t
+OPTIONAL MATCH (f)-[created:FOLLOWS]->(t)
+WHERE created._createdBy = i
+REMOVE created._createdBy
+RETURN
+    i,
+    pair.followerId AS followerId,
+    pair.targetId AS targetId,
+    CASE
+        WHEN f IS NULL OR t IS NULL THEN 'missing'
+        WHEN f = t THEN 'self'
+        WHEN created IS NOT NULL THEN 'created'
+        ELSE 'exists'
+    END AS outcome
+ORDER BY i
+"""
+
+# $pairs: [{followerId, targetId}]
+BULK_UNFOLLOW_QUERY = """
+UNWIND range(0, size($pairs) - 1) AS i
+WITH i, $pairs[i] AS pair
+OPTIONAL MATCH (:User {userId: pair.followerId})-[r:FOLLOWS]->(:User {userId: pair.targetId})
+WITH i, pair, collect(r) AS rels
+FOREACH (r IN rels | DELETE r)
+RETURN
+    i,
+    pair.followerId AS followerId,
+    pair.targetId AS targetId,
+    CASE WHEN size(rels) > 0 THEN 'deleted' ELSE 'not_following' END AS outcome
+ORDER BY i
+"""
+
+# $fid, $tid
+FOLLOWS_EDGE_QUERY = """
+RETURN EXISTS {
+    MATCH (:User {userId: $fid})-[:FOLLOWS]->(:User {userId: $tid})
+} AS follows
+"""
+
+# $uid
+FOLLOWING_QUERY = """
+MATCH (u:User {userId: $uid})-[:FOLLOWS]->(t:User)
+RETURN t.userId AS id, t.username AS username, t.name AS name, t.bio AS bio
+ORDER BY t.username
+"""
+
+# $uid, $skip, $limit
+FOLLOWERS_PAGE_QUERY = """
+MATCH (u:User {userId: $uid})<-[:FOLLOWS]-(f:User)
+RETURN f.userId AS id, f.username AS username, f.name AS name, f.bio AS bio
+ORDER BY f.username SKIP $skip LIMIT $limit
+"""
+
+# $uid, $skip, $limit
+FOLLOWING_PAGE_QUERY = """
+MATCH (u:User {userId: $uid})-[:FOLLOWS]->(t:User)
+RETURN t.userId AS id, t.username AS username, t.name AS name, t.bio AS bio
+ORDER BY t.username SKIP $skip LIMIT $limit
+"""
+
+# $aid, $bid, $skip, $limit
+# Intersects the two following lists, so the mutual user's incoming
+# FOLLOWS (thousands for an influencer) are never expanded.
+MUTUAL_QUERY = """
+MATCH (a:User {userId: $aid}), (b:User {userId: $bid})
+WHERE a <> b
+WITH a, [(b)-[:FOLLOWS]->(t:User) | t] AS theirs
+MATCH (a)-[:FOLLOWS]->(mutual:User)
+WHERE mutual IN theirs
+RETURN DISTINCT
+    mutual.userId AS id, mutual.username AS username,
+    mutual.name AS name, mutual.bio AS bio
+ORDER BY username SKIP $skip LIMIT $limit
+"""
+
+# $uid, $limit, $fanout
+# Each friend contributes at most $fanout candidates, so a friend who
+# follows thousands of users (a supernode as the middle hop) costs no
+# more than $fanout rows.
+_RECOMMENDATIONS = """
+MATCH (u:User {userId: $uid})-[:FOLLOWS]->(friend:User)
+CALL {
+    WITH friend
+    MATCH (friend)-[:FOLLOWS]->(recommended:User)
+    RETURN recommended LIMIT $fanout
+}
+WITH u, friend, recommended
+WHERE %s
+WITH recommended, count(DISTINCT friend) AS mutualCount
+RETURN
+    recommended.userId AS id, recommended.username AS username,
+    recommended.name AS name, recommended.bio AS bio, mutualCount
+ORDER BY mutualCount DESC, recommended.username
+LIMIT $limit
+"""
+
+RECOMMENDATIONS_QUERY = _RECOMMENDATIONS % "NOT (u)-[:FOLLOWS]->(recommended) AND u <> recommended"
+
+# ... plus $exclude: the user's id and following ids (db/following_set.py).
+# A parameter list is hashed once per query, so each candidate costs a
+# lookup instead of another FOLLOWS expansion from u.
+RECOMMENDATIONS_EXCLUDE_QUERY = _RECOMMENDATIONS % "NOT recommended.userId IN $exclude"
+
+# $ids
+DEGREES_QUERY = """
+UNWIND $ids AS id
+MATCH (u:User {userId: id})
+RETURN id, COUNT { (u)<-[:FOLLOWS]-() } AS followers, COUNT { (u)-[:FOLLOWS]->() } AS following
+"""
+
+# $uid, $limit
+# A supernode's most-followed followers; cached by db/supernodes.py.
+TOP_FOLLOWERS_QUERY = """
+MATCH (u:User {userId: $uid})<-[:FOLLOWS]-(f:User)
+WITH f, COUNT { (f)<-[:FOLLOWS]-() } AS followerCount
+ORDER BY followerCount DESC, f.username
+LIMIT $limit
+RETURN f.userId AS id, f.username AS username, f.name AS name, f.bio AS bio, followerCount
+"""
+
+# $ids: one frontier of the degrees-of-separation search (UC-12)
+NEIGHBOURS_OUT_QUERY = """
+UNWIND $ids AS id
+MATCH (u:User {userId: id})
+RETURN id, [(u)-[:FOLLOWS]->(t:User) | t.userId] AS neighbours
+"""
+
+NEIGHBOURS_IN_QUERY = """
+UNWIND $ids AS id
+MATCH (u:User {userId: id})
+RETURN id, [(u)<-[:FOLLOWS]-(f:User) | f.userId] AS neighbours
+"""
+
+# ---------------------------------------------------------
+# Search & explore (UC-10, UC-11)
+# ---------------------------------------------------------
+# $q, $skip, $limit, $exclude (userIds to leave out)
+SEARCH_QUERY = """
+MATCH (u:User)
+WHERE (toLower(u.username) CONTAINS toLower($q)
+   OR toLower(u.name) CONTAINS toLower($q))
+  AND NOT u.userId IN $exclude
+RETURN u.userId AS id, u.username AS username, u.name AS name, u.bio AS bio
+ORDER BY u.username SKIP $skip LIMIT $limit
+"""
+
+# $limit
+POPULAR_QUERY = """
+MATCH (u:User)
+RETURN u.userId AS id, u.username AS username, u.name AS name,
+       COUNT { (u)<-[:FOLLOWS]-() } AS followerCount
+ORDER BY followerCount DESC
+LIMIT $limit
+"""
+
+# ---------------------------------------------------------
+# Analytics (graph statistics)
+# ---------------------------------------------------------
+# $after (userId, null for the first page), $limit
+# Keyset-paged adjacency: each user once, in userId order, with the
+# ids they follow (and their community, null if never assigned); users
+# without edges come back with an empty list.
+ADJACENCY_PAGE_QUERY = """
+MATCH (u:User)
+WHERE $after IS NULL OR u.userId > $after
+WITH u ORDER BY u.userId LIMIT $limit
+RETURN u.userId AS id, [(u)-[:FOLLOWS]->(t:User) | t.userId] AS following,
+       u.community AS community
+"""
+
+# $rows: [{id, community}], written by graph/communities.py
+SET_COMMUNITIES_QUERY = """
+UNWIND $rows AS row
+MATCH (u:User {userId: row.id})
+SET u.community = row.community
+RETURN count(u) AS updated
+"""
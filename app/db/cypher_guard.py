@@ -0,0 +1,89 @@
+# ============================================================
+# Ad-hoc Cypher guardrails (admin query editors)
+# ============================================================
+# Cypher typed into the admin panels runs against the live database,
+# so ui/components.two_panel_query_ui checks it first:
+#
+# - the server plans it with EXPLAIN (neo4j_client.statement_type,
+#   nothing runs) and anything that is not a plain read needs the
+#   panel's "Allow writes" toggle; reads run in a READ_ACCESS session,
+#   so the server refuses writes the check did not see
+# - a read whose final RETURN has no LIMIT gets one (inject_limit), so
+#   the server stops producing rows past what the panel would show
+# - rows stream in and render as they come, up to ADHOC_MAX_ROWS, and
+#   the statement runs under the "adhoc" timeout (QUERY_TIMEOUTS)
+#
+# The LIMIT check is lexical: it only looks at keywords outside
+# strings, comments and brackets, which is enough to find the last
+# top-level RETURN.
+
+READ = "r"
+STATEMENT_TYPES = {
+    "r": "read",
+    "rw": "read/write",
+    "w": "write",
+    "s": "schema change",
+}
+
+
+def top_level_words(cypher):
+    """
+    [(WORD, start)] for the keywords of `cypher` that are outside
+    strings, comments, brackets, property keys and parameters.
+    """
+    words = []
+    depth = 0
+    i, n = 0, len(cypher)
+    while i < n:
+        c = cypher[i]
+        if c in "'\"`":
+            j = i + 1
+            while j < n and cypher[j] != c:
+                j += 2 if cypher[j] == "\\" and c != "`" else 1
+            i = j + 1
+        elif cypher.startswith("//", i):
+            j = cypher.find("\n", i)
+            i = n if j < 0 else j
+        elif cypher.startswith("/*", i):
+            j = cypher.find("*/", i + 2)
+            i = n if j < 0 else j + 2
+        elif c.isalnum() or c == "_":
+            j = i
+            while j < n and (cypher[j].isalnum() or cypher[j] == "_"):
+                j += 1
+            if depth == 0 and c.isalpha() and (i == 0 or cypher[i - 1] not in ".$"):
+                words.append((cypher[i:j].upper(), i))
+            i = j
+        else:
+            if c in "([{":
+                depth += 1
+            elif c in ")]}":
+                depth = max(depth - 1, 0)
+            i += 1
+    return words
+
+
+def strip_explain(cypher):
+    """cypher without a leading EXPLAIN / PROFILE keyword."""
+    words = top_level_words(cypher)
+    if words and words[0][0] in ("EXPLAIN", "PROFILE"):
+        return cypher[words[0][1] + len(words[0][0]):].lstrip()
+    return cypher
+
+
+def inject_limit(cypher, limit):
+    """
+    (cypher, injected): cypher with `LIMIT limit` appended when its last
+    top-level RETURN has none. UNION queries and statements that do not
+    end in a RETURN (a bare CALL, writes) are returned unchanged.
+    """
+    words = [w for w, _ in top_level_words(cypher)]
+    if "UNION" in words or "RETURN" not in words:
+        return cypher, False
+    last_return = len(words) - 1 - words[::-1].index("RETURN")
+    if "LIMIT" in words[last_return:]:
+        return cypher, False
+    body = cypher.rstrip()
+    if body.endswith(";"):
+        body = body[:-1].rstrip()
+    return f"{body}\nLIMIT {int(limit)}", True
@@ -0,0 +1,178 @@
+import csv
+import json
+import os
+import tempfile
+import time
+import pyarrow as pa
+import pyarrow.parquet as pq
+from db.neo4j_client import stream_query
+
+# ============================================================
+# Result export (admin query panels)
+# ============================================================
+# Writes a whole query result to a CSV or Parquet file without holding
+# it in memory: records arrive from the driver in chunks of
+# EXPORT_CHUNK_ROWS (neo4j_client.stream_query), each chunk is turned
+# into columns and appended to the file, then dropped. The admin panel
+# offers the finished file as a download.
+#
+# Values that are not plain scalars (nodes, maps, lists) are written as
+# JSON text, so every chunk has the same column types. Files go to
+# EXPORT_DIR and are removed when the panel exports again.
+
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", "5000"))
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "social-graph-exports")
+EXPORT_FORMATS = {"CSV": ("csv", "text/csv"), "Parquet": ("parquet", "application/vnd.apache.parquet")}
+
+# Column values that need no conversion.
+PLAIN_TYPES = {str, int, float, bool, type(None)}
+
+
+class ExportError(Exception):
+    pass
+
+
+def record_columns(rows):
+    """
+    Rows (driver records or dicts) as {key: column}, without a dict per
+    row. Records are tuples sharing one key list, so they are transposed
+    as is; a column holding nodes, relationships, paths or collections
+    goes through Record.data() (properties as dicts).
+    """
+    first = rows[0]
+    if hasattr(first, "data"):
+        columns = {}
+        for key, values in zip(first.keys(), zip(*rows)):
+            if {type(v) for v in values} <= PLAIN_TYPES:
+                columns[key] = values
+            else:
+                columns[key] = [r.data(key)[key] for r in rows]
+        return columns
+    keys = dict.fromkeys(k for r in rows for k in r)
+    return {key: [r.get(key) for r in rows] for key in keys}
+
+
+def _flat(values):
+    """Column with non-scalar values as JSON text."""
+    if {type(v) for v in values} <= PLAIN_TYPES:
+        return values
+    return [v if type(v) in PLAIN_TYPES else json.dumps(v, default=str) for v in values]
+
+
+# ---------------------------------------------------------
+# Writers
+# ---------------------------------------------------------
+class _CsvWriter:
+
+    def __init__(self, path):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._keys = None
+
+    def write(self, columns):
+        if self._keys is None:
+            self._keys = list(columns)
+            self._writer.writerow(self._keys)
+        width = len(next(iter(columns.values()), ()))
+        blank = [None] * width
+        self._writer.writerows(zip(*(_flat(columns.get(k, blank)) for k in self._keys)))
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetWriter:
+    """One row group per chunk; the first chunk fixes the schema."""
+
+    def __init__(self, path):
+        self._path = path
+        self._writer = None
+        self._schema = None
+
+    def write(self, columns):
+        columns = {k: _flat(v) for k, v in columns.items()}
+        if self._schema is None:
+            table = pa.Table.from_pydict(columns)
+            # An all-null column in the first chunk has no type yet; text fits any later value.
+            self._schema = pa.schema([
+                pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in table.schema
+            ])
+            self._writer = pq.ParquetWriter(self._path, self._schema)
+        blank = [None] * len(next(iter(columns.values()), ()))
+        try:
+            table = pa.Table.from_pydict(
+                {f.name: columns.get(f.name, blank) for f in self._schema}, schema=self._schema,
+            )
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise ExportError(f"column types change within the result ({e}); export as CSV instead")
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        else:
+            pq.write_table(pa.table({}), self._path)
+
+
+_WRITERS = {"CSV": _CsvWriter, "Parquet": _ParquetWriter}
+
+
+# ---------------------------------------------------------
+# Export
+# ---------------------------------------------------------
+def export_chunks(chunks, fmt):
+    """
+    Write an iterable of row lists to a new file in EXPORT_DIR.
+    Returns {path, file_name, mime, format, rows, bytes, seconds, rows_per_s}.
+    """
+    if fmt not in _WRITERS:
+        raise ExportError(f"unknown export format {fmt!r}")
+    extension, mime = EXPORT_FORMATS[fmt]
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="export-", suffix="." + extension, dir=EXPORT_DIR)
+    os.close(fd)
+
+    started = time.monotonic()
+    rows = 0
+    writer = _WRITERS[fmt](path)
+    try:
+        for chunk in chunks:
+            if chunk:
+                writer.write(record_columns(chunk))
+                rows += len(chunk)
+        writer.close()
+    except BaseException:
+        writer.close()
+        remove_export(path)
+        raise
+
+    seconds = time.monotonic() - started
+    size = os.path.getsize(path)
+    print(f"[INFO] Exported {rows} row(s) as {fmt} in {seconds:.2f}s ({size} bytes)")
+    return {
+        "path": path,
+        "file_name": f"query-result-{time.strftime('%Y%m%d-%H%M%S')}.{extension}",
+        "mime": mime,
+        "format": fmt,
+        "rows": rows,
+        "bytes": size,
+        "seconds": seconds,
+        "rows_per_s": rows / seconds if seconds > 0 else float(rows),
+    }
+
+
+def export_query(cypher, params, fmt, chunk_size=EXPORT_CHUNK_ROWS):
+    """Stream a read-only Cypher result straight into an export file."""
+    return export_chunks(stream_query(cypher, params, name="export", chunk_size=chunk_size), fmt)
+
+
+def export_rows(rows, fmt, chunk_size=EXPORT_CHUNK_ROWS):
+    """Export rows already in memory (the built-in results of the memory backend)."""
+    return export_chunks((rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)), fmt)
+
+
+def remove_export(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
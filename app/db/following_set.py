@@ -0,0 +1,137 @@
+import threading
+from bisect import bisect_left
+from collections.abc import Set
+import streamlit as st
+
+# ============================================================
+# "Already follows" exclusion
+# ============================================================
+# Follow search (UC-5) and recommendations (UC-9) must skip the user
+# and everyone they already follow. Instead of checking the FOLLOWS
+# pattern again for every candidate row, the session keeps the
+# following ids as one sorted array:
+#
+#   following = following_set(profile)
+#   repository.search(q, 0, 20, exclude=following)        # $exclude
+#   repository.recommendations(uid, 10, exclude=following)
+#   rows = following.filter(rows)                          # client-side
+#
+# It is built once per session from the profile bundle and updated in
+# place by the session's own follow / unfollow clicks. Writes made
+# elsewhere (admin panels, other sessions, write-behind flushes) bump a
+# per-user generation in db/follows.py; the next rerun notices and
+# rebuilds from the (then fresh) profile.
+#
+# A sorted array rather than a Bloom filter: membership must be exact,
+# or a false positive would hide a user from search. Ids are compared
+# as strings: a database ingested before userIds were strings mixes
+# integer and string ids, which cannot be sorted together.
+
+
+class FollowingSet(Set):
+    """
+    Exact membership set: uid itself plus the ids it follows, kept
+    sorted. Usable wherever an `exclude` container is accepted;
+    iterating yields uid first, then the followed ids in order.
+    """
+
+    def __init__(self, uid, ids, generation=0):
+        self.uid = str(uid)
+        self.generation = generation
+        self._ids = sorted({str(tid) for tid in ids} - {self.uid})
+
+    def __contains__(self, tid):
+        tid = str(tid)
+        if tid == self.uid:
+            return True
+        i = bisect_left(self._ids, tid)
+        return i < len(self._ids) and self._ids[i] == tid
+
+    def __iter__(self):
+        yield self.uid
+        yield from self._ids
+
+    def __len__(self):
+        return len(self._ids) + 1
+
+    @classmethod
+    def _from_iterable(cls, it):
+        return frozenset(it)
+
+    @property
+    def following(self):
+        """The followed ids, sorted (without uid)."""
+        return self._ids
+
+    def add(self, tid):
+        tid = str(tid)
+        i = bisect_left(self._ids, tid)
+        if tid != self.uid and (i == len(self._ids) or self._ids[i] != tid):
+            self._ids.insert(i, tid)
+
+    def discard(self, tid):
+        tid = str(tid)
+        i = bisect_left(self._ids, tid)
+        if i < len(self._ids) and self._ids[i] == tid:
+            del self._ids[i]
+
+    def filter(self, rows, key="id"):
+        """Rows whose `key` is neither uid nor already followed."""
+        return [r for r in rows if r[key] not in self]
+
+
+# ============================================================
+# Generations (bumped by db/follows.py)
+# ============================================================
+_generations = {}   # followerId -> number of follow changes seen in this process
+_generations_lock = threading.Lock()
+
+
+def bump_generations(results):
+    """Record bulk_follow / bulk_unfollow rows that changed an edge."""
+    with _generations_lock:
+        for r in results:
+            if r["outcome"] in ("created", "deleted"):
+                uid = str(r["followerId"])
+                _generations[uid] = _generations.get(uid, 0) + 1
+
+
+def generation(uid):
+    with _generations_lock:
+        return _generations.get(str(uid), 0)
+
+
+# ============================================================
+# Session scope
+# ============================================================
+FOLLOWING_KEY = "_following_set"
+
+
+def following_set(profile):
+    """
+    This session's FollowingSet for the profile's user, rebuilt from
+    profile["followingIds"] when missing, for another user, or out of
+    date with writes made elsewhere.
+    """
+    current = generation(profile["id"])
+    cached = st.session_state.get(FOLLOWING_KEY)
+    if cached is None or cached.uid != str(profile["id"]) or cached.generation != current:
+        cached = FollowingSet(profile["id"], profile["followingIds"], current)
+        st.session_state[FOLLOWING_KEY] = cached
+    return cached
+
+
+def record_own_write(uid, op, target_ids):
+    """
+    Apply this session's own "follow" / "unfollow" of target_ids (sync or
+    queued) to its FollowingSet, so the next rerun needs no rebuild.
+    """
+    cached = st.session_state.get(FOLLOWING_KEY)
+    if cached is None or cached.uid != str(uid):
+        return
+    for tid in target_ids:
+        if op == "follow":
+            cached.add(tid)
+        else:
+            cached.discard(tid)
+    cached.generation = generation(uid)
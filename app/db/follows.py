@@ -0,0 +1,147 @@
+import threading
+from db.repository import get_repository
+from db.queries import invalidate_follows
+from db.following_set import bump_generations
+from db.write_behind import FollowWriteBehind, WriteBehindFull, FOLLOW_WRITE_BEHIND
+from services.feed_service import get_feed_service
+
+# ============================================================
+# Follow / unfollow writes (UC-5, UC-6)
+# ============================================================
+# Everything goes through the bulk functions: a list of
+# (followerId, targetId) pairs is applied with one UNWIND statement per
+# chunk, so N edges cost one round trip instead of N (plus the
+# existence checks the admin panels used to run around each write).
+# Each pair gets an outcome:
+#
+#   follow:   created | exists | self | missing
+#   unfollow: deleted | not_following
+#
+# Changed edges are also recorded in the activity feed
+# (services/feed_service.py), whichever path wrote them: user and admin
+# panels, bulk imports and write-behind flushes.
+
+BULK_CHUNK_SIZE = 1000
+
+CHANGED = {"created", "deleted"}
+
+
+def _apply(write, pairs, chunk_size):
+    pairs = [{"followerId": f, "targetId": t} for f, t in pairs]
+    results = []
+    for i in range(0, len(pairs), chunk_size):
+        results.extend(write(pairs[i:i + chunk_size]))
+
+    if any(r["outcome"] in CHANGED for r in results):
+        invalidate_follows()
+        bump_generations(results)
+        get_feed_service().record(results)
+    return results
+
+
+def bulk_follow(pairs, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Create FOLLOWS edges for (followerId, targetId) pairs.
+    Returns one {followerId, targetId, outcome} dict per pair, in order.
+    """
+    return _apply(get_repository().bulk_follow, pairs, chunk_size)
+
+
+def bulk_unfollow(pairs, chunk_size=BULK_CHUNK_SIZE):
+    """Delete FOLLOWS edges; same shape as bulk_follow."""
+    return _apply(get_repository().bulk_unfollow, pairs, chunk_size)
+
+
+# ============================================================
+# Single-edge writes (optionally write-behind)
+# ============================================================
+_write_behind = None
+_write_behind_lock = threading.Lock()
+
+
+def get_write_behind():
+    """Process-wide write-behind queue, or None when FOLLOW_WRITE_BEHIND is off."""
+    global _write_behind
+    if not FOLLOW_WRITE_BEHIND:
+        return None
+    with _write_behind_lock:
+        if _write_behind is None:
+            _write_behind = FollowWriteBehind(bulk_follow, bulk_unfollow)
+        return _write_behind
+
+
+def _submit(op, follower_id, target_id):
+    wb = get_write_behind()
+    if wb is None:
+        return False
+    try:
+        wb.submit(op, follower_id, target_id)
+        return True
+    except WriteBehindFull:
+        return False   # backpressure: fall back to a synchronous write
+
+
+def follow(follower_id, target_id):
+    """Outcome as in bulk_follow, or 'queued' when written behind."""
+    if follower_id == target_id:
+        return "self"
+    if _submit("follow", follower_id, target_id):
+        return "queued"
+    return bulk_follow([(follower_id, target_id)])[0]["outcome"]
+
+
+def unfollow(follower_id, target_id):
+    if _submit("unfollow", follower_id, target_id):
+        return "queued"
+    return bulk_unfollow([(follower_id, target_id)])[0]["outcome"]
+
+
+def _pending(follower_id):
+    wb = get_write_behind()
+    return wb.pending_for(follower_id) if wb else {}
+
+
+def _overlay(rows, pending, loader):
+    """Followed-user rows with pending events applied, by username."""
+    rows = [t for t in rows if pending.get(t["id"]) != "unfollow"]
+    if loader is not None:
+        shown = {t["id"] for t in rows}
+        added = [tid for tid, op in pending.items() if op == "follow" and tid not in shown]
+        rows = sorted(rows + loader.load_many(added), key=lambda t: t["username"])
+    return rows
+
+
+def apply_pending_follows(profile, loader=None):
+    """
+    Overlay this user's unflushed follow/unfollow events on a profile
+    bundle (see queries.load_profile) so they see their own writes.
+    With a loader (db/loader.py), newly followed users are added to
+    followingPage too, fetched in one batch.
+    """
+    pending = _pending(profile["id"])
+    if not pending:
+        return profile
+
+    ids = set(profile["followingIds"])
+    for target_id, op in pending.items():
+        if op == "follow":
+            ids.add(target_id)
+        else:
+            ids.discard(target_id)
+
+    profile = dict(profile)
+    profile["followingIds"] = ids
+    profile["followingCount"] = len(ids)
+    profile["followingPage"] = _overlay(profile["followingPage"], pending, loader)
+    return profile
+
+
+def apply_pending_following(follower_id, rows, loader):
+    """The same overlay for a full following list (queries.following)."""
+    pending = _pending(follower_id)
+    return _overlay(rows, pending, loader) if pending else rows
+
+
+def follow_all(follower_id, target_ids):
+    """'Follow all recommended': one transaction for the whole list."""
+    return bulk_follow([(follower_id, tid) for tid in target_ids])
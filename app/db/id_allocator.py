@@ -0,0 +1,79 @@
+import os
+import threading
+from db.neo4j_client import run_query
+
+# ============================================================
+# User ID allocation
+# ============================================================
+# IDs come from a (:Sequence {name: 'userId'}) counter node instead of
+# scanning every User for max(userId). Each app process reserves a
+# block of IDs with one atomic increment (the SET takes a write lock on
+# the sequence node, so concurrent reservations serialise) and then
+# hands them out locally. IDs left in a block when a process exits are
+# skipped, never reused.
+
+USER_ID_BLOCK = int(os.environ.get("USER_ID_BLOCK", "10"))
+
+RESERVE_QUERY = """
+MATCH (s:Sequence {name: $name})
+SET s.value = s.value + $block
+RETURN s.value AS last
+"""
+
+# Seeds (or repairs) the sequence from existing data: ingest_graph.py
+# after a load, migrate_db.py for older databases, and the allocator
+# itself when the node is missing. Never moves the counter backwards,
+# so ids already handed out stay taken.
+SEED_USER_ID_QUERY = """
+MATCH (u:User)
+WITH max(toInteger(u.userId)) AS maxId
+MERGE (s:Sequence {name: 'userId'})
+SET s.value = CASE
+    WHEN s.value IS NULL OR s.value < coalesce(maxId, 0) THEN coalesce(maxId, 0)
+    ELSE s.value
+END
+RETURN s.value AS value
+"""
+
+
+class IdAllocator:
+
+    def __init__(self, name, block_size=USER_ID_BLOCK, seed_query=None):
+        self.name = name
+        self.block_size = block_size
+        self.seed_query = seed_query
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0   # exclusive
+
+    def next_id(self):
+        with self._lock:
+            if self._next >= self._end:
+                self._reserve_block()
+            value = self._next
+            self._next += 1
+            return value
+
+    def _reserve_block(self):
+        params = {"name": self.name, "block": self.block_size}
+        rows = run_query(RESERVE_QUERY, params, name="id_block")
+
+        if not rows and self.seed_query:
+            # Sequence node missing (database not migrated yet)
+            run_query(self.seed_query, name="id_block")
+            rows = run_query(RESERVE_QUERY, params, name="id_block")
+
+        if not rows:
+            raise RuntimeError(f"Sequence '{self.name}' does not exist.")
+
+        last = rows[0]["last"]
+        self._next = last - self.block_size + 1
+        self._end = last + 1
+
+
+_user_ids = IdAllocator("userId", seed_query=SEED_USER_ID_QUERY)
+
+
+def allocate_user_id():
+    """Next free userId, zero-padded like the generated dataset (0001...)."""
+    return f"{_user_ids.next_id():04d}"
@@ -0,0 +1,100 @@
+import streamlit as st
+from db.repository import get_repository
+
+# ============================================================
+# Per-rerun user loader
+# ============================================================
+# DataLoader-style batching for user details. Code that needs users by
+# id asks the loader instead of querying one id at a time:
+#
+#   loader = user_loader()
+#   loader.want(ids)          # optional: queue ids early
+#   users = loader.load_many(ids)
+#
+# Every id still missing when something is loaded is fetched together
+# in one `UNWIND $ids` query; results are deduplicated and kept for
+# the rest of the rerun. prime() seeds the cache with rows the page
+# already has (user lists, recommendation rows) so those cost nothing.
+#
+# streamlit_app.py starts a fresh loader at the top of every rerun;
+# invalidate_users() drops it after a profile write.
+
+
+class UserLoader:
+
+    def __init__(self, fetch):
+        self._fetch = fetch        # ids -> list of user dicts
+        self._cache = {}           # userId -> user dict, or None if missing
+        self._pending = []
+        self.round_trips = 0
+        self.hits = 0
+
+    def prime(self, rows):
+        """Cache user rows that are already loaded (need 'id' and 'username')."""
+        for r in rows:
+            self._cache.setdefault(r["id"], r)
+
+    def want(self, ids):
+        """Queue ids for the next batch without loading yet."""
+        self._pending.extend(uid for uid in ids if uid not in self._cache)
+
+    def dispatch(self):
+        """Fetch every queued id in one round trip."""
+        ids = list(dict.fromkeys(uid for uid in self._pending if uid not in self._cache))
+        self._pending = []
+        if not ids:
+            return
+        self.round_trips += 1
+        found = {u["id"]: u for u in self._fetch(ids)}
+        for uid in ids:
+            self._cache[uid] = found.get(uid)
+
+    def load_many(self, ids):
+        """Users for `ids` in order; unknown ids are skipped."""
+        ids = list(ids)
+        self.hits += sum(uid in self._cache for uid in ids)
+        self.want(ids)
+        self.dispatch()
+        return [self._cache[uid] for uid in ids if self._cache.get(uid) is not None]
+
+    def load(self, uid):
+        """One user dict, or None."""
+        users = self.load_many([uid])
+        return users[0] if users else None
+
+
+# ============================================================
+# Rerun scope
+# ============================================================
+LOADER_KEY = "_user_loader"
+
+
+def reset_user_loader():
+    """Start a new loader; called once per rerun and after user writes."""
+    st.session_state[LOADER_KEY] = UserLoader(lambda ids: get_repository().get_users(ids))
+
+
+def user_loader():
+    if LOADER_KEY not in st.session_state:
+        reset_user_loader()
+    return st.session_state[LOADER_KEY]
+
+
+def with_usernames(results, keys=("targetId",)):
+    """
+    Add a username column next to each id column of follow outcome
+    rows ('targetId' -> 'targetUsername'); all ids load in one batch.
+    """
+    loader = user_loader()
+    for key in keys:
+        loader.want(r[key] for r in results)
+    loader.dispatch()
+
+    rows = []
+    for r in results:
+        row = dict(r)
+        for key in keys:
+            user = loader.load(r[key])
+            row[key[:-2] + "Username"] = user["username"] if user else None
+        rows.append(row)
+    return rows
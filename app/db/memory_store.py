@@ -0,0 +1,359 @@
+import bisect
+import csv
+import heapq
+import threading
+from collections import Counter
+from collections.abc import Set as AbstractSet
+from itertools import islice
+from db.repository import DuplicateKeyError
+from db.snapshot import Snapshot
+from db.supernodes import SUPERNODE_THRESHOLD, TOP_FOLLOWERS, fanout
+
+# ============================================================
+# In-memory graph store (GRAPH_BACKEND=memory)
+# ============================================================
+# Same operations and result shapes as repository.Neo4jRepository,
+# kept in process so tests, benchmarks and demo mode run without a
+# Neo4j server. Indexes:
+#
+# - users by userId, username and email (the uniqueness constraints)
+# - userIds sorted by username, for ordered pages and search
+# - following / followers adjacency sets per userId
+#
+# One lock guards everything; reads return copies so callers can
+# mutate what they get back, like driver results.
+
+
+PUBLIC_FIELDS = ("id", "username", "email", "name", "bio")
+SUMMARY_FIELDS = ("id", "username", "name", "bio")
+
+
+class MemoryGraphStore:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._users = {}        # userId -> {id, username, email, name, bio, passwordHash}
+        self._by_username = {}  # username -> userId
+        self._by_email = {}     # email -> userId
+        self._sorted = []       # (username, userId), sorted
+        self._following = {}   # userId -> set(userId)
+        self._followers = {}   # userId -> set(userId)
+        self._last_id = 0
+        self.supernode_threshold = SUPERNODE_THRESHOLD
+
+    @classmethod
+    def from_csv(cls, users_csv, follows_csv=None):
+        """Load the files written by db_setup/generate_users.py and generate_graph.py."""
+        with open(users_csv, newline="") as f:
+            users = [{**r, "userId": r["userId"].zfill(4)} for r in csv.DictReader(f)]
+        pairs = []
+        if follows_csv:
+            with open(follows_csv, newline="") as f:
+                pairs = [(r["followerId"].zfill(4), r["followeeId"].zfill(4)) for r in csv.DictReader(f)]
+        return cls.from_rows(users, pairs)
+
+    @classmethod
+    def from_rows(cls, users, pairs=()):
+        """
+        Load user rows keyed like users.csv (userId, username, ...) and
+        (followerId, followeeId) pairs as given; ids are not normalised,
+        so the store holds exactly what an ingest of the same rows writes.
+        """
+        store = cls()
+        for r in users:
+            store._insert({
+                "id": r["userId"],
+                "username": r["username"],
+                "email": r["email"],
+                "name": r["name"],
+                "bio": r["bio"],
+                "passwordHash": r["passwordHash"],
+            })
+        for follower_id, target_id in pairs:
+            store._link(follower_id, target_id)
+        return store
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Load a snapshot written by db_setup/graph_snapshot.py: a db/snapshot.py Snapshot or its path."""
+        if not isinstance(snapshot, Snapshot):
+            snapshot = Snapshot(snapshot)
+        store = cls()
+        users = snapshot.users()
+        for user in users:
+            store._insert(user)
+        ids = [u["id"] for u in users]
+        for uid, targets, followers in zip(ids, snapshot.following(), snapshot.followers()):
+            store._following[uid] = {ids[t] for t in targets}
+            store._followers[uid] = {ids[f] for f in followers}
+        return store
+
+    def clone(self):
+        """Independent copy of the whole graph (e.g. a simulated replica)."""
+        with self._lock:
+            other = MemoryGraphStore()
+            other._users = {uid: dict(u) for uid, u in self._users.items()}
+            other._by_username = dict(self._by_username)
+            other._by_email = dict(self._by_email)
+            other._sorted = list(self._sorted)
+            other._following = {uid: set(ids) for uid, ids in self._following.items()}
+            other._followers = {uid: set(ids) for uid, ids in self._followers.items()}
+            other._last_id = self._last_id
+            return other
+
+    # ---------------------------------------------------------
+    # Internals (caller holds the lock)
+    # ---------------------------------------------------------
+    def _insert(self, user):
+        if user["id"] in self._users:
+            raise DuplicateKeyError("userId", user["id"])
+        if user["username"] in self._by_username:
+            raise DuplicateKeyError("username", user["username"])
+        if user["email"] in self._by_email:
+            raise DuplicateKeyError("email", user["email"])
+
+        self._users[user["id"]] = user
+        self._by_username[user["username"]] = user["id"]
+        self._by_email[user["email"]] = user["id"]
+        bisect.insort(self._sorted, (user["username"], user["id"]))
+        self._following[user["id"]] = set()
+        self._followers[user["id"]] = set()
+        if user["id"].isdigit():
+            self._last_id = max(self._last_id, int(user["id"]))
+
+    def _link(self, follower_id, target_id):
+        if target_id in self._following[follower_id]:
+            return False
+        self._following[follower_id].add(target_id)
+        self._followers[target_id].add(follower_id)
+        return True
+
+    def _unlink(self, follower_id, target_id):
+        if target_id not in self._following.get(follower_id, ()):
+            return False
+        self._following[follower_id].discard(target_id)
+        self._followers[target_id].discard(follower_id)
+        return True
+
+    def _row(self, uid, fields=SUMMARY_FIELDS):
+        user = self._users[uid]
+        return {k: user[k] for k in fields}
+
+    def _ordered(self, ids):
+        return sorted(ids, key=lambda uid: self._users[uid]["username"])
+
+    def _page(self, ids, skip, limit):
+        return [self._row(uid) for uid in self._ordered(ids)[skip:skip + limit]]
+
+    # ---------------------------------------------------------
+    # Users (UC-1 .. UC-4)
+    # ---------------------------------------------------------
+    def list_users(self, limit):
+        with self._lock:
+            return [self._row(uid, PUBLIC_FIELDS) for _, uid in self._sorted[:limit]]
+
+    def get_user(self, uid):
+        with self._lock:
+            return self._row(uid, PUBLIC_FIELDS) if uid in self._users else None
+
+    def get_users(self, ids):
+        with self._lock:
+            return [self._row(uid, PUBLIC_FIELDS) for uid in ids if uid in self._users]
+
+    def get_credentials(self, username):
+        with self._lock:
+            uid = self._by_username.get(username)
+            return dict(self._users[uid]) if uid else None
+
+    def create_user(self, username, email, name, bio, password_hash):
+        with self._lock:
+            user = {
+                "id": f"{self._last_id + 1:04d}",
+                "username": username,
+                "email": email,
+                "name": name,
+                "bio": bio,
+                "passwordHash": password_hash,
+            }
+            self._insert(user)
+            return self._row(user["id"], PUBLIC_FIELDS)
+
+    def update_profile(self, uid, name, email, bio):
+        with self._lock:
+            user = self._users.get(uid)
+            if user is None:
+                return None
+            owner = self._by_email.get(email)
+            if owner is not None and owner != uid:
+                raise DuplicateKeyError("email", email)
+            del self._by_email[user["email"]]
+            self._by_email[email] = uid
+            user.update(name=name, email=email, bio=bio)
+            return self._row(uid, PUBLIC_FIELDS)
+
+    def set_password_hash(self, uid, password_hash):
+        with self._lock:
+            if uid in self._users:
+                self._users[uid]["passwordHash"] = password_hash
+
+    def profile(self, uid, page):
+        with self._lock:
+            if uid not in self._users:
+                return None
+            following = self._ordered(self._following[uid])
+            followers = self._followers[uid]
+            sample = self.is_supernode(uid)
+            bundle = self._row(uid, PUBLIC_FIELDS)
+            bundle.update(
+                followerCount=len(followers),
+                followingCount=len(following),
+                followerPage=(
+                    [self._row(f) for f in islice(followers, page)] if sample
+                    else self._page(followers, 0, page)
+                ),
+                followerPreview="sample" if sample else "ordered",
+                followingPage=[self._row(t) for t in following[:page]],
+                followingIds=following,
+            )
+            return bundle
+
+    # ---------------------------------------------------------
+    # Social graph (UC-5 .. UC-9)
+    # ---------------------------------------------------------
+    def follows(self, follower_id, target_id):
+        with self._lock:
+            return target_id in self._following.get(follower_id, ())
+
+    def bulk_follow(self, pairs):
+        results = []
+        with self._lock:
+            for p in pairs:
+                f, t = p["followerId"], p["targetId"]
+                if f not in self._users or t not in self._users:
+                    outcome = "missing"
+                elif f == t:
+                    outcome = "self"
+                else:
+                    outcome = "created" if self._link(f, t) else "exists"
+                results.append({"followerId": f, "targetId": t, "outcome": outcome})
+        return results
+
+    def bulk_unfollow(self, pairs):
+        results = []
+        with self._lock:
+            for p in pairs:
+                f, t = p["followerId"], p["targetId"]
+                outcome = "deleted" if self._unlink(f, t) else "not_following"
+                results.append({"followerId": f, "targetId": t, "outcome": outcome})
+        return results
+
+    def following(self, uid):
+        with self._lock:
+            return [self._row(t) for t in self._ordered(self._following.get(uid, ()))]
+
+    def followers_page(self, uid, skip, limit):
+        with self._lock:
+            return self._page(self._followers.get(uid, ()), skip, limit)
+
+    def following_page(self, uid, skip, limit):
+        with self._lock:
+            return self._page(self._following.get(uid, ()), skip, limit)
+
+    def mutual(self, aid, bid, skip, limit):
+        with self._lock:
+            if aid == bid:
+                return []
+            common = self._following.get(aid, set()) & self._following.get(bid, set())
+            return self._page(common, skip, limit)
+
+    def recommendations(self, uid, limit, exclude=None):
+        with self._lock:
+            mine = self._following.get(uid, set())
+            skip = mine if exclude is None else exclude
+            cap = fanout(self.supernode_threshold)
+            counts = Counter()
+            for friend in mine:
+                for rec in islice(self._following[friend], cap):
+                    if rec != uid and rec not in skip:
+                        counts[rec] += 1
+            best = heapq.nsmallest(limit, counts, key=lambda r: (-counts[r], self._users[r]["username"]))
+            return [dict(self._row(r), mutualCount=counts[r]) for r in best]
+
+    def degrees(self, ids):
+        with self._lock:
+            return {
+                uid: {"followers": len(self._followers[uid]), "following": len(self._following[uid])}
+                for uid in ids if uid in self._users
+            }
+
+    def is_supernode(self, uid):
+        if self.supernode_threshold <= 0:
+            return False
+        with self._lock:
+            degree = max(len(self._followers.get(uid, ())), len(self._following.get(uid, ())))
+        return degree >= self.supernode_threshold
+
+    def top_followers(self, uid, limit=TOP_FOLLOWERS):
+        with self._lock:
+            top = heapq.nsmallest(
+                limit, self._followers.get(uid, ()),
+                key=lambda f: (-len(self._followers[f]), self._users[f]["username"]),
+            )
+            return [dict(self._row(f), followerCount=len(self._followers[f])) for f in top]
+
+    def neighbours(self, ids, direction):
+        index = self._following if direction == "out" else self._followers
+        with self._lock:
+            return [{"id": uid, "neighbours": list(index.get(uid, ()))} for uid in ids if uid in self._users]
+
+    # ---------------------------------------------------------
+    # Search & explore (UC-10, UC-11)
+    # ---------------------------------------------------------
+    def search(self, q, skip, limit, exclude=()):
+        q = q.lower()
+        exclude = exclude if isinstance(exclude, AbstractSet) else set(exclude)
+        rows = []
+        with self._lock:
+            for username, uid in self._sorted:
+                if uid in exclude:
+                    continue
+                if q in username.lower() or q in self._users[uid]["name"].lower():
+                    if skip:
+                        skip -= 1
+                        continue
+                    rows.append(self._row(uid))
+                    if len(rows) >= limit:
+                        break
+        return rows
+
+    def popular(self, limit):
+        with self._lock:
+            top = heapq.nlargest(limit, self._followers, key=lambda uid: len(self._followers[uid]))
+            return [
+                {"id": uid, "username": self._users[uid]["username"], "name": self._users[uid]["name"],
+                 "followerCount": len(self._followers[uid])}
+                for uid in top
+            ]
+
+    # ---------------------------------------------------------
+    # Analytics
+    # ---------------------------------------------------------
+    def adjacency_page(self, after, limit):
+        with self._lock:
+            ids = sorted(self._users)
+            start = 0 if after is None else bisect.bisect_right(ids, after)
+            return [
+                {"id": uid, "following": list(self._following.get(uid, ())),
+                 "community": self._users[uid].get("community")}
+                for uid in ids[start:start + limit]
+            ]
+
+    def set_communities(self, rows):
+        updated = 0
+        with self._lock:
+            for r in rows:
+                user = self._users.get(r["id"])
+                if user is not None:
+                    user["community"] = r["community"]
+                    updated += 1
+        return updated
@@ -1,4 +1,9 @@
-from neo4j import GraphDatabase
+import os
+from contextlib import nullcontext
+from neo4j import GraphDatabase, Bookmarks, Query, READ_ACCESS, WRITE_ACCESS
+from neo4j.exceptions import Neo4jError
+from db.causal import current_bookmarks, record_bookmarks
+from db.query_scope import current_query_scope, QueryTimeout, QueryCancelled
 
 NEO4J_URI = "neo4j://127.0.0.1:7687"
 NEO4J_USER = "neo4j"
@@ -7,11 +12,170 @@ DB_NAME = "socialnetworkdb"
 
 driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
 
-def run_query(cypher, params=None):
+# Server-side timeout per query name, in seconds. Override with e.g.
+# QUERY_TIMEOUTS="adhoc=60,recommendations=2" or per call (timeout=).
+DEFAULT_QUERY_TIMEOUT = 10.0
+QUERY_TIMEOUTS = {
+    "adhoc": 30.0,            # admin Cypher editors
+    "login": 5.0,
+    "profile": 5.0,
+    "connections": 5.0,
+    "mutual": 5.0,
+    "recommendations": 5.0,
+    "degrees": 5.0,
+    "top_followers": 10.0,
+    "neighbours": 5.0,        # one BFS frontier (UC-12)
+    "search": 5.0,
+    "popular": 10.0,
+    "analytics": 30.0,        # one adjacency page of the statistics job
+    "communities": 30.0,      # one batch of community writes
+    "export": 600.0,          # streamed admin exports (db/export.py)
+}
+for _item in filter(None, os.environ.get("QUERY_TIMEOUTS", "").split(",")):
+    _name, _, _seconds = _item.partition("=")
+    QUERY_TIMEOUTS[_name.strip()] = float(_seconds)
+
+APP_TAG = "social-graph-ui"   # transaction metadata, visible in SHOW TRANSACTIONS
+
+TIMEOUT_CODES = ("TransactionTimedOut",)
+TERMINATED_CODES = ("Transaction.Terminated", "TransactionMarkedAsFailed")
+
+
+def query_timeout(name, timeout=None):
+    if timeout is None:
+        timeout = QUERY_TIMEOUTS.get(name, DEFAULT_QUERY_TIMEOUT)
+    scope = current_query_scope()
+    return scope.cap(timeout) if scope else timeout
+
+
+def run_query(cypher, params=None, access_mode=WRITE_ACCESS, name=None, timeout=None, max_rows=None):
+    """
+    Records of one statement. With max_rows, at most max_rows + 1 are
+    fetched (one extra so callers can tell the result was cut) and the
+    rest is discarded server-side.
+    """
     print("\n=== Cypher ===")
     print(cypher)
-    print("Params:", params)
+    print("Params:", params, "| access:", access_mode, "| name:", name)
+    print("=============\n")
+
+    scope = current_query_scope()
+    metadata = {"app": APP_TAG, "query": name or "unnamed"}
+    if scope is not None:
+        metadata["scope"] = scope.token
+    query = Query(cypher, metadata=metadata, timeout=query_timeout(name, timeout))
+
+    with scope.running() if scope else nullcontext():
+        return _execute(query, params, access_mode, name, max_rows)
+
+
+def _execute(query, params, access_mode, name, max_rows=None):
+    # Bookmarks of this client session's earlier writes (db/causal.py)
+    bookmarks = Bookmarks.from_raw_values(current_bookmarks())
+    records = []
+    with driver.session(database=DB_NAME, default_access_mode=access_mode, bookmarks=bookmarks) as session:
+        try:
+            result = session.run(query, params or {})
+            for record in result:
+                records.append(record)
+                if max_rows is not None and len(records) > max_rows:
+                    break
+            summary = result.consume()
+        except Neo4jError as e:
+            _raise_translated(e, query, name, records)
+        # Only statements that changed something move the bookmarks: a
+        # read run in WRITE mode (the ad-hoc editors, a no-op unfollow)
+        # must not change bookmark_tag() and with it every cache key.
+        if access_mode == WRITE_ACCESS and (summary.counters.contains_updates
+                                            or summary.counters.contains_system_updates):
+            record_bookmarks(session.last_bookmarks().raw_values)
+        return records
+
+
+def _raise_translated(error, query, name, partial):
+    code = error.code or ""
+    if any(c in code for c in TIMEOUT_CODES):
+        raise QueryTimeout(f"Query '{name or 'unnamed'}' timed out after {query.timeout:.1f}s", partial)
+    if any(c in code for c in TERMINATED_CODES):
+        raise QueryCancelled(f"Query '{name or 'unnamed'}' was cancelled")
+    raise error
+
+
+def run_read(cypher, params=None, name=None, timeout=None):
+    """Read-only statement; may be served by a follower that has caught up to our bookmarks."""
+    return run_query(cypher, params, access_mode=READ_ACCESS, name=name, timeout=timeout)
+
+
+def stream_query(cypher, params=None, name="export", chunk_size=1000, timeout=None):
+    """
+    Read-only statement whose records are yielded in lists of up to
+    chunk_size as they arrive, so a large result never has to fit in
+    memory. The driver pulls the same number of records per round trip.
+    """
+    print("\n=== Cypher (streamed) ===")
+    print(cypher)
+    print("Params:", params, "| name:", name)
     print("=============\n")
-    
+
+    scope = current_query_scope()
+    metadata = {"app": APP_TAG, "query": name}
+    if scope is not None:
+        metadata["scope"] = scope.token
+    query = Query(cypher, metadata=metadata, timeout=query_timeout(name, timeout))
+    bookmarks = Bookmarks.from_raw_values(current_bookmarks())
+
+    with scope.running() if scope else nullcontext():
+        with driver.session(database=DB_NAME, default_access_mode=READ_ACCESS,
+                            bookmarks=bookmarks, fetch_size=chunk_size) as session:
+            chunk = []
+            try:
+                for record in session.run(query, params or {}):
+                    chunk.append(record)
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+            except Neo4jError as e:
+                _raise_translated(e, query, name, chunk)
+            if chunk:
+                yield chunk
+
+
+def statement_type(cypher, params=None):
+    """
+    How the server classifies a statement, without running it (EXPLAIN):
+    'r' read, 'rw' read/write, 'w' write or 's' schema change.
+    """
     with driver.session(database=DB_NAME) as session:
-        return list(session.run(cypher, params or {}))
+        return session.run(Query("EXPLAIN " + cypher, metadata={"app": APP_TAG, "query": "explain"}),
+                           params or {}).consume().query_type
+
+
+CANCEL_QUERY = """
+SHOW TRANSACTIONS YIELD transactionId, metaData
+WHERE metaData.scope = $token
+RETURN collect(transactionId) AS ids
+"""
+
+
+def cancel_queries(token):
+    """Terminate every running transaction tagged with a QueryScope token."""
+    try:
+        with driver.session(database=DB_NAME) as session:
+            ids = session.run(CANCEL_QUERY, {"token": token}).single()["ids"]
+            if ids:
+                session.run("TERMINATE TRANSACTIONS $ids", {"ids": ids}).consume()
+                print(f"[INFO] Cancelled {len(ids)} transaction(s) of scope {token[:8]}")
+    except Exception as e:
+        print(f"[WARN] Could not cancel scope {token[:8]}: {e}")
+
+
+def violated_property(error):
+    """
+    Property named in a uniqueness ConstraintError, e.g. 'email' for
+    "Node(42) already exists with label `User` and property `email` = '...'".
+    """
+    message = error.message or ""
+    for prop in ("username", "email", "userId"):
+        if f"`{prop}`" in message:
+            return prop
+    return None
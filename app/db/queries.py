@@ -0,0 +1,161 @@
+import threading
+import time
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from db.repository import get_repository, GRAPH_BACKEND
+from db.loader import reset_user_loader
+from db.causal import CausalContext, bind_causal_context, bookmark_tag
+from db.query_scope import QueryScope, bind_query_scope
+from graph.paths import clear_adjacency_cache
+
+# ============================================================
+# Cached read queries
+# ============================================================
+# Streamlit reruns the whole script on every widget interaction.
+# The read queries below are shared by the admin and user views and
+# cached with st.cache_data, so a rerun costs at most one round trip
+# per distinct result. Results are plain dicts (picklable, and usable
+# by dataframe() and graph_render like driver records).
+#
+# Every write path MUST call the matching invalidate_* helper.
+#
+# Reads may be served by a lagging cluster member. Each cache key
+# includes the bookmark tag of the session that asked (see
+# db/causal.py): a session that has written only sees entries read at
+# or after its own write, even if another session refilled the cache
+# from a stale member right after the invalidation.
+
+CACHE_TTL = 300  # seconds; safety net on top of explicit invalidation
+
+
+def use_session_bookmarks():
+    """Bind this browser session's CausalContext; call once per rerun."""
+    if "causal_context" not in st.session_state:
+        st.session_state.causal_context = CausalContext()
+    bind_causal_context(st.session_state.causal_context)
+
+
+# ============================================================
+# Per-rerun query scope (db/query_scope.py)
+# ============================================================
+# A rerun that starts while the previous one is still running (fast
+# reruns) cancels the previous run's queries. A watcher thread cancels
+# the last scope of browser sessions that have disconnected.
+SESSION_WATCH_INTERVAL = 5.0  # seconds
+
+_watched = {}   # Streamlit session id -> its current QueryScope
+_watched_lock = threading.Lock()
+_watcher = None
+
+
+def _cancel(scope):
+    scope.cancel()
+    if scope.inflight and GRAPH_BACKEND == "neo4j":
+        from db.neo4j_client import cancel_queries
+        threading.Thread(target=cancel_queries, args=(scope.token,), daemon=True).start()
+
+
+def _watch_sessions():
+    while True:
+        time.sleep(SESSION_WATCH_INTERVAL)
+        if not Runtime.exists():
+            continue
+        runtime = Runtime.instance()
+        with _watched_lock:
+            gone = [sid for sid in _watched if not runtime.is_active_session(sid)]
+            scopes = [_watched.pop(sid) for sid in gone]
+        for scope in scopes:
+            if not scope.finished:
+                _cancel(scope)
+
+
+def _watch(scope):
+    global _watcher
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    with _watched_lock:
+        _watched[ctx.session_id] = scope
+        if _watcher is None:
+            _watcher = threading.Thread(target=_watch_sessions, name="query-scope-watcher", daemon=True)
+            _watcher.start()
+
+
+def start_query_scope():
+    """New QueryScope for this rerun; cancels the previous one if it never finished."""
+    previous = st.session_state.get("query_scope")
+    if previous is not None and not previous.finished:
+        _cancel(previous)
+    scope = QueryScope()
+    st.session_state.query_scope = scope
+    bind_query_scope(scope)
+    _watch(scope)
+    return scope
+
+
+def finish_query_scope():
+    """Call at the end of the script; a finished scope is never cancelled."""
+    scope = st.session_state.get("query_scope")
+    if scope is not None:
+        scope.finished = True
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _list_users(limit, bookmark):
+    return get_repository().list_users(limit)
+
+
+def list_users(limit=500):
+    """User dropdown used by UC-3 through UC-9."""
+    return _list_users(limit, bookmark_tag())
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _following(uid, bookmark):
+    return get_repository().following(uid)
+
+
+def following(uid):
+    """Full following list; connections, unfollow and mutual tabs share it."""
+    return _following(uid, bookmark_tag())
+
+
+PROFILE_PAGE_SIZE = 100
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _load_profile(uid, page, bookmark):
+    profile = get_repository().profile(uid, page)
+    if profile is None:
+        return None
+    profile["followingIds"] = set(profile["followingIds"])
+    return profile
+
+
+def load_profile(uid, page=PROFILE_PAGE_SIZE):
+    """
+    Everything a profile page needs in one round trip: header fields,
+    both counts, the first page of followers and following, and the
+    ids the user follows (for "already follows" exclusion).
+    Returns None if the user does not exist.
+    """
+    return _load_profile(uid, page, bookmark_tag())
+
+
+# ============================================================
+# Invalidation
+# ============================================================
+def invalidate_users():
+    """Call after a user is created or a profile is edited."""
+    _list_users.clear()
+    _following.clear()
+    _load_profile.clear()
+    reset_user_loader()
+
+
+def invalidate_follows():
+    """Call after any FOLLOWS relationship is created or deleted."""
+    _following.clear()
+    _load_profile.clear()
+    clear_adjacency_cache()
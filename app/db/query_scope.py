@@ -0,0 +1,108 @@
+import contextvars
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# ============================================================
+# Query scope: timeouts, cancellation, page latency budget
+# ============================================================
+# One QueryScope per Streamlit rerun (see queries.start_query_scope).
+# Every Neo4j query issued while it is bound:
+#
+# - is tagged with the scope's token in its transaction metadata, so
+#   the scope can be cancelled server-side (TERMINATE TRANSACTIONS) when
+#   the script reruns before finishing or the browser session goes away
+# - raises QueryCancelled instead of starting once the scope is cancelled
+# - inside an optional panel (scope.capped()), gets a timeout no longer
+#   than what is left of the page budget
+#
+# Essential queries (profile header, login) always get their full
+# per-name timeout; only optional panels degrade.
+
+PAGE_BUDGET = int(os.environ.get("PAGE_BUDGET_MS", "3000")) / 1000
+MIN_QUERY_TIMEOUT = 0.25   # seconds; a capped query always gets at least this
+
+
+class QueryTimeout(Exception):
+    """The query ran out of time; .partial holds rows received before that."""
+
+    def __init__(self, message, partial=None):
+        super().__init__(message)
+        self.partial = partial or []
+
+
+class QueryCancelled(Exception):
+    """The rerun or session that issued the query is gone."""
+
+
+class QueryScope:
+
+    def __init__(self, budget=PAGE_BUDGET):
+        self.token = uuid.uuid4().hex
+        self.budget = budget
+        self.started = time.monotonic()
+        self.finished = False
+        self.skipped = []   # labels of optional panels that were skipped
+        self._cancelled = threading.Event()
+        self._capped = 0
+        self._lock = threading.Lock()
+        self.inflight = 0   # queries currently running under this scope
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def remaining(self):
+        return self.budget - self.elapsed()
+
+    def exhausted(self):
+        return self.remaining() <= MIN_QUERY_TIMEOUT
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        if self.cancelled:
+            raise QueryCancelled("query scope was cancelled")
+
+    def cap(self, timeout):
+        """Per-query timeout, shortened to the remaining budget inside capped()."""
+        if not self._capped:
+            return timeout
+        return min(timeout, max(self.remaining(), MIN_QUERY_TIMEOUT))
+
+    @contextmanager
+    def running(self):
+        """Wrap a query so cancel() knows whether anything needs terminating."""
+        self.check()
+        with self._lock:
+            self.inflight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.inflight -= 1
+
+    @contextmanager
+    def capped(self):
+        self._capped += 1
+        try:
+            yield
+        finally:
+            self._capped -= 1
+
+
+_current = contextvars.ContextVar("query_scope", default=None)
+
+
+def bind_query_scope(scope):
+    _current.set(scope)
+
+
+def current_query_scope():
+    return _current.get()
@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import deque
+from db.causal import current_bookmarks, record_bookmarks
+
+# ============================================================
+# Lagging replica stand-in (GRAPH_BACKEND=memory, REPLICA_LAG_MS>0)
+# ============================================================
+# Wraps a MemoryGraphStore as a primary plus one read replica that
+# applies each write `lag` seconds after it happened, so stale reads
+# and the bookmark fix for them can be reproduced without a cluster.
+#
+# - writes go to the primary, are logged with a transaction number and
+#   return the bookmark "replica-sim:<tx>" to the caller's CausalContext
+# - reads go to the replica; before serving one it applies every write
+#   whose lag has elapsed, plus every write up to the highest bookmark
+#   the caller holds (a real follower blocks until it has those)
+#
+# stale_reads counts reads that returned before some logged write was
+# applied; waited counts reads that had to catch up for a bookmark.
+
+BOOKMARK_PREFIX = "replica-sim:"
+
+WRITE_METHODS = {
+    "create_user", "update_profile", "set_password_hash", "bulk_follow", "bulk_unfollow", "set_communities",
+}
+
+
+class LaggingReplicaStore:
+
+    def __init__(self, primary, lag):
+        self.primary = primary
+        self.replica = primary.clone()
+        self.lag = lag
+        self._lock = threading.Lock()
+        self._log = deque()   # (tx, ready_at, method, args, kwargs)
+        self._tx = 0
+        self.applied = 0
+        self.waited = 0
+        self.stale_reads = 0
+
+    def _write(self, method, *args, **kwargs):
+        with self._lock:
+            result = getattr(self.primary, method)(*args, **kwargs)
+            self._tx += 1
+            self._log.append((self._tx, time.monotonic() + self.lag, method, args, kwargs))
+            tx = self._tx
+        record_bookmarks([f"{BOOKMARK_PREFIX}{tx}"])
+        return result
+
+    def _required_tx(self):
+        txs = [int(b[len(BOOKMARK_PREFIX):]) for b in current_bookmarks() if b.startswith(BOOKMARK_PREFIX)]
+        return max(txs, default=0)
+
+    def _catch_up(self):
+        required = self._required_tx()
+        now = time.monotonic()
+        waited = False
+        with self._lock:
+            while self._log:
+                tx, ready_at, method, args, kwargs = self._log[0]
+                if ready_at > now and tx > required:
+                    break
+                waited = waited or ready_at > now
+                getattr(self.replica, method)(*args, **kwargs)
+                self.applied = tx
+                self._log.popleft()
+            self.waited += waited
+            self.stale_reads += bool(self._log)
+
+    def __getattr__(self, name):
+        if name in WRITE_METHODS:
+            return lambda *args, **kwargs: self._write(name, *args, **kwargs)
+
+        read = getattr(self.replica, name)
+        if not callable(read):
+            return read
+
+        def replica_read(*args, **kwargs):
+            self._catch_up()
+            return read(*args, **kwargs)
+
+        return replica_read
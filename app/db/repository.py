@@ -0,0 +1,286 @@
+import os
+import threading
+from neo4j.exceptions import ConstraintError
+from db.neo4j_client import run_query, run_read, violated_property
+from db.id_allocator import allocate_user_id
+from db.supernodes import SUPERNODE_THRESHOLD, TOP_FOLLOWERS, TTLCache, fanout
+from db.cypher import (
+    USER_QUERY, USERS_BY_ID_QUERY, LIST_USERS_QUERY, LOGIN_QUERY, REHASH_QUERY, REGISTER_QUERY,
+    UPDATE_PROFILE_QUERY, PROFILE_QUERY, FOLLOWS_EDGE_QUERY, FOLLOWING_QUERY,
+    BULK_FOLLOW_QUERY, BULK_UNFOLLOW_QUERY, FOLLOWERS_PAGE_QUERY, FOLLOWING_PAGE_QUERY,
+    MUTUAL_QUERY, RECOMMENDATIONS_QUERY, RECOMMENDATIONS_EXCLUDE_QUERY, DEGREES_QUERY, TOP_FOLLOWERS_QUERY,
+    NEIGHBOURS_OUT_QUERY, NEIGHBOURS_IN_QUERY,
+    SEARCH_QUERY, POPULAR_QUERY, ADJACENCY_PAGE_QUERY, SET_COMMUNITIES_QUERY,
+)
+
+# ============================================================
+# Graph repository
+# ============================================================
+# The use-case operations, independent of where the graph lives:
+#
+#   GRAPH_BACKEND=neo4j   (default) Neo4jRepository; reads via run_read
+#                         (READ access, bookmarked), writes via run_query
+#   GRAPH_BACKEND=memory  MemoryGraphStore (db/memory_store.py), loaded
+#                         from the db_setup CSVs; no server needed.
+#                         REPLICA_LAG_MS>0 serves reads from a lagging
+#                         replica (db/replica_sim.py)
+#   GRAPH_BACKEND=sharded same CSVs split by planted cluster over
+#                         GRAPH_SHARDS in-memory shards behind a
+#                         routing store (db/sharding.py)
+#
+# GRAPH_SNAPSHOT loads the memory / sharded backends from a binary
+# snapshot (db/snapshot.py, db_setup/graph_snapshot.py) instead.
+#
+# Both return plain dicts with the same keys as the Cypher in
+# db/cypher.py, and both handle supernodes as db/supernodes.py
+# describes. Callers (db/queries.py, db/users.py, db/follows.py,
+# the auth service and the views) go through get_repository() and keep
+# their own caching and invalidation.
+#
+# Methods:
+#   list_users(limit), get_user(uid), get_users(ids), get_credentials(username),
+#   create_user(...), update_profile(...), set_password_hash(uid, h),
+#   profile(uid, page), follows(fid, tid), bulk_follow(pairs),
+#   bulk_unfollow(pairs), following(uid), followers_page(uid, skip, limit),
+#   following_page(uid, skip, limit), mutual(aid, bid, skip, limit),
+#   recommendations(uid, limit), degrees(ids), top_followers(uid, limit),
+#   neighbours(ids, direction),
+#   search(q, skip, limit, exclude),
+#   popular(limit), adjacency_page(after, limit), set_communities(rows)
+
+GRAPH_BACKEND = os.environ.get("GRAPH_BACKEND", "neo4j")
+REPLICA_LAG_MS = int(os.environ.get("REPLICA_LAG_MS", "0"))  # memory backend only
+GRAPH_SHARDS = int(os.environ.get("GRAPH_SHARDS", "4"))        # sharded backend only
+GRAPH_SNAPSHOT = os.environ.get("GRAPH_SNAPSHOT", "")           # memory / sharded backends
+DATA_DIR = os.environ.get(
+    "GRAPH_DATA_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "..", "db_setup"),
+)
+
+
+class DuplicateKeyError(Exception):
+    """A uniqueness constraint was violated; .prop names the property."""
+
+    def __init__(self, prop, value):
+        super().__init__(f"{prop} '{value}' already exists")
+        self.prop = prop
+
+
+def _data(rows):
+    return [r.data() for r in rows]
+
+
+class Neo4jRepository:
+
+    USER_ID_RETRIES = 2
+
+    def __init__(self, supernode_threshold=SUPERNODE_THRESHOLD):
+        self.supernode_threshold = supernode_threshold
+        self._degrees = TTLCache()
+        self._top_followers = TTLCache()
+
+    # ---------------------------------------------------------
+    # Users (UC-1 .. UC-4)
+    # ---------------------------------------------------------
+    def list_users(self, limit):
+        return _data(run_read(LIST_USERS_QUERY, {"limit": limit}, name="list_users"))
+
+    def get_user(self, uid):
+        rows = run_read(USER_QUERY, {"uid": uid}, name="users")
+        return rows[0].data() if rows else None
+
+    def get_users(self, ids):
+        """Users for a list of ids in one round trip; unknown ids are left out."""
+        return _data(run_read(USERS_BY_ID_QUERY, {"ids": list(ids)}, name="users"))
+
+    def get_credentials(self, username):
+        """User dict including passwordHash, or None."""
+        rows = run_read(LOGIN_QUERY, {"username": username}, name="login")
+        return rows[0].data() if rows else None
+
+    def create_user(self, username, email, name, bio, password_hash):
+        params = {
+            "username": username,
+            "email": email,
+            "name": name,
+            "bio": bio,
+            "passwordHash": password_hash,
+        }
+        for _ in range(self.USER_ID_RETRIES + 1):
+            params["userId"] = allocate_user_id()
+            try:
+                return run_query(REGISTER_QUERY, params, name="register")[0].data()
+            except ConstraintError as e:
+                prop = violated_property(e)
+                if prop in ("username", "email"):
+                    raise DuplicateKeyError(prop, params[prop])
+                if prop != "userId":
+                    raise
+                # id created outside the sequence; take the next one
+        raise RuntimeError("Could not allocate a free userId; run db_setup/migrate_db.py.")
+
+    def update_profile(self, uid, name, email, bio):
+        try:
+            rows = run_query(UPDATE_PROFILE_QUERY, {
+                "uid": uid,
+                "newName": name,
+                "newEmail": email,
+                "newBio": bio,
+            }, name="update_profile")
+        except ConstraintError as e:
+            if violated_property(e) == "email":
+                raise DuplicateKeyError("email", email)
+            raise
+        return rows[0].data() if rows else None
+
+    def set_password_hash(self, uid, password_hash):
+        run_query(REHASH_QUERY, {"uid": uid, "hash": password_hash}, name="login")
+
+    def profile(self, uid, page):
+        """Profile bundle in one round trip; the query checks the supernode degree itself."""
+        rows = run_read(PROFILE_QUERY, {"uid": uid, "page": page, "threshold": self.supernode_threshold}, name="profile")
+        return rows[0].data() if rows else None
+
+    # ---------------------------------------------------------
+    # Social graph (UC-5 .. UC-9)
+    # ---------------------------------------------------------
+    def follows(self, follower_id, target_id):
+        return run_read(FOLLOWS_EDGE_QUERY, {"fid": follower_id, "tid": target_id}, name="follows")[0]["follows"]
+
+    def bulk_follow(self, pairs):
+        rows = run_query(BULK_FOLLOW_QUERY, {"pairs": pairs}, name="bulk_follow")
+        return [{k: r[k] for k in ("followerId", "targetId", "outcome")} for r in rows]
+
+    def bulk_unfollow(self, pairs):
+        rows = run_query(BULK_UNFOLLOW_QUERY, {"pairs": pairs}, name="bulk_unfollow")
+        return [{k: r[k] for k in ("followerId", "targetId", "outcome")} for r in rows]
+
+    def following(self, uid):
+        return _data(run_read(FOLLOWING_QUERY, {"uid": uid}, name="connections"))
+
+    def followers_page(self, uid, skip, limit):
+        return _data(run_read(FOLLOWERS_PAGE_QUERY, {"uid": uid, "skip": skip, "limit": limit}, name="connections"))
+
+    def following_page(self, uid, skip, limit):
+        return _data(run_read(FOLLOWING_PAGE_QUERY, {"uid": uid, "skip": skip, "limit": limit}, name="connections"))
+
+    def mutual(self, aid, bid, skip, limit):
+        return _data(run_read(MUTUAL_QUERY, {"aid": aid, "bid": bid, "skip": skip, "limit": limit}, name="mutual"))
+
+    def recommendations(self, uid, limit, exclude=None):
+        """exclude: ids known to be uid or followed by uid (e.g. a FollowingSet), checked per candidate."""
+        params = {"uid": uid, "limit": limit, "fanout": fanout(self.supernode_threshold)}
+        if exclude is None:
+            return _data(run_read(RECOMMENDATIONS_QUERY, params, name="recommendations"))
+        params["exclude"] = list(exclude)
+        return _data(run_read(RECOMMENDATIONS_EXCLUDE_QUERY, params, name="recommendations"))
+
+    # ---------------------------------------------------------
+    # Supernodes (db/supernodes.py)
+    # ---------------------------------------------------------
+    def degrees(self, ids):
+        """{id: {followers, following}} for known ids; cached for SUPERNODE_CACHE_TTL."""
+        def load(missing):
+            rows = run_read(DEGREES_QUERY, {"ids": missing}, name="degrees")
+            return {r["id"]: {"followers": r["followers"], "following": r["following"]} for r in rows}
+        return self._degrees.get_many(list(ids), load)
+
+    def is_supernode(self, uid):
+        if self.supernode_threshold <= 0:
+            return False
+        degree = self.degrees([uid]).get(uid)
+        return bool(degree) and max(degree.values()) >= self.supernode_threshold
+
+    def top_followers(self, uid, limit=TOP_FOLLOWERS):
+        """Most-followed followers of uid, with followerCount; cached like degrees."""
+        return self._top_followers.get((uid, limit), lambda: _data(run_read(
+            TOP_FOLLOWERS_QUERY, {"uid": uid, "limit": limit}, name="top_followers",
+        )))
+
+    def neighbours(self, ids, direction):
+        """{id, neighbours} per known id; direction "out" = followed ids, "in" = followers."""
+        query = NEIGHBOURS_OUT_QUERY if direction == "out" else NEIGHBOURS_IN_QUERY
+        return _data(run_read(query, {"ids": list(ids)}, name="neighbours"))
+
+    # ---------------------------------------------------------
+    # Search & explore (UC-10, UC-11)
+    # ---------------------------------------------------------
+    def search(self, q, skip, limit, exclude=()):
+        return _data(run_read(
+            SEARCH_QUERY, {"q": q, "skip": skip, "limit": limit, "exclude": list(exclude)}, name="search",
+        ))
+
+    def popular(self, limit):
+        return _data(run_read(POPULAR_QUERY, {"limit": limit}, name="popular"))
+
+    # ---------------------------------------------------------
+    # Analytics
+    # ---------------------------------------------------------
+    def adjacency_page(self, after, limit):
+        """Up to `limit` users with userId > after (None: from the start), as {id, following, community}, in userId order."""
+        return _data(run_read(ADJACENCY_PAGE_QUERY, {"after": after, "limit": limit}, name="analytics"))
+
+    def set_communities(self, rows):
+        """Write [{id, community}] in one statement; returns the number of users updated."""
+        return run_query(SET_COMMUNITIES_QUERY, {"rows": rows}, name="communities")[0]["updated"]
+
+
+# ============================================================
+# Backend selection
+# ============================================================
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def load_memory_store(data_dir=DATA_DIR, snapshot=GRAPH_SNAPSHOT):
+    from db.memory_store import MemoryGraphStore
+
+    if snapshot:
+        store = MemoryGraphStore.from_snapshot(snapshot)
+        print(f"[INFO] In-memory graph restored from snapshot {os.path.abspath(snapshot)}")
+        return store
+    users_csv = os.path.join(data_dir, "users.csv")
+    follows_csv = os.path.join(data_dir, "follows.csv")
+    store = MemoryGraphStore.from_csv(users_csv, follows_csv if os.path.exists(follows_csv) else None)
+    print(f"[INFO] In-memory graph loaded from {os.path.abspath(data_dir)}")
+    return store
+
+
+def load_sharded_store(data_dir=DATA_DIR, shards=GRAPH_SHARDS, snapshot=GRAPH_SNAPSHOT):
+    from db.sharding import ShardedGraphStore
+
+    if snapshot:
+        store = ShardedGraphStore.from_snapshot(snapshot, shards)
+        print(f"[INFO] Sharded graph restored from snapshot {os.path.abspath(snapshot)} ({shards} shards)")
+        return store
+    users_csv = os.path.join(data_dir, "users.csv")
+    follows_csv = os.path.join(data_dir, "follows.csv")
+    store = ShardedGraphStore.from_csv(users_csv, follows_csv if os.path.exists(follows_csv) else None, shards)
+    print(f"[INFO] Sharded graph loaded from {os.path.abspath(data_dir)} ({shards} shards)")
+    return store
+
+
+def get_repository():
+    """Process-wide repository for GRAPH_BACKEND."""
+    global _repository
+    with _repository_lock:
+        if _repository is None:
+            if GRAPH_BACKEND == "memory":
+                _repository = load_memory_store()
+                if REPLICA_LAG_MS > 0:
+                    from db.replica_sim import LaggingReplicaStore
+                    _repository = LaggingReplicaStore(_repository, REPLICA_LAG_MS / 1000)
+            elif GRAPH_BACKEND == "sharded":
+                _repository = load_sharded_store()
+            elif GRAPH_BACKEND == "neo4j":
+                _repository = Neo4jRepository()
+            else:
+                raise ValueError(f"Unknown GRAPH_BACKEND '{GRAPH_BACKEND}' (expected neo4j, memory or sharded)")
+        return _repository
+
+
+def set_repository(repository):
+    """Swap the backend, e.g. a MemoryGraphStore in a test or benchmark."""
+    global _repository
+    with _repository_lock:
+        _repository = repository
@@ -0,0 +1,521 @@
+import bisect
+import csv
+import heapq
+import threading
+from collections import Counter, defaultdict
+from collections.abc import Set as AbstractSet
+from itertools import islice
+from db.memory_store import PUBLIC_FIELDS, SUMMARY_FIELDS
+from db.repository import DuplicateKeyError
+from db.snapshot import Snapshot
+from db.supernodes import SUPERNODE_THRESHOLD, TOP_FOLLOWERS, fanout
+
+# ============================================================
+# Cluster-partitioned graph (GRAPH_BACKEND=sharded)
+# ============================================================
+# generate_graph.py plants PARTITION_CLUSTERS clusters and only follows
+# across them with probability 0.005, so the cluster is the sharding
+# key: every user lives on one shard (GraphShard) together with the
+# users they follow (their outgoing FOLLOWS). Each shard also indexes
+# which of its users follow any given id, local or not, so a follower
+# list is the union of one lookup per shard.
+#
+# ShardedGraphStore is the router in front of the shards and has the
+# same methods and result shapes as MemoryGraphStore / Neo4jRepository:
+#
+# - single-user operations (get_user, following, following_page,
+#   follows, bulk_follow per follower, profile header) go to the
+#   user's home shard
+# - follower lists, degrees and popular fan out to every shard and add
+#   up the per-shard parts
+# - mutual (UC-8) reads two following sets (one shard when both users
+#   share a cluster); recommendations (UC-9) asks each friend's shard
+#   for its friends' capped following lists and merges the counts
+# - list_users / search / adjacency_page merge per-shard sorted pages
+#
+# Users and emails are unique across shards through the router's
+# directory (userId -> shard, username, email); new users go to the
+# smallest shard. Shards here are in-process stores, so the router can
+# be tested and benchmarked without servers; a shard backed by one
+# database per partition would implement the same GraphShard methods.
+
+PARTITION_CLUSTERS = 20   # generate_graph.py NUM_CLUSTERS
+
+
+# ---------------------------------------------------------
+# Shard
+# ---------------------------------------------------------
+class GraphShard:
+    """Home users of one partition and their outgoing FOLLOWS."""
+
+    def __init__(self, index):
+        self.index = index
+        self._lock = threading.RLock()
+        self._users = {}          # userId -> user dict (home users only)
+        self._sorted = []         # (username, userId) of home users
+        self._following = {}      # home userId -> set(userId, any shard)
+        self._followers = {}      # any userId -> set(home userIds following it)
+        self.calls = 0            # requests served, for routing checks
+
+    def _row(self, uid, fields=SUMMARY_FIELDS):
+        user = self._users[uid]
+        return {k: user[k] for k in fields}
+
+    # Users
+    def add_user(self, user):
+        with self._lock:
+            self.calls += 1
+            self._users[user["id"]] = dict(user)
+            bisect.insort(self._sorted, (user["username"], user["id"]))
+            self._following[user["id"]] = set()
+            return self._row(user["id"], PUBLIC_FIELDS)
+
+    def get_users(self, ids, fields=SUMMARY_FIELDS):
+        with self._lock:
+            self.calls += 1
+            return [self._row(uid, fields) for uid in ids if uid in self._users]
+
+    def credentials(self, uid):
+        with self._lock:
+            self.calls += 1
+            return dict(self._users[uid]) if uid in self._users else None
+
+    def update_user(self, uid, **fields):
+        with self._lock:
+            self.calls += 1
+            if uid not in self._users:
+                return None
+            self._users[uid].update(fields)
+            return self._row(uid, PUBLIC_FIELDS)
+
+    def sorted_users(self, limit, fields=PUBLIC_FIELDS):
+        """First `limit` home users by username."""
+        with self._lock:
+            self.calls += 1
+            return [self._row(uid, fields) for _, uid in self._sorted[:limit]]
+
+    def search(self, q, limit, exclude):
+        """First `limit` matching home users by username."""
+        rows = []
+        with self._lock:
+            self.calls += 1
+            for username, uid in self._sorted:
+                if uid in exclude:
+                    continue
+                if q in username.lower() or q in self._users[uid]["name"].lower():
+                    rows.append(self._row(uid))
+                    if len(rows) >= limit:
+                        break
+        return rows
+
+    # Edges
+    def link(self, pairs):
+        """'created' / 'exists' per (home follower, target) pair."""
+        outcomes = []
+        with self._lock:
+            self.calls += 1
+            for f, t in pairs:
+                if t in self._following[f]:
+                    outcomes.append("exists")
+                else:
+                    self._following[f].add(t)
+                    self._followers.setdefault(t, set()).add(f)
+                    outcomes.append("created")
+        return outcomes
+
+    def unlink(self, pairs):
+        outcomes = []
+        with self._lock:
+            self.calls += 1
+            for f, t in pairs:
+                if t in self._following.get(f, ()):
+                    self._following[f].discard(t)
+                    self._followers[t].discard(f)
+                    outcomes.append("deleted")
+                else:
+                    outcomes.append("not_following")
+        return outcomes
+
+    def following(self, ids, cap=None):
+        """{home id: [followed ids]}, at most cap per id."""
+        with self._lock:
+            self.calls += 1
+            return {uid: list(islice(self._following[uid], cap)) for uid in ids if uid in self._following}
+
+    def followers(self, ids):
+        """{id: [home users following it]} for ids followed from this shard."""
+        with self._lock:
+            self.calls += 1
+            return {uid: list(self._followers[uid]) for uid in ids if self._followers.get(uid)}
+
+    def follower_counts(self, ids=None):
+        """{id: home followers}; every id followed from this shard when ids is None."""
+        with self._lock:
+            self.calls += 1
+            keys = self._followers if ids is None else ids
+            return {uid: len(self._followers[uid]) for uid in keys if self._followers.get(uid)}
+
+    # Analytics
+    def adjacency_page(self, after, limit):
+        with self._lock:
+            self.calls += 1
+            ids = sorted(self._users)
+            start = 0 if after is None else bisect.bisect_right(ids, after)
+            return [
+                {"id": uid, "following": list(self._following[uid]), "community": self._users[uid].get("community")}
+                for uid in ids[start:start + limit]
+            ]
+
+    def set_communities(self, rows):
+        with self._lock:
+            self.calls += 1
+            updated = 0
+            for r in rows:
+                if r["id"] in self._users:
+                    self._users[r["id"]]["community"] = r["community"]
+                    updated += 1
+            return updated
+
+
+# ---------------------------------------------------------
+# Router
+# ---------------------------------------------------------
+class ShardedGraphStore:
+
+    def __init__(self, shards):
+        self.shards = shards
+        self._lock = threading.RLock()   # guards the directory below
+        self._home = {}                  # userId -> shard index
+        self._by_username = {}           # username -> userId
+        self._by_email = {}              # email -> userId
+        self._last_id = 0
+        self.supernode_threshold = SUPERNODE_THRESHOLD
+
+    @classmethod
+    def from_csv(cls, users_csv, follows_csv=None, shards=4):
+        """Partition the files written by db_setup/generate_users.py and generate_graph.py."""
+        with open(users_csv, newline="") as f:
+            users = [
+                {
+                    "id": r["userId"].zfill(4),
+                    "username": r["username"],
+                    "email": r["email"],
+                    "name": r["name"],
+                    "bio": r["bio"],
+                    "passwordHash": r["passwordHash"],
+                }
+                for r in csv.DictReader(f)
+            ]
+        pairs = []
+        if follows_csv:
+            with open(follows_csv, newline="") as f:
+                pairs = [(r["followerId"].zfill(4), r["followeeId"].zfill(4)) for r in csv.DictReader(f)]
+        return cls.partition(users, pairs, shards)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, shards=4):
+        """Partition a snapshot written by db_setup/graph_snapshot.py: a db/snapshot.py Snapshot or its path."""
+        if not isinstance(snapshot, Snapshot):
+            snapshot = Snapshot(snapshot)
+        users = snapshot.users()
+        ids = [u["id"] for u in users]
+        followers, targets = snapshot.edges()
+        return cls.partition(users, [(ids[f], ids[t]) for f, t in zip(followers.tolist(), targets.tolist())], shards)
+
+    @classmethod
+    def partition(cls, users, pairs, shards):
+        """
+        users in users.csv order, which is cluster order (generate_graph.py
+        slices it into PARTITION_CLUSTERS runs); cluster c lives on shard
+        c % shards. pairs are (followerId, followeeId).
+        """
+        store = cls([GraphShard(i) for i in range(shards)])
+        size = max(len(users) // PARTITION_CLUSTERS, 1)
+        for i, user in enumerate(users):
+            store._add(user, min(i // size, PARTITION_CLUSTERS - 1) % shards)
+        by_shard = defaultdict(list)
+        for follower, target in pairs:
+            by_shard[store._home[follower]].append((follower, target))
+        for index, group in by_shard.items():
+            store.shards[index].link(group)
+        return store
+
+    # ---------------------------------------------------------
+    # Routing helpers
+    # ---------------------------------------------------------
+    def _add(self, user, index):
+        if user["id"] in self._home:
+            raise DuplicateKeyError("userId", user["id"])
+        if user["username"] in self._by_username:
+            raise DuplicateKeyError("username", user["username"])
+        if user["email"] in self._by_email:
+            raise DuplicateKeyError("email", user["email"])
+        self._home[user["id"]] = index
+        self._by_username[user["username"]] = user["id"]
+        self._by_email[user["email"]] = user["id"]
+        if user["id"].isdigit():
+            self._last_id = max(self._last_id, int(user["id"]))
+        return self.shards[index].add_user(user)
+
+    def _shard(self, uid):
+        index = self._home.get(uid)
+        return None if index is None else self.shards[index]
+
+    def _group(self, ids):
+        """{shard: [ids]} for known ids, in input order."""
+        groups = defaultdict(list)
+        for uid in ids:
+            index = self._home.get(uid)
+            if index is not None:
+                groups[self.shards[index]].append(uid)
+        return groups
+
+    def _rows(self, ids, fields=SUMMARY_FIELDS):
+        """{id: row} for known ids, one request per shard involved."""
+        rows = {}
+        for shard, group in self._group(ids).items():
+            rows.update((r["id"], r) for r in shard.get_users(group, fields))
+        return rows
+
+    def _ordered(self, ids):
+        """Rows for ids, sorted by username."""
+        return sorted(self._rows(ids).values(), key=lambda r: r["username"])
+
+    def _following_ids(self, uid):
+        shard = self._shard(uid)
+        return set(shard.following([uid]).get(uid, ())) if shard else set()
+
+    def _follower_ids(self, uid):
+        followers = set()
+        for shard in self.shards:
+            followers.update(shard.followers([uid]).get(uid, ()))
+        return followers
+
+    def _follower_counts(self, ids=None):
+        counts = Counter()
+        for shard in self.shards:
+            counts.update(shard.follower_counts(ids))
+        return counts
+
+    def stats(self):
+        """Users and requests per shard, and the share of edges that cross shards."""
+        edges = cross = 0
+        for shard in self.shards:
+            for uid, targets in shard.following(list(shard._users)).items():
+                edges += len(targets)
+                cross += sum(self._home.get(t) != shard.index for t in targets)
+        return {
+            "shards": [{"index": s.index, "users": len(s._users), "calls": s.calls} for s in self.shards],
+            "edges": edges,
+            "cross_shard_edges": cross,
+        }
+
+    # ---------------------------------------------------------
+    # Users (UC-1 .. UC-4)
+    # ---------------------------------------------------------
+    def list_users(self, limit):
+        pages = [shard.sorted_users(limit) for shard in self.shards]
+        return list(islice(heapq.merge(*pages, key=lambda r: r["username"]), limit))
+
+    def get_user(self, uid):
+        shard = self._shard(uid)
+        rows = shard.get_users([uid], PUBLIC_FIELDS) if shard else []
+        return rows[0] if rows else None
+
+    def get_users(self, ids):
+        rows = self._rows(ids, PUBLIC_FIELDS)
+        return [rows[uid] for uid in ids if uid in rows]
+
+    def get_credentials(self, username):
+        uid = self._by_username.get(username)
+        return self._shard(uid).credentials(uid) if uid else None
+
+    def create_user(self, username, email, name, bio, password_hash):
+        with self._lock:
+            sizes = [len(shard._users) for shard in self.shards]
+            user = {
+                "id": f"{self._last_id + 1:04d}",
+                "username": username,
+                "email": email,
+                "name": name,
+                "bio": bio,
+                "passwordHash": password_hash,
+            }
+            return self._add(user, sizes.index(min(sizes)))
+
+    def update_profile(self, uid, name, email, bio):
+        with self._lock:
+            shard = self._shard(uid)
+            if shard is None:
+                return None
+            owner = self._by_email.get(email)
+            if owner is not None and owner != uid:
+                raise DuplicateKeyError("email", email)
+            old = shard.credentials(uid)["email"]
+            del self._by_email[old]
+            self._by_email[email] = uid
+            return shard.update_user(uid, name=name, email=email, bio=bio)
+
+    def set_password_hash(self, uid, password_hash):
+        shard = self._shard(uid)
+        if shard is not None:
+            shard.update_user(uid, passwordHash=password_hash)
+
+    def profile(self, uid, page):
+        shard = self._shard(uid)
+        if shard is None:
+            return None
+        bundle = shard.get_users([uid], PUBLIC_FIELDS)[0]
+        following = self._ordered(self._following_ids(uid))
+        followers = self._follower_ids(uid)
+        sample = self.is_supernode(uid)
+        if sample:
+            follower_page = list(self._rows(list(islice(followers, page))).values())
+        else:
+            follower_page = self._ordered(followers)[:page]
+        bundle.update(
+            followerCount=len(followers),
+            followingCount=len(following),
+            followerPage=follower_page,
+            followerPreview="sample" if sample else "ordered",
+            followingPage=following[:page],
+            followingIds=[r["id"] for r in following],
+        )
+        return bundle
+
+    # ---------------------------------------------------------
+    # Social graph (UC-5 .. UC-9)
+    # ---------------------------------------------------------
+    def follows(self, follower_id, target_id):
+        return target_id in self._following_ids(follower_id)
+
+    def _write(self, pairs, apply):
+        """Validate pairs, send each follower's edges to its home shard, keep input order."""
+        outcomes = [None] * len(pairs)
+        by_shard = defaultdict(list)
+        for i, p in enumerate(pairs):
+            f, t = p["followerId"], p["targetId"]
+            if apply == "link" and (f not in self._home or t not in self._home):
+                outcomes[i] = "missing"
+            elif apply == "link" and f == t:
+                outcomes[i] = "self"
+            elif f in self._home:
+                by_shard[self._home[f]].append((i, f, t))
+            else:
+                outcomes[i] = "not_following"
+        for index, items in by_shard.items():
+            shard = self.shards[index]
+            done = getattr(shard, apply)([(f, t) for _, f, t in items])
+            for (i, _, _), outcome in zip(items, done):
+                outcomes[i] = outcome
+        return [
+            {"followerId": p["followerId"], "targetId": p["targetId"], "outcome": outcome}
+            for p, outcome in zip(pairs, outcomes)
+        ]
+
+    def bulk_follow(self, pairs):
+        return self._write(pairs, "link")
+
+    def bulk_unfollow(self, pairs):
+        return self._write(pairs, "unlink")
+
+    def following(self, uid):
+        return self._ordered(self._following_ids(uid))
+
+    def followers_page(self, uid, skip, limit):
+        return self._ordered(self._follower_ids(uid))[skip:skip + limit]
+
+    def following_page(self, uid, skip, limit):
+        return self._ordered(self._following_ids(uid))[skip:skip + limit]
+
+    def mutual(self, aid, bid, skip, limit):
+        if aid == bid:
+            return []
+        return self._ordered(self._following_ids(aid) & self._following_ids(bid))[skip:skip + limit]
+
+    def recommendations(self, uid, limit, exclude=None):
+        mine = self._following_ids(uid)
+        skip = mine if exclude is None else exclude
+        cap = fanout(self.supernode_threshold)
+        counts = Counter()
+        for shard, friends in self._group(mine).items():
+            for recs in shard.following(friends, cap).values():
+                counts.update(r for r in recs if r != uid and r not in skip)
+        if not counts:
+            return []
+        # Usernames only break ties, so only candidates that can still
+        # make the top `limit` are looked up.
+        cutoff = sorted(counts.values(), reverse=True)[min(limit, len(counts)) - 1]
+        rows = self._rows([r for r, c in counts.items() if c >= cutoff])
+        best = heapq.nsmallest(limit, rows, key=lambda r: (-counts[r], rows[r]["username"]))
+        return [dict(rows[r], mutualCount=counts[r]) for r in best]
+
+    def degrees(self, ids):
+        ids = [uid for uid in ids if uid in self._home]
+        followers = self._follower_counts(ids)
+        following = {}
+        for shard, group in self._group(ids).items():
+            following.update((uid, len(t)) for uid, t in shard.following(group).items())
+        return {uid: {"followers": followers.get(uid, 0), "following": following.get(uid, 0)} for uid in ids}
+
+    def is_supernode(self, uid):
+        if self.supernode_threshold <= 0:
+            return False
+        degree = self.degrees([uid]).get(uid, {"followers": 0, "following": 0})
+        return max(degree.values()) >= self.supernode_threshold
+
+    def top_followers(self, uid, limit=TOP_FOLLOWERS):
+        followers = list(self._follower_ids(uid))
+        counts = self._follower_counts(followers)
+        rows = self._rows(followers)
+        top = heapq.nsmallest(limit, rows, key=lambda f: (-counts.get(f, 0), rows[f]["username"]))
+        return [dict(rows[f], followerCount=counts.get(f, 0)) for f in top]
+
+    def neighbours(self, ids, direction):
+        ids = [uid for uid in ids if uid in self._home]
+        if direction == "out":
+            found = {}
+            for shard, group in self._group(ids).items():
+                found.update(shard.following(group))
+        else:
+            found = defaultdict(list)
+            for shard in self.shards:
+                for uid, followers in shard.followers(ids).items():
+                    found[uid].extend(followers)
+        return [{"id": uid, "neighbours": list(found.get(uid, ()))} for uid in ids]
+
+    # ---------------------------------------------------------
+    # Search & explore (UC-10, UC-11)
+    # ---------------------------------------------------------
+    def search(self, q, skip, limit, exclude=()):
+        q = q.lower()
+        exclude = exclude if isinstance(exclude, AbstractSet) else set(exclude)
+        pages = [shard.search(q, skip + limit, exclude) for shard in self.shards]
+        return list(islice(heapq.merge(*pages, key=lambda r: r["username"]), skip, skip + limit))
+
+    def popular(self, limit):
+        counts = self._follower_counts()
+        # Every user is ranked, followed or not, in directory order like MemoryGraphStore.
+        top = heapq.nlargest(limit, self._home, key=lambda uid: counts.get(uid, 0))
+        rows = self._rows(top)
+        return [
+            {"id": uid, "username": rows[uid]["username"], "name": rows[uid]["name"], "followerCount": counts.get(uid, 0)}
+            for uid in top
+        ]
+
+    # ---------------------------------------------------------
+    # Analytics
+    # ---------------------------------------------------------
+    def adjacency_page(self, after, limit):
+        pages = [shard.adjacency_page(after, limit) for shard in self.shards]
+        return list(islice(heapq.merge(*pages, key=lambda r: r["id"]), limit))
+
+    def set_communities(self, rows):
+        updated = 0
+        by_shard = defaultdict(list)
+        for r in rows:
+            if r["id"] in self._home:
+                by_shard[self._home[r["id"]]].append(r)
+        for index, group in by_shard.items():
+            updated += self.shards[index].set_communities(group)
+        return updated
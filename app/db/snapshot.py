@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import time
+import numpy as np
+
+# ============================================================
+# Binary graph snapshots
+# ============================================================
+# A snapshot is a directory of NumPy arrays that can be memory-mapped
+# (np.load(mmap_mode="r")) plus a manifest:
+#
+#   strings.npy         uint8    every text value, UTF-8, back to back
+#   string_offsets.npy  int64    [n_strings + 1] start of each string
+#   users.npy           int32    [n_users, len(USER_COLUMNS)] string index
+#                                per user column
+#   communities.npy     int32    [n_users] community, -1 when unset
+#   follow_offsets.npy  int64    [n_users + 1] CSR row starts
+#   follow_targets.npy  int32    [n_edges] followed user (row index), each
+#                                follower's targets in one run
+#   manifest.json       format version, counts and the sha256, dtype and
+#                       shape of every array file
+#
+# Users are rows in a fixed order (users.csv order for snapshots taken
+# from the CSVs), and edges refer to rows, so a restore needs no id
+# lookups. db_setup/graph_snapshot.py writes and restores snapshots;
+# GRAPH_SNAPSHOT points the memory / sharded backends at one.
+
+SNAPSHOT_FORMAT = "social-graph-snapshot"
+SNAPSHOT_VERSION = 1
+USER_COLUMNS = ("id", "username", "email", "name", "bio", "passwordHash")
+MANIFEST = "manifest.json"
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _string_table(values):
+    """(uint8 buffer, int64 offsets) for a list of str."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+# ---------------------------------------------------------
+# Write
+# ---------------------------------------------------------
+def write_snapshot(path, users, followers, targets):
+    """
+    Write users (dicts with USER_COLUMNS, optional community) and edges
+    given as parallel arrays of user row indices. Returns the manifest.
+    """
+    started = time.monotonic()
+    os.makedirs(path, exist_ok=True)
+    n = len(users)
+    followers = np.asarray(followers, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    if len(followers) and (min(followers.min(), targets.min()) < 0 or max(followers.max(), targets.max()) >= n):
+        raise SnapshotError("edge refers to a user row outside the snapshot")
+
+    # Duplicate strings (e.g. the same bio) share one table entry.
+    index = {}
+    cells = np.empty((n, len(USER_COLUMNS)), dtype=np.int32)
+    for row, user in enumerate(users):
+        for col, key in enumerate(USER_COLUMNS):
+            cells[row, col] = index.setdefault(str(user[key]), len(index))
+    buffer, offsets = _string_table(list(index))
+    communities = np.array(
+        [-1 if u.get("community") is None else int(u["community"]) for u in users], dtype=np.int32,
+    )
+
+    order = np.argsort(followers, kind="stable")
+    follow_offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(followers, minlength=n), out=follow_offsets[1:])
+
+    arrays = {
+        "strings": buffer,
+        "string_offsets": offsets,
+        "users": cells,
+        "communities": communities,
+        "follow_offsets": follow_offsets,
+        "follow_targets": targets[order].astype(np.int32),
+    }
+    files = {}
+    for name, array in arrays.items():
+        file_path = os.path.join(path, name + ".npy")
+        np.save(file_path, array)
+        files[name] = {
+            "file": name + ".npy",
+            "dtype": str(array.dtype),
+            "shape": list(array.shape),
+            "bytes": os.path.getsize(file_path),
+            "sha256": _sha256(file_path),
+        }
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "users": n,
+        "edges": int(len(targets)),
+        "strings": len(index),
+        "user_columns": list(USER_COLUMNS),
+        "files": files,
+    }
+    with open(os.path.join(path, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"[INFO] Snapshot of {n} users / {len(targets)} edges written to {path} "
+          f"in {time.monotonic() - started:.2f}s")
+    return manifest
+
+
+# ---------------------------------------------------------
+# Read
+# ---------------------------------------------------------
+def read_manifest(path):
+    try:
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"no readable {MANIFEST} in {path}: {e}")
+    if manifest.get("format") != SNAPSHOT_FORMAT or manifest.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"{path} is not a version {SNAPSHOT_VERSION} graph snapshot")
+    return manifest
+
+
+def verify_snapshot(path):
+    """Check every file against the manifest checksums; returns the manifest."""
+    manifest = read_manifest(path)
+    for name, meta in manifest["files"].items():
+        file_path = os.path.join(path, meta["file"])
+        if not os.path.exists(file_path):
+            raise SnapshotError(f"{meta['file']} is missing")
+        if _sha256(file_path) != meta["sha256"]:
+            raise SnapshotError(f"{meta['file']} does not match its checksum")
+    return manifest
+
+
+class Snapshot:
+    """A snapshot directory with its arrays memory-mapped."""
+
+    def __init__(self, path, verify=True):
+        self.path = path
+        self.manifest = verify_snapshot(path) if verify else read_manifest(path)
+        self.arrays = {}
+        for name, meta in self.manifest["files"].items():
+            array = np.load(os.path.join(path, meta["file"]), mmap_mode="r")
+            if str(array.dtype) != meta["dtype"] or list(array.shape) != meta["shape"]:
+                raise SnapshotError(f"{meta['file']} has dtype/shape {array.dtype}{array.shape}, "
+                                    f"manifest says {meta['dtype']}{tuple(meta['shape'])}")
+            self.arrays[name] = array
+
+    def __len__(self):
+        return self.manifest["users"]
+
+    def strings(self):
+        """The whole string table as a list, decoded once."""
+        buffer = self.arrays["strings"].tobytes()
+        offsets = self.arrays["string_offsets"].tolist()
+        return [buffer[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+
+    def users(self):
+        """User dicts in row order; community only when set."""
+        strings = self.strings()
+        rows = []
+        for cells, community in zip(self.arrays["users"].tolist(), self.arrays["communities"].tolist()):
+            user = {key: strings[i] for key, i in zip(USER_COLUMNS, cells)}
+            if community >= 0:
+                user["community"] = community
+            rows.append(user)
+        return rows
+
+    def edges(self):
+        """(follower rows, target rows) as int arrays, grouped by follower."""
+        offsets = self.arrays["follow_offsets"]
+        followers = np.repeat(np.arange(len(offsets) - 1, dtype=np.int32), np.diff(offsets))
+        return followers, np.asarray(self.arrays["follow_targets"])
+
+    def following(self):
+        """Per user row, the list of followed rows."""
+        offsets = self.arrays["follow_offsets"].tolist()
+        targets = self.arrays["follow_targets"].tolist()
+        return [targets[a:b] for a, b in zip(offsets, offsets[1:])]
+
+    def followers(self):
+        """Per user row, the list of follower rows."""
+        followers, targets = self.edges()
+        order = np.argsort(targets, kind="stable")
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(targets, minlength=len(self)), out=offsets[1:])
+        offsets, rows = offsets.tolist(), followers[order].tolist()
+        return [rows[a:b] for a, b in zip(offsets, offsets[1:])]
@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+
+# ============================================================
+# Supernodes (influencer accounts)
+# ============================================================
+# A user with SUPERNODE_THRESHOLD or more followers (or followees) is a
+# supernode: walking all of its FOLLOWS costs thousands of rows. The
+# repositories treat them differently:
+#
+# - profile (UC-3, UC-7): the follower preview is an unsorted sample
+#   instead of the first page by username; the UI adds the cached
+#   top-follower slice (top_followers). PROFILE_QUERY counts the degree
+#   itself, so the profile stays one round trip
+# - mutual (UC-8): intersects the two following lists, never the mutual
+#   user's followers (MUTUAL_QUERY, for every user)
+# - recommendations (UC-9): a friend contributes at most
+#   SUPERNODE_THRESHOLD candidates, so a supernode as the middle hop is
+#   capped
+# - degrees of separation (UC-12): graph/paths.py expands the smaller
+#   frontier, which already keeps supernodes on the cheap side
+#
+# Degrees and top-follower slices change slowly and are read on every
+# influencer page view, so both are cached per process for
+# SUPERNODE_CACHE_TTL seconds. Counts shown to users still come from
+# the profile bundle and are exact.
+#
+# SUPERNODE_THRESHOLD=0 turns all of it off (loadtest/supernode_bench.py
+# compares both).
+
+SUPERNODE_THRESHOLD = int(os.environ.get("SUPERNODE_THRESHOLD", "1000"))
+SUPERNODE_CACHE_TTL = int(os.environ.get("SUPERNODE_CACHE_TTL", "300"))   # seconds
+TOP_FOLLOWERS = 20
+UNCAPPED_FANOUT = 2 ** 31 - 1   # RECOMMENDATIONS_QUERY $fanout when the threshold is off
+
+
+def fanout(threshold):
+    """Per-friend candidate cap for RECOMMENDATIONS_QUERY."""
+    return threshold if threshold > 0 else UNCAPPED_FANOUT
+
+
+class TTLCache:
+    """Small thread-safe key -> value cache with one TTL for all entries."""
+
+    def __init__(self, ttl=SUPERNODE_CACHE_TTL):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}   # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys, load):
+        """{key: value} for keys; missing or expired ones come from load(missing) -> dict."""
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry and entry[0] > now:
+                    found[key] = entry[1]
+                else:
+                    missing.append(key)
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            loaded = load(missing)
+            expires_at = time.monotonic() + self._ttl
+            with self._lock:
+                for key in missing:
+                    if key in loaded:
+                        found[key] = loaded[key]
+                        self._entries[key] = (expires_at, loaded[key])
+                # Expired entries are dropped whenever something new is loaded.
+                for key in [k for k, (exp, _) in self._entries.items() if exp <= now]:
+                    del self._entries[key]
+        return found
+
+    def get(self, key, load):
+        return self.get_many([key], lambda keys: {key: load()}).get(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,44 @@
+from db.repository import get_repository, DuplicateKeyError
+from db.queries import invalidate_users
+
+# ============================================================
+# User writes (UC-1 registration, UC-4 profile edits)
+# ============================================================
+# Each write is a single statement in a single transaction. Username
+# and email uniqueness is enforced by schema constraints (see
+# db_setup/ingest_graph.py) or the in-memory indexes, so there is no
+# lookup before the write; a violation comes back as DuplicateKeyError
+# and is mapped to a message the UI can show directly.
+
+
+class DuplicateUserError(Exception):
+    """Username or email already in use; str(e) is user-facing."""
+
+
+def register_user(username, email, name, bio, password_hash):
+    """
+    Create a user and return its row as a dict.
+    Raises DuplicateUserError if the username or email is taken.
+    """
+    try:
+        user = get_repository().create_user(username, email, name, bio, password_hash)
+    except DuplicateKeyError as e:
+        if e.prop == "username":
+            raise DuplicateUserError(f"Username '{username}' is already taken!")
+        raise DuplicateUserError(f"Email '{email}' is already registered!")
+    invalidate_users()
+    return user
+
+
+def update_profile(uid, name, email, bio):
+    """
+    Update a profile and return the new row as a dict (None if the
+    user does not exist). Raises DuplicateUserError if the email is
+    used by another account.
+    """
+    try:
+        user = get_repository().update_profile(uid, name, email, bio)
+    except DuplicateKeyError:
+        raise DuplicateUserError(f"Email '{email}' is already in use by another user!")
+    invalidate_users()
+    return user
@@ -0,0 +1,205 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from db.causal import CausalContext, causal_context, current_causal_context
+
+# ============================================================
+# Write-behind queue for follow / unfollow events
+# ============================================================
+# Optional (FOLLOW_WRITE_BEHIND=1). Instead of one session and one
+# transaction per click, events go into a bounded in-process queue and
+# a background thread flushes them in batches:
+#
+# - coalescing: events for the same (follower, target) pair collapse to
+#   the last one, which is always written. follow (MERGE) and unfollow
+#   (DELETE) are idempotent, so the last event alone decides the edge,
+#   whatever state it was in before
+# - batches are sorted by target so edges into a popular account are
+#   written together, in a consistent lock order
+# - backpressure: submit() blocks up to ENQUEUE_TIMEOUT when the queue
+#   is full, then raises WriteBehindFull (callers fall back to a
+#   synchronous write)
+# - a failed flush is retried with backoff (FLUSH_RETRY_DELAYS), then
+#   kept (coalesced) and retried with the next batch; its events stay
+#   pending (and visible to their user) until a write succeeds. Kept
+#   pairs count against the queue size: once maxsize of them are
+#   waiting, submit() applies the same backpressure as a full queue
+# - flush on shutdown via atexit
+# - read-your-writes: pending_for() exposes events that are not yet
+#   flushed so the originating user's pages can overlay them. Each
+#   event carries its session's CausalContext (db/causal.py); a flush
+#   merges its bookmarks into those contexts before the events stop
+#   being pending, so the session's next read waits for the flush
+#
+# The process-wide instance lives in db/follows.py (get_write_behind).
+
+FOLLOW_WRITE_BEHIND = os.environ.get("FOLLOW_WRITE_BEHIND", "0") == "1"
+QUEUE_SIZE = int(os.environ.get("FOLLOW_QUEUE_SIZE", "10000"))
+FLUSH_INTERVAL = 0.25    # seconds to wait for more events before flushing
+FLUSH_BATCH = 1000       # max events per flush
+ENQUEUE_TIMEOUT = 1.0    # seconds submit() may block when the queue is full
+FLUSH_RETRY_DELAYS = (0.5, 1.0, 2.0)   # backoff between attempts of one flush
+
+
+class WriteBehindFull(Exception):
+    pass
+
+
+class FollowWriteBehind:
+
+    def __init__(self, apply_follows, apply_unfollows, maxsize=QUEUE_SIZE):
+        self._apply_follows = apply_follows       # e.g. follows.bulk_follow
+        self._apply_unfollows = apply_unfollows   # e.g. follows.bulk_unfollow
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+        self._retry_room = threading.Condition(self._lock)   # signalled when _retry empties
+        self._submit_lock = threading.Lock()   # submit() vs shutdown()
+        self._pending = {}   # (followerId, targetId) -> (op, seq)
+        self._retry = {}     # (followerId, targetId) -> (op, seq) of failed flushes
+        self._retry_events = 0   # queue items behind _retry, not yet task_done()
+        self._retry_contexts = set()   # CausalContexts of the events behind _retry
+        self._seq = 0
+        self._stopped = threading.Event()
+        self.flushed = 0
+        self.coalesced = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name="follow-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    # ---------------------------------------------------------
+    # Producer side
+    # ---------------------------------------------------------
+    def submit(self, op, follower_id, target_id):
+        """Queue a 'follow' or 'unfollow' event for the calling session."""
+        ctx = current_causal_context()
+        # Under _submit_lock, so shutdown() cannot drain the queue between
+        # the check and the put.
+        with self._submit_lock:
+            if self._stopped.is_set():
+                raise WriteBehindFull("write-behind queue is shut down")
+
+            with self._lock:
+                if not self._retry_room.wait_for(lambda: len(self._retry) < self._maxsize,
+                                                 timeout=ENQUEUE_TIMEOUT):
+                    raise WriteBehindFull("follow writes are failing; retry backlog is full")
+                self._seq += 1
+                seq = self._seq
+                self._pending[(follower_id, target_id)] = (op, seq)
+
+            try:
+                self._queue.put((op, follower_id, target_id, seq, ctx), timeout=ENQUEUE_TIMEOUT)
+            except queue.Full:
+                with self._lock:
+                    if self._pending.get((follower_id, target_id), (None, None))[1] == seq:
+                        del self._pending[(follower_id, target_id)]
+                raise WriteBehindFull("follow queue is full")
+
+    def pending_for(self, follower_id):
+        """{targetId: 'follow' | 'unfollow'} not yet written for this follower."""
+        with self._lock:
+            return {t: op for (f, t), (op, _) in self._pending.items() if f == follower_id}
+
+    def depth(self):
+        return self._queue.qsize()
+
+    # ---------------------------------------------------------
+    # Consumer side
+    # ---------------------------------------------------------
+    def _drain(self):
+        events = []
+        try:
+            events.append(self._queue.get(timeout=FLUSH_INTERVAL))
+        except queue.Empty:
+            return events
+
+        deadline = time.monotonic() + FLUSH_INTERVAL
+        while len(events) < FLUSH_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                events.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return events
+
+    def _run(self):
+        while not self._stopped.is_set():
+            events = self._drain()
+            if events or self._retry:
+                self._flush(events)
+
+    def _flush(self, events, attempts=None):
+        attempts = attempts or len(FLUSH_RETRY_DELAYS) + 1
+        # Last event per pair, on top of what earlier failed flushes kept
+        with self._lock:
+            latest = dict(self._retry)
+            undone = self._retry_events + len(events)
+            contexts = set(self._retry_contexts)
+        for op, follower_id, target_id, seq, ctx in events:
+            latest[(follower_id, target_id)] = (op, seq)
+            if ctx is not None:
+                contexts.add(ctx)
+
+        by_target = sorted(latest.items(), key=lambda item: (item[0][1], item[0][0]))
+        follows = [pair for pair, (op, _) in by_target if op == "follow"]
+        unfollows = [pair for pair, (op, _) in by_target if op == "unfollow"]
+
+        flush_ctx = CausalContext()
+        for attempt in range(attempts):
+            try:
+                # Both writes are idempotent, so a retry may repeat the follows.
+                with causal_context(flush_ctx):
+                    if follows:
+                        self._apply_follows(follows)
+                    if unfollows:
+                        self._apply_unfollows(unfollows)
+                break
+            except Exception as e:
+                self.errors += 1
+                print(f"[ERROR] follow write-behind flush failed (attempt {attempt + 1}/{attempts}): {e}")
+                if attempt + 1 == attempts or self._stopped.wait(FLUSH_RETRY_DELAYS[attempt]):
+                    with self._lock:
+                        self._retry, self._retry_events, self._retry_contexts = latest, undone, contexts
+                    print(f"[WARN] {len(latest)} follow event(s) kept for the next flush")
+                    return
+
+        self.flushed += len(latest)
+        self.coalesced += undone - len(latest)
+        # Bookmarks first: once an event stops being pending, its session
+        # must already wait for the flush on its next read.
+        for ctx in contexts:
+            ctx.merge(flush_ctx.bookmarks)
+        with self._lock:
+            self._retry, self._retry_events, self._retry_contexts = {}, 0, set()
+            self._retry_room.notify_all()
+            for pair, (_, seq) in latest.items():
+                if self._pending.get(pair, (None, None))[1] == seq:
+                    del self._pending[pair]
+        for _ in range(undone):
+            self._queue.task_done()
+
+    def flush(self):
+        """Block until everything queued so far has been written."""
+        self._queue.join()
+
+    def shutdown(self):
+        with self._submit_lock:
+            if self._stopped.is_set():
+                return
+            self._stopped.set()
+        self._thread.join()
+        remaining = []
+        while True:
+            try:
+                remaining.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if remaining or self._retry:
+            self._flush(remaining, attempts=1)
+        if self._retry:
+            print(f"[ERROR] {len(self._retry)} follow event(s) could not be written before shutdown")
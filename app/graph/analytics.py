@@ -0,0 +1,230 @@
+import os
+import threading
+import time
+import numpy as np
+from db.repository import get_repository
+
+# ============================================================
+# Graph statistics
+# ============================================================
+# Shape of the FOLLOWS graph for operators: degree distributions,
+# reciprocity, clustering, weakly connected components and the
+# ghost / influencer populations generate_graph.py plants.
+#
+# The adjacency is pulled in keyset pages (repository.adjacency_page),
+# turned into two int32 arrays src -> dst once, and everything else is
+# vectorized NumPy over those arrays. Clustering is estimated from
+# CLUSTERING_SAMPLES random wedges instead of counting every triangle.
+#
+# Results are cached process-wide with the time they were computed;
+# graph_stats() recomputes when asked to or when they are older than
+# GRAPH_STATS_TTL seconds. The admin panel shows the timestamp so a
+# drifted graph is visible as such.
+
+STATS_BATCH = int(os.environ.get("GRAPH_STATS_BATCH", "2000"))    # users per adjacency page
+STATS_TTL = int(os.environ.get("GRAPH_STATS_TTL", "3600"))         # seconds
+CLUSTERING_SAMPLES = 20000
+INFLUENCER_MIN_FOLLOWERS = 1000   # generate_graph.py INFLUENCER_MIN
+SEED = 42
+
+
+# ---------------------------------------------------------
+# Edge list
+# ---------------------------------------------------------
+def load_adjacency(repository=None, batch=STATS_BATCH):
+    """
+    {"ids", "src", "dst", "community"}: ids is the sorted array of
+    userIds, src/dst are int32 indexes into it (one pair per FOLLOWS
+    edge) and community holds each user's stored community, -1 if none.
+    """
+    repository = repository or get_repository()
+    ids, counts, targets, communities = [], [], [], []
+    after = None
+    while True:
+        page = repository.adjacency_page(after, batch)
+        if not page:
+            break
+        for row in page:
+            ids.append(row["id"])
+            counts.append(len(row["following"]))
+            targets.extend(row["following"])
+            community = row.get("community")
+            communities.append(-1 if community is None else community)
+        after = page[-1]["id"]
+        if len(page) < batch:
+            break
+
+    ids = np.array(ids)
+    src = np.repeat(np.arange(len(ids), dtype=np.int32), counts)
+    dst = np.zeros(0, dtype=np.int32)
+    if len(ids):
+        # Pages come in userId order, so ids is sorted and targets map by binary search.
+        targets = np.array(targets, dtype=ids.dtype)
+        dst = np.searchsorted(ids, targets).astype(np.int32)
+        known = ids[np.minimum(dst, len(ids) - 1)] == targets
+        src, dst = src[known], dst[known]
+    return {"ids": ids, "src": src, "dst": dst, "community": np.array(communities, dtype=np.int64)}
+
+
+def load_edges(repository=None, batch=STATS_BATCH):
+    """(ids, src, dst) from load_adjacency."""
+    graph = load_adjacency(repository, batch)
+    return graph["ids"], graph["src"], graph["dst"]
+
+
+# ---------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------
+def degree_histogram(degrees):
+    """Users per degree bucket: 0, 1, 2-3, 4-7, ... (powers of two)."""
+    top = int(degrees.max()) if len(degrees) else 0
+    edges = [0, 1] + [2 ** k for k in range(1, max(top, 1).bit_length() + 1)]
+    counts, _ = np.histogram(degrees, bins=edges + [edges[-1] * 2])
+    rows = []
+    for lo, hi, count in zip(edges, edges[1:] + [edges[-1] * 2], counts):
+        label = str(lo) if hi - lo == 1 else f"{lo}-{hi - 1}"
+        rows.append({"degree": label, "users": int(count)})
+    while rows and rows[-1]["users"] == 0:
+        rows.pop()
+    return rows
+
+
+def reciprocity(src, dst, n):
+    """Share of edges a -> b for which b -> a exists too."""
+    if not len(src):
+        return 0.0
+    keys = np.sort(src.astype(np.int64) * n + dst)
+    reverse = dst.astype(np.int64) * n + src
+    pos = np.minimum(np.searchsorted(keys, reverse), len(keys) - 1)
+    return float(np.mean(keys[pos] == reverse))
+
+
+def _undirected(src, dst, n):
+    """Sorted unique neighbour keys u * n + v, neighbours v and CSR offsets."""
+    keys = np.unique(np.concatenate([
+        src.astype(np.int64) * n + dst,
+        dst.astype(np.int64) * n + src,
+    ]))
+    degree = np.bincount(keys // n, minlength=n)
+    offsets = np.concatenate([[0], np.cumsum(degree)])
+    return keys, keys % n, degree, offsets
+
+
+def clustering(src, dst, n, samples=CLUSTERING_SAMPLES, seed=SEED):
+    """
+    (average local clustering, transitivity) on the undirected graph,
+    estimated from random wedges. The average is over users with at
+    least two neighbours.
+    """
+    keys, neighbours, degree, offsets = _undirected(src, dst, n)
+    centers = np.flatnonzero(degree >= 2)
+    if not len(centers):
+        return 0.0, 0.0
+    rng = np.random.default_rng(seed)
+    wedges = degree[centers].astype(np.float64) * (degree[centers] - 1)
+
+    def closed_share(nodes):
+        d = degree[nodes]
+        i = rng.integers(0, d)
+        j = rng.integers(0, d - 1)
+        j += j >= i
+        a = neighbours[offsets[nodes] + i]
+        b = neighbours[offsets[nodes] + j]
+        q = a * n + b
+        pos = np.minimum(np.searchsorted(keys, q), len(keys) - 1)
+        return float(np.mean(keys[pos] == q))
+
+    local = closed_share(rng.choice(centers, samples))
+    transitivity = closed_share(rng.choice(centers, samples, p=wedges / wedges.sum()))
+    return local, transitivity
+
+
+def weak_components(src, dst, n):
+    """Component sizes, largest first (min-label propagation with pointer jumping)."""
+    labels = np.arange(n)
+    while True:
+        before = labels.copy()
+        np.minimum.at(labels, src, labels[dst])
+        np.minimum.at(labels, dst, labels[src])
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, before):
+            break
+    sizes = np.bincount(labels, minlength=n)
+    return np.sort(sizes[sizes > 0])[::-1]
+
+
+# ---------------------------------------------------------
+# Job
+# ---------------------------------------------------------
+def compute_graph_stats(repository=None):
+    started = time.monotonic()
+    ids, src, dst = load_edges(repository)
+    n = len(ids)
+    in_deg = np.bincount(dst, minlength=n)
+    out_deg = np.bincount(src, minlength=n)
+    local, transitivity = clustering(src, dst, n) if n else (0.0, 0.0)
+    sizes = weak_components(src, dst, n) if n else np.zeros(0, dtype=np.int64)
+
+    return {
+        "computed_at": time.time(),
+        "duration": time.monotonic() - started,
+        "users": n,
+        "edges": int(len(src)),
+        "in_degree": {
+            "mean": float(in_deg.mean()) if n else 0.0,
+            "median": float(np.median(in_deg)) if n else 0.0,
+            "max": int(in_deg.max()) if n else 0,
+            "histogram": degree_histogram(in_deg),
+        },
+        "out_degree": {
+            "mean": float(out_deg.mean()) if n else 0.0,
+            "median": float(np.median(out_deg)) if n else 0.0,
+            "max": int(out_deg.max()) if n else 0,
+            "histogram": degree_histogram(out_deg),
+        },
+        "reciprocity": reciprocity(src, dst, n),
+        "avg_clustering": local,
+        "transitivity": transitivity,
+        "components": {
+            "count": int(len(sizes)),
+            "largest": int(sizes[0]) if len(sizes) else 0,
+            "isolated": int(np.sum((in_deg + out_deg) == 0)),
+            "sizes": [int(s) for s in sizes[:10]],
+        },
+        "ghosts": int(np.sum(out_deg == 0)),
+        "influencers": int(np.sum(in_deg >= INFLUENCER_MIN_FOLLOWERS)),
+    }
+
+
+_cached = None
+_cache_lock = threading.Lock()
+
+
+def cached_graph_stats():
+    """Last computed statistics, or None; never queries."""
+    return _cached
+
+
+def graph_stats(refresh=False, max_age=STATS_TTL):
+    """
+    Cached statistics, recomputed when refresh is set or they are older
+    than max_age. Concurrent callers wait for one computation.
+    """
+    global _cached
+    with _cache_lock:
+        if refresh or _cached is None or time.time() - _cached["computed_at"] > max_age:
+            _cached = compute_graph_stats()
+            print(f"[INFO] Graph statistics computed in {_cached['duration']:.2f}s "
+                  f"({_cached['users']} users, {_cached['edges']} edges)")
+        return _cached
+
+
+if __name__ == "__main__":
+    import json
+
+    # cd app && python -m graph.analytics
+    print(json.dumps(graph_stats(), indent=2))
@@ -0,0 +1,231 @@
+import csv
+import os
+import threading
+import time
+import numpy as np
+from db.repository import get_repository, DATA_DIR
+from graph.analytics import load_adjacency, STATS_BATCH
+
+# ============================================================
+# Community detection (label propagation)
+# ============================================================
+# Assigns every user an integer `community` from the FOLLOWS graph,
+# treated as undirected: each user repeatedly adopts the label with the
+# heaviest vote among its neighbours, a neighbour's vote weighing
+# 1 / its degree so influencers do not swallow every cluster. The
+# update is vectorized over all users at once; half of them (chosen at
+# random) move per round so synchronous updates do not oscillate
+# between two labelings.
+#
+# Incremental: stored communities seed the next run, users without one
+# start with a fresh label of their own, and only users whose label
+# changed are written back (SET u.community, COMMUNITY_BATCH rows per
+# statement). A warm run on a barely changed graph converges in a
+# couple of rounds and keeps the existing community ids.
+#
+# quality() scores a labeling against the clusters generate_graph.py
+# plants (consecutive slices of users.csv), so the job can be checked
+# on generated data.
+
+COMMUNITY_BATCH = 1000   # users per write statement
+MAX_ROUNDS = 30
+MIN_CHANGED = 0.001      # stop once fewer than this share of users change per round
+PLANTED_CLUSTERS = 20    # generate_graph.py NUM_CLUSTERS
+SEED = 42
+
+
+# ---------------------------------------------------------
+# Label propagation
+# ---------------------------------------------------------
+def label_propagation(src, dst, n, labels=None, max_rounds=MAX_ROUNDS, seed=SEED):
+    """(labels, rounds) for the undirected graph src <-> dst; labels seeds the run."""
+    labels = np.arange(n, dtype=np.int64) if labels is None else labels.astype(np.int64)
+    if not len(src):
+        return labels, 0
+    rng = np.random.default_rng(seed)
+    node = np.concatenate([src, dst]).astype(np.int64)
+    neighbour = np.concatenate([dst, src]).astype(np.int64)
+    # An influencer followed by a third of the graph would otherwise
+    # pull every cluster into its label: votes count 1 / voter degree.
+    vote = 1.0 / np.bincount(node, minlength=n)[neighbour]
+
+    for rounds in range(1, max_rounds + 1):
+        span = int(labels.max()) + 1
+        keys, inverse = np.unique(node * span + labels[neighbour], return_inverse=True)
+        weight = np.bincount(inverse, weights=vote)
+        owner, label = keys // span, keys % span
+
+        # Best label per node: heaviest vote first, random among ties.
+        order = np.lexsort((rng.random(len(keys)), -weight, owner))
+        first = order[np.r_[True, owner[order][1:] != owner[order][:-1]]]
+        best = labels.copy()
+        best_weight = np.zeros(n)
+        best[owner[first]] = label[first]
+        best_weight[owner[first]] = weight[first]
+
+        # Keep the current label when it is one of the best (less churn).
+        own = np.arange(n, dtype=np.int64) * span + labels
+        pos = np.minimum(np.searchsorted(keys, own), len(keys) - 1)
+        own_weight = np.where(keys[pos] == own, weight[pos], 0.0)
+        move = (best != labels) & (own_weight < best_weight - 1e-12) & (rng.random(n) < 0.5)
+
+        labels = np.where(move, best, labels)
+        if move.sum() < MIN_CHANGED * n:
+            return labels, rounds
+    return labels, max_rounds
+
+
+def seed_labels(stored):
+    """Stored communities as-is; users without one (-1) get fresh labels above them."""
+    labels = stored.astype(np.int64)
+    fresh = labels < 0
+    labels[fresh] = labels.max(initial=-1) + 1 + np.arange(fresh.sum())
+    return labels
+
+
+def renumber(labels, stored):
+    """
+    Keep stored community ids; number the rest after them, largest
+    community first.
+    """
+    known = set(stored[stored >= 0].tolist())
+    values, sizes = np.unique(labels, return_counts=True)
+    new = [(s, v) for v, s in zip(values.tolist(), sizes.tolist()) if v not in known]
+    mapping = {v: v for v in known}
+    next_id = max(known, default=-1) + 1
+    for _, v in sorted(new, key=lambda sv: (-sv[0], sv[1])):
+        mapping[v] = next_id
+        next_id += 1
+    return np.array([mapping[v] for v in labels.tolist()], dtype=np.int64)
+
+
+# ---------------------------------------------------------
+# Quality check against the generator
+# ---------------------------------------------------------
+def planted_clusters(ids, data_dir=DATA_DIR, clusters=PLANTED_CLUSTERS):
+    """Planted cluster per user (generate_graph.py slices users.csv in order); -1 if unknown."""
+    users_csv = os.path.join(data_dir, "users.csv")
+    planted = np.full(len(ids), -1, dtype=np.int64)
+    if not os.path.exists(users_csv):
+        return planted
+    with open(users_csv, newline="") as f:
+        order = [r["userId"].zfill(4) for r in csv.DictReader(f)]
+    size = max(len(order) // clusters, 1)
+    cluster = {uid: min(i // size, clusters - 1) for i, uid in enumerate(order)}
+    for i, uid in enumerate(ids.tolist()):
+        planted[i] = cluster.get(uid, -1)
+    return planted
+
+
+def quality(labels, truth):
+    """
+    NMI (arithmetic mean normalization), adjusted Rand index and purity
+    of labels against truth; users with truth -1 are left out.
+    """
+    keep = truth >= 0
+    labels, truth = labels[keep], truth[keep]
+    n = len(labels)
+    if not n:
+        return None
+    _, a = np.unique(labels, return_inverse=True)
+    _, b = np.unique(truth, return_inverse=True)
+    table = np.zeros((a.max() + 1, b.max() + 1))
+    np.add.at(table, (a, b), 1)
+    rows, cols = table.sum(axis=1), table.sum(axis=0)
+
+    nz = table > 0
+    mi = np.sum(table[nz] / n * np.log(table[nz] * n / np.outer(rows, cols)[nz]))
+    h_a = -np.sum(rows / n * np.log(rows / n))
+    h_b = -np.sum(cols / n * np.log(cols / n))
+    nmi = 2 * mi / (h_a + h_b) if h_a + h_b > 0 else 1.0
+
+    pairs = lambda x: np.sum(x * (x - 1) / 2)
+    index, expected = pairs(table), pairs(rows) * pairs(cols) / (n * (n - 1) / 2)
+    maximum = (pairs(rows) + pairs(cols)) / 2
+    ari = (index - expected) / (maximum - expected) if maximum != expected else 1.0
+
+    return {
+        "users": n,
+        "nmi": float(nmi),
+        "ari": float(ari),
+        "purity": float(table.max(axis=1).sum() / n),
+    }
+
+
+# ---------------------------------------------------------
+# Job
+# ---------------------------------------------------------
+def write_communities(ids, labels, changed, repository=None, batch=COMMUNITY_BATCH):
+    """Write the changed users' communities in batches; returns users updated."""
+    repository = repository or get_repository()
+    rows = [{"id": uid, "community": int(c)} for uid, c in zip(ids[changed].tolist(), labels[changed].tolist())]
+    updated = 0
+    for i in range(0, len(rows), batch):
+        updated += repository.set_communities(rows[i:i + batch])
+    return updated
+
+
+def detect_communities(repository=None, cold=False, write=True, batch=STATS_BATCH):
+    """
+    Run label propagation, write changed communities (unless write is
+    False) and score the result against the planted clusters.
+    cold ignores stored communities and starts every user on its own.
+    """
+    repository = repository or get_repository()
+    started = time.monotonic()
+    graph = load_adjacency(repository, batch)
+    ids, stored = graph["ids"], graph["community"]
+    if cold:
+        stored = np.full(len(ids), -1, dtype=np.int64)
+
+    labels, rounds = label_propagation(graph["src"], graph["dst"], len(ids), seed_labels(stored))
+    labels = renumber(labels, stored)
+    changed = labels != graph["community"]
+    updated = write_communities(ids, labels, changed, repository) if write else 0
+
+    sizes = np.sort(np.bincount(labels))[::-1] if len(labels) else np.zeros(0, dtype=np.int64)
+    sizes = sizes[sizes > 0]
+    return {
+        "computed_at": time.time(),
+        "duration": time.monotonic() - started,
+        "users": int(len(ids)),
+        "rounds": rounds,
+        "cold": cold,
+        "communities": int(len(sizes)),
+        "sizes": [int(s) for s in sizes[:30]],
+        "singletons": int(np.sum(sizes == 1)),
+        "changed": int(changed.sum()),
+        "written": updated,
+        "quality": quality(labels, planted_clusters(ids)),
+    }
+
+
+_last_run = None
+_run_lock = threading.Lock()
+
+
+def last_community_run():
+    """Result of the last detect_communities() run in this process, or None."""
+    return _last_run
+
+
+def run_community_detection(cold=False):
+    """detect_communities() for the admin panel; one run at a time per process."""
+    global _last_run
+    with _run_lock:
+        _last_run = detect_communities(cold=cold)
+        print(f"[INFO] Communities: {_last_run['communities']} found in {_last_run['rounds']} round(s), "
+              f"{_last_run['written']} user(s) updated in {_last_run['duration']:.2f}s")
+        return _last_run
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    # cd app && python -m graph.communities [--cold] [--dry-run]
+    parser = argparse.ArgumentParser(description="Assign User.community by label propagation.")
+    parser.add_argument("--cold", action="store_true", help="ignore stored communities")
+    parser.add_argument("--dry-run", action="store_true", help="compute and score, write nothing")
+    args = parser.parse_args()
+    print(json.dumps(detect_communities(cold=args.cold, write=not args.dry_run), indent=2))
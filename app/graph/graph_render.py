@@ -9,6 +9,7 @@ def graph_from_rows(rows):
     Each row should have an 'id' or 'userId' field.
     """
     net = Network(
+        cdn_resources="remote",   # load vis.js from the CDN; "local" copies it into ./lib
         height="600px",
         width="100%",
         bgcolor="#222222",
@@ -54,6 +55,7 @@ def mutual_graph(rows, user_a=None, user_b=None):
     - Mutual connections: Blue (#4D96FF)
     """
     net = Network(
+        cdn_resources="remote",
         height="600px",
         width="100%",
         bgcolor="#222222",
@@ -128,6 +130,7 @@ def recommendation_graph(rows, center_user=None):
     - Recommended users: Yellow (#FFD93D), sized by mutual count
     """
     net = Network(
+        cdn_resources="remote",
         height="600px",
         width="100%",
         bgcolor="#222222",
@@ -183,4 +186,44 @@ def recommendation_graph(rows, center_user=None):
 
     tmp = os.path.join(tempfile.gettempdir(), "recommendation_graph.html")
     net.save_graph(tmp)
-    return tmp
\ No newline at end of file
+    return tmp
+
+def path_graph(users):
+    """
+    Render a follow path (degrees of separation, UC-12).
+    `users` are the user dicts along the path, in order.
+
+    Colors:
+    - Start: Red (#FF6B6B)
+    - End: Green (#6BCB77)
+    - In between: Blue (#4D96FF)
+    """
+    net = Network(
+        cdn_resources="remote",
+        height="400px",
+        width="100%",
+        bgcolor="#222222",
+        font_color="white",
+        directed=True,
+    )
+
+    net.barnes_hut(gravity=-2000, central_gravity=0.3, spring_length=150)
+
+    last = len(users) - 1
+    for i, user in enumerate(users):
+        color = "#FF6B6B" if i == 0 else "#6BCB77" if i == last else "#4D96FF"
+        net.add_node(
+            user["id"],
+            label=user.get("username", str(user["id"])),
+            title=f"<b>Hop {i}:</b> {user.get('username', '')}",
+            color=color,
+            size=35 if i in (0, last) else 25
+        )
+
+    # Draw the follow edges along the path
+    for a, b in zip(users, users[1:]):
+        net.add_edge(a["id"], b["id"], color="#FFFFFF", arrows="to")
+
+    tmp = os.path.join(tempfile.gettempdir(), "path_graph.html")
+    net.save_graph(tmp)
+    return tmp
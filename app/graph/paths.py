@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from db.repository import get_repository
+
+# ============================================================
+# Degrees of separation (UC-12)
+# ============================================================
+# Shortest FOLLOWS path a -> ... -> b by bidirectional BFS: a forward
+# search from a over followed ids and a backward search from b over
+# followers, one whole level at a time, always advancing the side with
+# the smaller frontier. An influencer with thousands of followers is
+# then reached from the cheap side instead of being fanned out.
+#
+# Neighbour lists are fetched one frontier per round trip
+# (repository.neighbours) and kept in a process-wide LRU cache with a
+# short TTL; invalidate_follows() clears it.
+#
+# The search gives up after max_depth hops or once max_expansions
+# users have had their neighbours expanded, and says which limit hit.
+
+PATH_MAX_DEPTH = 6
+PATH_MAX_EXPANSIONS = int(os.environ.get("PATH_MAX_EXPANSIONS", "20000"))
+ADJACENCY_CACHE_SIZE = 100000  # neighbour lists, both directions together
+ADJACENCY_TTL = 60             # seconds
+
+
+class AdjacencyCache:
+
+    def __init__(self, fetch, size=ADJACENCY_CACHE_SIZE, ttl=ADJACENCY_TTL):
+        self._fetch = fetch        # (ids, direction) -> [{id, neighbours}]
+        self._size = size
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # (direction, id) -> (expires_at, neighbours)
+        self.hits = 0
+        self.misses = 0
+
+    def neighbours(self, ids, direction):
+        """{id: [neighbour ids]} for every id; unknown ids map to []."""
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for uid in ids:
+                entry = self._entries.get((direction, uid))
+                if entry and entry[0] > now:
+                    self._entries.move_to_end((direction, uid))
+                    found[uid] = entry[1]
+                else:
+                    missing.append(uid)
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            fetched = {r["id"]: r["neighbours"] for r in self._fetch(missing, direction)}
+            expires_at = time.monotonic() + self._ttl
+            with self._lock:
+                for uid in missing:
+                    found[uid] = fetched.get(uid, [])
+                    self._entries[(direction, uid)] = (expires_at, found[uid])
+                    self._entries.move_to_end((direction, uid))
+                while len(self._entries) > self._size:
+                    self._entries.popitem(last=False)
+        return found
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = AdjacencyCache(lambda ids, direction: get_repository().neighbours(ids, direction))
+
+
+def adjacency_cache():
+    return _cache
+
+
+def clear_adjacency_cache():
+    _cache.clear()
+
+
+def _walk(parents, node):
+    """node, parents[node], ... up to the search root."""
+    chain = []
+    while node is not None:
+        chain.append(node)
+        node = parents[node]
+    return chain
+
+
+def shortest_path(source, target, max_depth=PATH_MAX_DEPTH, max_expansions=PATH_MAX_EXPANSIONS,
+                  cache=None):
+    """
+    Shortest follow path from source to target.
+
+    Returns {"path": [userIds] or None, "status", "expanded", "levels"}
+    with status "found", "no_path" (both searches ran dry), "depth_limit"
+    or "expansion_limit".
+    """
+    cache = cache or _cache
+    result = {"path": None, "status": "found", "expanded": 0, "levels": {"forward": 0, "backward": 0}}
+    if source == target:
+        result["path"] = [source]
+        return result
+
+    forward = {source: None}     # visited -> parent towards source
+    backward = {target: None}    # visited -> parent towards target
+    forward_frontier, backward_frontier = [source], [target]
+
+    while forward_frontier and backward_frontier:
+        if sum(result["levels"].values()) >= max_depth:
+            result["status"] = "depth_limit"
+            return result
+
+        expand_forward = len(forward_frontier) <= len(backward_frontier)
+        frontier = forward_frontier if expand_forward else backward_frontier
+        if result["expanded"] + len(frontier) > max_expansions:
+            result["status"] = "expansion_limit"
+            return result
+
+        if expand_forward:
+            visited, other, direction = forward, backward, "out"
+        else:
+            visited, other, direction = backward, forward, "in"
+
+        adjacency = cache.neighbours(frontier, direction)
+        result["expanded"] += len(frontier)
+        result["levels"]["forward" if expand_forward else "backward"] += 1
+
+        next_frontier, meeting = [], None
+        for node in frontier:
+            for neighbour in adjacency[node]:
+                if neighbour in visited:
+                    continue
+                visited[neighbour] = node
+                next_frontier.append(neighbour)
+                # Every meeting found on this level gives the same length.
+                if meeting is None and neighbour in other:
+                    meeting = neighbour
+
+        if meeting is not None:
+            result["path"] = _walk(forward, meeting)[::-1] + _walk(backward, meeting)[1:]
+            return result
+
+        if expand_forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    result["status"] = "no_path"
+    return result
@@ -0,0 +1,247 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import bcrypt
+from db.repository import get_repository
+
+# ============================================================
+# Auth Config
+# ============================================================
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+AUTH_WORKERS = int(os.environ.get("AUTH_WORKERS", "4"))
+AUTH_MAX_PENDING = int(os.environ.get("AUTH_MAX_PENDING", "32"))
+AUTH_TIMEOUT = 10.0           # seconds a caller waits for a hash result
+MAX_FAILED_ATTEMPTS = 5       # per username ...
+FAILED_ATTEMPT_WINDOW = 60    # ... within this many seconds
+MAX_TRACKED_USERNAMES = 10000 # usernames with recent failures kept; oldest dropped first
+
+
+class AuthError(Exception):
+    """Base class; str(e) is safe to show to the user."""
+
+
+class UserNotFound(AuthError):
+    pass
+
+
+class InvalidPassword(AuthError):
+    pass
+
+
+class RateLimited(AuthError):
+    pass
+
+
+class AuthBusy(AuthError):
+    pass
+
+
+# ============================================================
+# Auth Service
+# ============================================================
+class AuthService:
+    """
+    Password hashing and login checks off the Streamlit script thread.
+
+    bcrypt runs in a bounded worker pool (bcrypt releases the GIL), at
+    most `max_pending` jobs may be queued or running, and usernames with
+    too many recent failures are rejected before any hashing is done.
+    Failures are tracked for unknown usernames too (so the limit does not
+    reveal which accounts exist), in a map of at most
+    MAX_TRACKED_USERNAMES entries whose stale entries expire.
+    Hashes made with a different cost factor are upgraded on login.
+    """
+
+    def __init__(self, rounds=BCRYPT_ROUNDS, workers=AUTH_WORKERS, max_pending=AUTH_MAX_PENDING):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._failures = OrderedDict()   # username -> last failure timestamps, least recent first
+        self._latencies = deque(maxlen=500)   # seconds, most recent logins
+        self._rate_limited = 0
+        self._rehashed = 0
+
+    # ---------------------------------------------------------
+    # Worker pool
+    # ---------------------------------------------------------
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise AuthBusy("Authentication is busy, please try again in a moment.")
+
+        with self._lock:
+            self._pending += 1
+
+        def done(_):
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(done)
+        return future
+
+    def _run(self, fn, *args):
+        try:
+            return self._submit(fn, *args).result(timeout=AUTH_TIMEOUT)
+        except TimeoutError:
+            raise AuthBusy("Authentication timed out, please try again.")
+
+    async def _run_async(self, fn, *args):
+        # For the asyncio HTTP API: await the pool without blocking the loop
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(self._submit(fn, *args)), AUTH_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise AuthBusy("Authentication timed out, please try again.")
+
+    def hash_password(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run(bcrypt.hashpw, password.encode(), salt).decode()
+
+    def check_password(self, password, stored_hash):
+        return self._run(bcrypt.checkpw, password.encode(), stored_hash.encode())
+
+    async def hash_password_async(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return (await self._run_async(bcrypt.hashpw, password.encode(), salt)).decode()
+
+    async def check_password_async(self, password, stored_hash):
+        return await self._run_async(bcrypt.checkpw, password.encode(), stored_hash.encode())
+
+    def needs_rehash(self, stored_hash):
+        # bcrypt hashes look like $2b$12$<salt+hash>
+        try:
+            return int(stored_hash.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    # ---------------------------------------------------------
+    # Rate limiting
+    # ---------------------------------------------------------
+    def check_rate_limit(self, username):
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._failures.get(username)
+            if not attempts:
+                return
+            while attempts and now - attempts[0] > FAILED_ATTEMPT_WINDOW:
+                attempts.popleft()
+            if not attempts:
+                del self._failures[username]
+            elif len(attempts) >= MAX_FAILED_ATTEMPTS:
+                self._rate_limited += 1
+                retry = int(FAILED_ATTEMPT_WINDOW - (now - attempts[0])) + 1
+                raise RateLimited(f"Too many failed attempts. Try again in {retry}s.")
+
+    def record_failure(self, username):
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._failures.pop(username, None) or deque(maxlen=MAX_FAILED_ATTEMPTS)
+            attempts.append(now)
+            self._failures[username] = attempts
+            # Least recently failed first: drop entries outside the window, then any over the cap.
+            while self._failures:
+                oldest = next(iter(self._failures.values()))
+                if now - oldest[-1] <= FAILED_ATTEMPT_WINDOW and len(self._failures) <= MAX_TRACKED_USERNAMES:
+                    break
+                self._failures.popitem(last=False)
+
+    def clear_failures(self, username):
+        with self._lock:
+            self._failures.pop(username, None)
+
+    # ---------------------------------------------------------
+    # Login
+    # ---------------------------------------------------------
+    def authenticate(self, username, password):
+        """
+        Return the user's profile dict (without the password hash) or
+        raise an AuthError subclass.
+        """
+        self.check_rate_limit(username)
+        start = time.perf_counter()
+
+        try:
+            user = get_repository().get_credentials(username)
+
+            if user is None:
+                self.record_failure(username)
+                raise UserNotFound(f"User '{username}' not found!")
+
+            stored_hash = user.pop("passwordHash")
+
+            if not self.check_password(password, stored_hash):
+                self.record_failure(username)
+                raise InvalidPassword("Invalid password!")
+
+            self.clear_failures(username)
+
+            if self.needs_rehash(stored_hash):
+                try:
+                    self._rehash(user["id"], password)
+                except AuthBusy:
+                    pass  # login still succeeds; upgrade on a later login
+
+            return user
+        finally:
+            self.record_latency(time.perf_counter() - start)
+
+    def _rehash(self, user_id, password):
+        new_hash = self.hash_password(password)
+        get_repository().set_password_hash(user_id, new_hash)
+        self.record_rehash()
+
+    def record_latency(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def record_rehash(self):
+        with self._lock:
+            self._rehashed += 1
+
+    # ---------------------------------------------------------
+    # Metrics
+    # ---------------------------------------------------------
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            pending = self._pending
+            rate_limited = self._rate_limited
+            rehashed = self._rehashed
+
+        def pct(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+        return {
+            "logins": len(latencies),
+            "p50_ms": round(pct(0.50), 1),
+            "p95_ms": round(pct(0.95), 1),
+            "queue_depth": pending,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "cost_factor": self.rounds,
+            "rate_limited": rate_limited,
+            "rehashed": rehashed,
+        }
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_auth_service():
+    """Process-wide AuthService shared by every Streamlit session."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = AuthService()
+        return _service
@@ -0,0 +1,205 @@
+import heapq
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from db.repository import get_repository
+from db.supernodes import SUPERNODE_THRESHOLD
+
+# ============================================================
+# Feed Config
+# ============================================================
+INBOX_SIZE = int(os.environ.get("FEED_INBOX_SIZE", "200"))     # events kept per reader
+OUTBOX_SIZE = int(os.environ.get("FEED_OUTBOX_SIZE", "50"))    # own events kept per actor
+TRACKED_EDGES = int(os.environ.get("FEED_TRACKED_EDGES", "50000"))  # live events an unfollow can retract
+FEED_PAGE_SIZE = 20
+
+
+# ============================================================
+# Feed Service
+# ============================================================
+class FeedService:
+    """
+    "Recent activity" of the accounts a user follows: "A followed B".
+
+    Every follow the app writes (db/follows.py) is recorded once:
+
+    - in the actor's outbox, a ring buffer of their own last events
+    - fan-out on write: for an actor with fewer than `threshold`
+      followers, also in the inbox (ring buffer) of each follower
+    - fan-out on read: an actor with `threshold` or more followers is
+      only marked as pulled; readers merge its outbox at read time
+      instead of it being copied into thousands of inboxes
+
+    A page is the reader's inbox merged with the outboxes of the pulled
+    actors they follow (a handful), newest first, so a read touches
+    about `limit` events. An unfollow hides the actor's matching event
+    wherever it was copied; a new follow backfills the followee's
+    outbox into the follower's inbox.
+
+    record() only queues the outcome rows: one background thread looks
+    up degrees and followers and fans out, in write order, so follow
+    writes never wait for the feed. Events show up a moment later.
+
+    The live event of at most `tracked_edges` edges is kept for
+    unfollows to retract (least recently written first out); an event
+    that drops out is hidden, so the feed never shows a follow it could
+    no longer take back.
+
+    Buffers live in this process only and start empty on restart.
+    """
+
+    def __init__(self, threshold=SUPERNODE_THRESHOLD, inbox_size=INBOX_SIZE, outbox_size=OUTBOX_SIZE,
+                 tracked_edges=TRACKED_EDGES):
+        self.threshold = threshold
+        self.inbox_size = inbox_size
+        self.outbox_size = outbox_size
+        self.tracked_edges = tracked_edges
+        self._lock = threading.Lock()
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="feed")
+        self._inbox = {}     # readerId -> deque of events, oldest first
+        self._outbox = {}    # actorId -> deque of events, oldest first
+        self._latest = OrderedDict()   # (actorId, targetId) -> live event of that edge, LRU
+        self._pulled = set() # actors read by fan-out on read
+        self._seq = 0
+        self.fanned_out = 0  # inbox copies written
+        self.pulled_events = 0
+
+    # ---------------------------------------------------------
+    # Write side
+    # ---------------------------------------------------------
+    def record(self, results):
+        """Queue bulk_follow / bulk_unfollow outcome rows that changed an edge."""
+        follows = [(r["followerId"], r["targetId"]) for r in results if r["outcome"] == "created"]
+        unfollows = [(r["followerId"], r["targetId"]) for r in results if r["outcome"] == "deleted"]
+        if follows or unfollows:
+            self._worker.submit(self._apply, follows, unfollows, time.time())
+
+    def drain(self):
+        """Wait until everything recorded so far is in the buffers."""
+        self._worker.submit(lambda: None).result()
+
+    def _apply(self, follows, unfollows, now):
+        try:
+            if unfollows:
+                self._retract(unfollows)
+            if follows:
+                self._publish(follows, now)
+        except Exception as e:
+            print(f"[ERROR] activity feed update failed: {e}")
+
+    def _publish(self, pairs, now):
+        repository = get_repository()
+        actors = list(dict.fromkeys(f for f, _ in pairs))
+        pushed = actors
+        if self.threshold > 0:
+            degrees = repository.degrees(actors)
+            pushed = [a for a in actors if degrees.get(a, {}).get("followers", 0) < self.threshold]
+        followers = {r["id"]: r["neighbours"] for r in repository.neighbours(pushed, "in")} if pushed else {}
+
+        with self._lock:
+            for actor, target in pairs:
+                self._seq += 1
+                event = {"seq": self._seq, "actorId": actor, "targetId": target, "at": now, "live": True}
+                old = self._latest.pop((actor, target), None)
+                if old is not None:
+                    old["live"] = False
+                self._latest[(actor, target)] = event
+                if len(self._latest) > self.tracked_edges:
+                    _, evicted = self._latest.popitem(last=False)
+                    evicted["live"] = False
+                self._push(self._outbox, actor, event, self.outbox_size)
+
+                if actor in followers:
+                    for reader in followers[actor]:
+                        self._push(self._inbox, reader, event, self.inbox_size)
+                    self.fanned_out += len(followers[actor])
+                else:
+                    self._pulled.add(actor)
+
+                # The actor now follows target: show target's recent activity too.
+                self._backfill(actor, target)
+
+    def _push(self, buffers, key, event, size):
+        buffer = buffers.get(key)
+        if buffer is None:
+            buffer = buffers[key] = deque(maxlen=size)
+        buffer.append(event)
+
+    def _backfill(self, reader, actor):
+        if actor in self._pulled or actor not in self._outbox:
+            return
+        inbox = self._inbox.get(reader, ())
+        merged = heapq.merge(inbox, self._outbox[actor], key=lambda e: e["seq"])
+        seen = set()
+        events = deque(maxlen=self.inbox_size)
+        for e in merged:
+            if e["seq"] not in seen:
+                seen.add(e["seq"])
+                events.append(e)
+        self._inbox[reader] = events
+
+    def _retract(self, pairs):
+        with self._lock:
+            for pair in pairs:
+                event = self._latest.pop(pair, None)
+                if event is not None:
+                    event["live"] = False
+
+    # ---------------------------------------------------------
+    # Read side
+    # ---------------------------------------------------------
+    def page(self, reader_id, following_ids, limit=FEED_PAGE_SIZE):
+        """
+        Newest events by accounts in following_ids (the reader's current
+        followees, e.g. profile["followingIds"]), at most `limit`.
+        """
+        following_ids = following_ids if isinstance(following_ids, (set, frozenset)) else set(following_ids)
+        with self._lock:
+            sources = [reversed(self._inbox.get(reader_id, ()))]
+            pulled = [a for a in self._pulled if a in following_ids]
+            sources += [reversed(self._outbox[a]) for a in pulled if a in self._outbox]
+            newest = heapq.merge(*sources, key=lambda e: -e["seq"])
+            # An actor pulled since an earlier fan-out has events in both places.
+            visible = self._visible(newest, following_ids)
+            rows = [
+                {"actorId": e["actorId"], "targetId": e["targetId"], "at": e["at"]}
+                for e in islice(visible, limit)
+            ]
+            self.pulled_events += sum(r["actorId"] in pulled for r in rows)
+        return rows
+
+    @staticmethod
+    def _visible(events, following_ids):
+        last = None
+        for e in events:
+            if e["seq"] != last and e["live"] and e["actorId"] in following_ids:
+                yield e
+            last = e["seq"]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "inboxes": len(self._inbox),
+                "outboxes": len(self._outbox),
+                "pulled_actors": len(self._pulled),
+                "tracked_edges": len(self._latest),
+                "fanned_out": self.fanned_out,
+                "pulled_events": self.pulled_events,
+            }
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_feed_service():
+    """Process-wide feed, shared by all Streamlit sessions."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = FeedService()
+        return _service
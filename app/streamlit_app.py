@@ -2,8 +2,13 @@ import streamlit as st
 from ui.sidebar import render_sidebar
 from ui.user_view import render_user_view
 from ui.admin_view import render_admin_view
+from db.loader import reset_user_loader
+from db.queries import use_session_bookmarks, start_query_scope, finish_query_scope
 
 st.set_page_config(page_title="Social Graph System", layout="wide")
+use_session_bookmarks()
+start_query_scope()
+reset_user_loader()
 
 mode = render_sidebar()
 
@@ -19,3 +24,5 @@ elif mode == "User":
         st.warning("Please login from the sidebar.")
     else:
         render_user_view(user)
+
+finish_query_scope()
@@ -1,8 +1,19 @@
+import time
 import streamlit as st
-from ui.components import two_panel_query_ui, dataframe
-from graph.graph_render import graph_from_rows, mutual_graph, recommendation_graph
-from db.neo4j_client import run_query
-import bcrypt
+from ui.components import two_panel_query_ui, dataframe, user_options, PATH_STATUS
+from graph.graph_render import graph_from_rows, mutual_graph, recommendation_graph, path_graph
+from graph.paths import shortest_path, PATH_MAX_DEPTH, PATH_MAX_EXPANSIONS
+from db.repository import get_repository
+from db.users import register_user, update_profile, DuplicateUserError
+from services.auth_service import get_auth_service, AuthError
+from db.queries import list_users, load_profile, PROFILE_PAGE_SIZE
+from db.cypher import PROFILE_QUERY
+from db.follows import follow, unfollow, follow_all, bulk_follow, bulk_unfollow, get_write_behind
+from db.loader import user_loader, with_usernames
+from db.following_set import FollowingSet
+from graph.analytics import graph_stats, cached_graph_stats, INFLUENCER_MIN_FOLLOWERS
+from graph.communities import run_community_detection, last_community_run
+from services.feed_service import get_feed_service
 
 
 def render_admin_view():
@@ -63,73 +74,23 @@ RETURN
             elif len(new_password) < 4:
                 st.error("Password must be at least 4 characters")
             else:
-                # Check if username already exists
-                existing = run_query(
-                    """
-                    MATCH (u:User {username: $username})
-                    RETURN u.username AS username
-                """,
-                    {"username": new_username},
-                )
-
-                if existing:
-                    st.error(f"Username '{new_username}' is already taken!")
-                else:
-                    # Check if email already exists
-                    existing_email = run_query(
-                        """
-                        MATCH (u:User {email: $email})
-                        RETURN u.email AS email
-                    """,
-                        {"email": new_email},
+                # Username/email uniqueness is enforced by constraints in the
+                # same transaction as the CREATE; no lookups beforehand.
+                try:
+                    password_hash = get_auth_service().hash_password(new_password)
+                    created = register_user(
+                        new_username,
+                        new_email,
+                        new_name,
+                        new_bio or f"Hello, I'm {new_name}!",
+                        password_hash,
                     )
-
-                    if existing_email:
-                        st.error(f"Email '{new_email}' is already registered!")
-                    else:
-                        # Generate new user ID
-                        max_id_result = run_query("""
-                            MATCH (u:User)
-                            RETURN max(toInteger(u.userId)) AS maxId
-                        """)
-                        max_id = (max_id_result[0].data()["maxId"] if max_id_result else 0)
-                        new_id = f"{(max_id or 0) + 1:04d}"
-
-                        # Hash password
-                        password_hash = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt()).decode()
-
-                        # Create user
-                        result = run_query(
-                            """
-                            CREATE (u:User {
-                                userId: $userId,
-                                username: $username,
-                                email: $email,
-                                name: $name,
-                                bio: $bio,
-                                passwordHash: $passwordHash
-                            })
-                            RETURN
-                                u.userId AS id,
-                                u.username AS username,
-                                u.email AS email,
-                                u.name AS name,
-                                u.bio AS bio
-                        """,
-                            {
-                                "userId": new_id,
-                                "username": new_username,
-                                "email": new_email,
-                                "name": new_name,
-                                "bio": new_bio or f"Hello, I'm {new_name}!",
-                                "passwordHash": password_hash,
-                            },
-                        )
-
-                        if result:
-                            st.success(f"✅ User '{new_username}' registered successfully with ID: {new_id}")
-                            df = dataframe(result)
-                            st.dataframe(df, use_container_width=True)
+                except (AuthError, DuplicateUserError) as e:
+                    st.error(f"❌ {e}")
+                else:
+                    st.success(f"✅ User '{new_username}' registered successfully with ID: {created['id']}")
+                    df = dataframe([created])
+                    st.dataframe(df, use_container_width=True)
     st.divider()
 
     # ======================================================
@@ -170,51 +131,37 @@ RETURN
             if not login_username or not login_password:
                 st.error("Please enter both username and password")
             else:
-                result = run_query(
-                    """
-                    MATCH (u:User {username: $username})
-                    RETURN
-                        u.userId AS id,
-                        u.username AS username,
-                        u.email AS email,
-                        u.name AS name,
-                        u.bio AS bio,
-                        u.passwordHash AS passwordHash
-                """,
-                    {"username": login_username},
-                )
-
-                if not result:
-                    st.error(f"❌ User '{login_username}' not found!")
+                try:
+                    with st.spinner("Verifying credentials..."):
+                        user_data = get_auth_service().authenticate(login_username, login_password)
+                except AuthError as e:
+                    st.error(f"❌ {e}")
                 else:
-                    user_data = result[0].data()
-                    stored_hash = user_data["passwordHash"]
-
-                    if bcrypt.checkpw(login_password.encode(), stored_hash.encode()):
-                        st.success(f"✅ Login successful! Welcome, {user_data['name']}!")
+                    st.success(f"✅ Login successful! Welcome, {user_data['name']}!")
 
-                        # Show user info (without password hash)
-                        display_data = {k: v for k, v in user_data.items() if k != "passwordHash"}
-                        st.write("### Authenticated User Info")
-                        st.json(display_data)
-                    else:
-                        st.error("❌ Invalid password!")
+                    # Show user info (password hash is never returned)
+                    st.write("### Authenticated User Info")
+                    st.json(user_data)
 
     with col_b:
         if st.button("Check User Exists", key="uc2_check"):
             if login_username:
-                result = run_query(
-                    """
-                    MATCH (u:User {username: $username})
-                    RETURN u.username AS username, u.name AS name
-                """,
-                    {"username": login_username},
-                )
-
-                if result:
+                if get_repository().get_credentials(login_username):
                     st.success(f"✅ User '{login_username}' exists")
                 else:
                     st.warning(f"❌ User '{login_username}' not found")
+
+    with st.expander("Auth service stats"):
+        stats = get_auth_service().stats()
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Auth p50 (ms)", stats["p50_ms"])
+        c2.metric("Auth p95 (ms)", stats["p95_ms"])
+        c3.metric("Queue depth", f"{stats['queue_depth']}/{stats['max_pending']}")
+        c4.metric("Rate-limited", stats["rate_limited"])
+        st.caption(
+            f"{stats['workers']} bcrypt workers, cost factor {stats['cost_factor']}, "
+            f"{stats['rehashed']} hash(es) upgraded on login."
+        )
     st.divider()
 
     # ======================================================
@@ -223,16 +170,7 @@ RETURN
     st.subheader("UC-3: View Profile")
     st.write("View a user's profile information including their details and social statistics.")
 
-    # Load all users for dropdown
-    users = run_query("""
-        MATCH (u:User)
-        RETURN u.userId AS id, u.username AS username
-        ORDER BY u.username
-        LIMIT 500
-    """)
-
-    user_list = [f"{r.data()['username']} ({r.data()['id']})" for r in users]
-    user_map = {f"{r.data()['username']} ({r.data()['id']})": r.data() for r in users}
+    user_list, user_map = user_options(list_users())
 
     selected_label = st.selectbox("Select User to View", user_list, key="uc3_user")
 
@@ -240,49 +178,20 @@ RETURN
         selected_user = user_map[selected_label]
         uid = selected_user["id"]
 
-        cypher_query = f"""
-// UC-3: View Profile
-// Retrieves complete user profile with social statistics
-
-MATCH (u:User {{userId: '{uid}'}})
-OPTIONAL MATCH (u)<-[:FOLLOWS]-(follower)
-WITH u, count(DISTINCT follower) AS followerCount
-OPTIONAL MATCH (u)-[:FOLLOWS]->(following)
-RETURN
-    u.userId AS id,
-    u.username AS username,
-    u.email AS email,
-    u.name AS name,
-    u.bio AS bio,
-    followerCount,
-    count(DISTINCT following) AS followingCount
-"""
+        cypher_query = (
+            "// UC-3: View Profile\n"
+            "// Header, social statistics and first page of connections in one round trip\n"
+            f"// $uid = '{uid}', $page = {PROFILE_PAGE_SIZE}, $threshold = {get_repository().supernode_threshold}\n"
+            + PROFILE_QUERY
+        )
 
         st.write("### Cypher Query")
         st.code(cypher_query, language="cypher")
 
         if st.button("View Profile", key="uc3_view"):
-            result = run_query(
-                """
-                MATCH (u:User {userId: $uid})
-                OPTIONAL MATCH (u)<-[:FOLLOWS]-(follower)
-                WITH u, count(DISTINCT follower) AS followerCount
-                OPTIONAL MATCH (u)-[:FOLLOWS]->(following)
-                RETURN
-                    u.userId AS id,
-                    u.username AS username,
-                    u.email AS email,
-                    u.name AS name,
-                    u.bio AS bio,
-                    followerCount,
-                    count(DISTINCT following) AS followingCount
-            """,
-                {"uid": uid},
-            )
-
-            if result:
-                profile = result[0].data()
+            profile = load_profile(uid)
 
+            if profile:
                 st.write("### Profile Information")
 
                 col1, col2, col3 = st.columns([2, 1, 1])
@@ -301,7 +210,8 @@ RETURN
                     st.metric("Following", profile["followingCount"])
 
                 st.write("### Raw Data")
-                df = dataframe(result)
+                raw = {k: profile[k] for k in ("id", "username", "email", "name", "bio", "followerCount", "followingCount")}
+                df = dataframe([raw])
                 st.dataframe(df, use_container_width=True)
     st.divider()
 
@@ -311,17 +221,7 @@ RETURN
     st.subheader("UC-4: Edit Profile")
     st.write("Update a user's profile information (name, bio, email).")
 
-    # Load all users for dropdown
-    users = run_query("""
-        MATCH (u:User)
-        RETURN u.userId AS id, u.username AS username, u.name AS name,
-               u.email AS email, u.bio AS bio
-        ORDER BY u.username
-        LIMIT 500
-    """)
-
-    user_list = [f"{r.data()['username']} ({r.data()['id']})" for r in users]
-    user_map = {f"{r.data()['username']} ({r.data()['id']})": r.data() for r in users}
+    user_list, user_map = user_options(list_users())
 
     selected_label = st.selectbox("Select User to Edit", user_list, key="uc4_user")
 
@@ -369,49 +269,19 @@ RETURN
 
         with col_a:
             if st.button("Save Changes", key="uc4_save"):
-                # Validate email uniqueness (if changed)
-                if new_email != selected_user["email"]:
-                    existing_email = run_query(
-                        """
-                        MATCH (u:User {email: $email})
-                        WHERE u.userId <> $uid
-                        RETURN u.email AS email
-                    """,
-                        {"email": new_email, "uid": uid},
-                    )
+                # Email uniqueness is enforced by a constraint in the same
+                # transaction as the update.
+                try:
+                    updated = update_profile(uid, new_name, new_email, new_bio)
+                except DuplicateUserError as e:
+                    st.error(str(e))
+                else:
+                    if updated:
+                        st.success("✅ Profile updated successfully!")
 
-                    if existing_email:
-                        st.error(f"Email '{new_email}' is already in use by another user!")
-                        return
-
-                # Update profile
-                result = run_query(
-                    """
-                    MATCH (u:User {userId: $uid})
-                    SET u.name = $newName,
-                        u.email = $newEmail,
-                        u.bio = $newBio
-                    RETURN
-                        u.userId AS id,
-                        u.username AS username,
-                        u.email AS email,
-                        u.name AS name,
-                        u.bio AS bio
-                """,
-                    {
-                        "uid": uid,
-                        "newName": new_name,
-                        "newEmail": new_email,
-                        "newBio": new_bio,
-                    },
-                )
-
-                if result:
-                    st.success("✅ Profile updated successfully!")
-
-                    st.write("### Updated Profile")
-                    df = dataframe(result)
-                    st.dataframe(df, use_container_width=True)
+                        st.write("### Updated Profile")
+                        df = dataframe([updated])
+                        st.dataframe(df, use_container_width=True)
 
         with col_b:
             if st.button("Reset", key="uc4_reset"):
@@ -461,7 +331,8 @@ RETURN
     RETURN u.userId AS id, u.username, u.name, u.bio
     LIMIT 50
     """
-    two_panel_query_ui("UC-10: Search Users", uc10, params={"q": q})
+    two_panel_query_ui("UC-10: Search Users", uc10, params={"q": q},
+                       fallback=lambda: get_repository().search(q, 0, 50))
 
     # ======================================================
     # UC-11 Popular Users
@@ -474,7 +345,32 @@ RETURN
     ORDER BY followerCount DESC
     LIMIT 20
     """
-    two_panel_query_ui("UC-11: Popular Users", uc11)
+    two_panel_query_ui("UC-11: Popular Users", uc11,
+                       fallback=lambda: get_repository().popular(20))
+    st.divider()
+
+    # ======================================================
+    # UC-12: Degrees of Separation
+    # ======================================================
+    render_uc12_degrees_of_separation()
+    st.divider()
+
+    # ======================================================
+    # Graph statistics
+    # ======================================================
+    render_graph_statistics()
+    st.divider()
+
+    # ======================================================
+    # Communities
+    # ======================================================
+    render_communities()
+    st.divider()
+
+    # ======================================================
+    # Activity feed
+    # ======================================================
+    render_activity_feed()
 
 # ==============================================================================
 # UC-5: Follow Another User (Jakob)
@@ -484,15 +380,7 @@ def render_uc5_follow_user():
     st.write("Select a user (follower) who will follow another user (target).")
     st.write("This creates a `FOLLOWS` relationship in the graph database.")
 
-    users = run_query("""
-        MATCH (u:User)
-        RETURN u.userId AS id, u.username AS username
-        ORDER BY u.username
-        LIMIT 500
-    """)
-
-    user_list = [f"{r.data()['username']} ({r.data()['id']})" for r in users]
-    user_map = {f"{r.data()['username']} ({r.data()['id']})": r.data() for r in users}
+    user_list, user_map = user_options(list_users())
 
     col1, col2 = st.columns(2)
 
@@ -528,45 +416,61 @@ RETURN
 
         with col_a:
             if st.button("Execute Follow", key="uc5_execute"):
-                if follower['id'] == target['id']:
+                # One write; the outcome replaces the before/after existence checks
+                outcome = follow(follower['id'], target['id'])
+
+                if outcome == "self":
                     st.error("A user cannot follow themselves!")
+                elif outcome == "exists":
+                    st.warning(f"{follower['username']} already follows {target['username']}!")
+                elif outcome == "missing":
+                    st.error("One of the selected users no longer exists.")
                 else:
-                    check = run_query("""
-                        MATCH (a:User {userId: $fid})-[r:FOLLOWS]->(b:User {userId: $tid})
-                        RETURN count(r) AS exists
-                    """, {"fid": follower['id'], "tid": target['id']})
-
-                    if check and check[0].data()['exists'] > 0:
-                        st.warning(f"{follower['username']} already follows {target['username']}!")
-                    else:
-                        result = run_query("""
-                            MATCH (follower:User {userId: $fid})
-                            MATCH (target:User {userId: $tid})
-                            CREATE (follower)-[r:FOLLOWS]->(target)
-                            RETURN
-                                follower.userId AS followerId,
-                                follower.username AS followerUsername,
-                                target.userId AS targetId,
-                                target.username AS targetUsername
-                        """, {"fid": follower['id'], "tid": target['id']})
-
-                        if result:
-                            st.success(f"✅ {follower['username']} now follows {target['username']}!")
-                            st.dataframe(dataframe(result), use_container_width=True)
+                    st.success(f"✅ {follower['username']} now follows {target['username']}!")
+                    st.dataframe(dataframe([{
+                        "followerId": follower['id'],
+                        "followerUsername": follower['username'],
+                        "targetId": target['id'],
+                        "targetUsername": target['username'],
+                    }]), use_container_width=True)
 
         with col_b:
             if st.button("Check Status", key="uc5_check"):
-                check = run_query("""
-                    MATCH (a:User {userId: $fid})-[r:FOLLOWS]->(b:User {userId: $tid})
-                    RETURN a.username AS follower, b.username AS following
-                """, {"fid": follower['id'], "tid": target['id']})
-
-                if check:
+                if get_repository().follows(follower['id'], target['id']):
                     st.success(f"✅ Relationship exists: {follower['username']} → {target['username']}")
                 else:
                     st.info(f"No relationship: {follower['username']} does not follow {target['username']}")
 
 
+    wb = get_write_behind()
+    if wb:
+        st.caption(
+            f"Write-behind enabled: {wb.depth()} event(s) queued, {wb.flushed} flushed, "
+            f"{wb.coalesced} coalesced."
+        )
+
+    with st.expander("Bulk follow / unfollow"):
+        st.write("One `followerId,targetId` pair per line. All pairs are applied in a single UNWIND transaction.")
+        pairs_text = st.text_area("Pairs", key="uc5_bulk_pairs", height=150, placeholder="0001,0002\n0001,0003")
+        action = st.radio("Action", ["Follow", "Unfollow"], key="uc5_bulk_action", horizontal=True)
+
+        if st.button("Apply", key="uc5_bulk_apply"):
+            pairs = []
+            for line in pairs_text.splitlines():
+                parts = [p.strip() for p in line.split(",")]
+                if len(parts) == 2 and all(parts):
+                    pairs.append((parts[0], parts[1]))
+
+            if not pairs:
+                st.warning("No valid pairs entered.")
+            else:
+                results = bulk_follow(pairs) if action == "Follow" else bulk_unfollow(pairs)
+                user_loader().prime(list_users())
+                df = dataframe(with_usernames(results, ("followerId", "targetId")))
+                st.write(df["outcome"].value_counts().to_dict())
+                st.dataframe(df, use_container_width=True)
+
+
 # ==============================================================================
 # UC-6: Unfollow a User (Jakob)
 # ==============================================================================
@@ -575,15 +479,7 @@ def render_uc6_unfollow_user():
     st.write("Select a user (follower) who will unfollow another user (target).")
     st.write("This removes the `FOLLOWS` relationship from the graph database.")
 
-    users = run_query("""
-        MATCH (u:User)
-        RETURN u.userId AS id, u.username AS username
-        ORDER BY u.username
-        LIMIT 500
-    """)
-
-    user_list = [f"{r.data()['username']} ({r.data()['id']})" for r in users]
-    user_map = {f"{r.data()['username']} ({r.data()['id']})": r.data() for r in users}
+    user_list, user_map = user_options(list_users())
 
     col1, col2 = st.columns(2)
 
@@ -618,28 +514,14 @@ RETURN
 
         with col_a:
             if st.button("Execute Unfollow", key="uc6_execute"):
-                check = run_query("""
-                    MATCH (a:User {userId: $fid})-[r:FOLLOWS]->(b:User {userId: $tid})
-                    RETURN count(r) AS exists
-                """, {"fid": follower['id'], "tid": target['id']})
-
-                if not check or check[0].data()['exists'] == 0:
+                if unfollow(follower['id'], target['id']) == "not_following":
                     st.warning(f"{follower['username']} is not following {target['username']}!")
                 else:
-                    run_query("""
-                        MATCH (follower:User {userId: $fid})-[r:FOLLOWS]->(target:User {userId: $tid})
-                        DELETE r
-                    """, {"fid": follower['id'], "tid": target['id']})
                     st.success(f"✅ {follower['username']} unfollowed {target['username']}!")
 
         with col_b:
             if st.button("Check Status", key="uc6_check"):
-                check = run_query("""
-                    MATCH (a:User {userId: $fid})-[r:FOLLOWS]->(b:User {userId: $tid})
-                    RETURN a.username AS follower, b.username AS following
-                """, {"fid": follower['id'], "tid": target['id']})
-
-                if check:
+                if get_repository().follows(follower['id'], target['id']):
                     st.success(f"✅ Relationship exists: {follower['username']} → {target['username']}")
                 else:
                     st.info(f"No relationship: {follower['username']} does not follow {target['username']}")
@@ -652,15 +534,7 @@ def render_uc7_view_connections():
     st.subheader("UC-7: View Friends/Connections")
     st.write("Select a user to view their followers and following lists.")
 
-    users = run_query("""
-        MATCH (u:User)
-        RETURN u.userId AS id, u.username AS username
-        ORDER BY u.username
-        LIMIT 500
-    """)
-
-    user_list = [f"{r.data()['username']} ({r.data()['id']})" for r in users]
-    user_map = {f"{r.data()['username']} ({r.data()['id']})": r.data() for r in users}
+    user_list, user_map = user_options(list_users())
 
     selected_label = st.selectbox("Select User", user_list, key="uc7_user")
 
@@ -671,19 +545,14 @@ def render_uc7_view_connections():
 
         st.write(f"### Connections for: **{username}** (ID: {uid})")
 
-        counts = run_query("""
-            MATCH (u:User {userId: $uid})
-            OPTIONAL MATCH (u)<-[:FOLLOWS]-(follower)
-            WITH u, count(DISTINCT follower) AS followerCount
-            OPTIONAL MATCH (u)-[:FOLLOWS]->(following)
-            RETURN followerCount, count(DISTINCT following) AS followingCount
-        """, {"uid": uid})
+        profile = load_profile(uid)
+        if profile is None:
+            st.warning("User no longer exists.")
+            return
 
-        if counts:
-            c = counts[0].data()
-            col1, col2 = st.columns(2)
-            col1.metric("Followers", c['followerCount'])
-            col2.metric("Following", c['followingCount'])
+        col1, col2 = st.columns(2)
+        col1.metric("Followers", profile['followerCount'])
+        col2.metric("Following", profile['followingCount'])
 
         tab1, tab2 = st.tabs(["👥 Followers", "➡️ Following"])
 
@@ -705,17 +574,19 @@ LIMIT 100
             st.code(followers_query, language="cypher")
 
             if st.button("Run Followers Query", key="uc7_followers_run"):
-                rows = run_query("""
-                    MATCH (u:User {userId: $uid})<-[:FOLLOWS]-(f:User)
-                    RETURN f.userId AS id, f.username AS username, f.name AS name, f.bio AS bio
-                    ORDER BY f.username LIMIT 100
-                """, {"uid": uid})
+                rows = profile["followerPage"]
 
                 df = dataframe(rows)
 
                 if df.empty:
                     st.info("No followers found.")
                 else:
+                    if profile.get("followerPreview") == "sample":
+                        st.caption(
+                            f"Supernode: showing an unsorted sample of {len(rows)} of "
+                            f"{profile['followerCount']} followers, plus the cached top followers."
+                        )
+                        st.dataframe(dataframe(get_repository().top_followers(uid)), use_container_width=True)
                     st.dataframe(df, use_container_width=True)
                     if st.checkbox("Show Graph", key="uc7_followers_graph"):
                         path = graph_from_rows(rows)
@@ -740,11 +611,7 @@ LIMIT 100
             st.code(following_query, language="cypher")
 
             if st.button("Run Following Query", key="uc7_following_run"):
-                rows = run_query("""
-                    MATCH (u:User {userId: $uid})-[:FOLLOWS]->(t:User)
-                    RETURN t.userId AS id, t.username AS username, t.name AS name, t.bio AS bio
-                    ORDER BY t.username LIMIT 100
-                """, {"uid": uid})
+                rows = profile["followingPage"]
 
                 df = dataframe(rows)
 
@@ -765,15 +632,7 @@ def render_uc8_mutual_connections():
     st.subheader("UC-8: Mutual Connections")
     st.write("Find users that **both** User A and User B follow (mutual friends).")
 
-    users = run_query("""
-        MATCH (u:User)
-        RETURN u.userId AS id, u.username AS username
-        ORDER BY u.username
-        LIMIT 500
-    """)
-
-    user_list = [f"{r.data()['username']} ({r.data()['id']})" for r in users]
-    user_map = {f"{r.data()['username']} ({r.data()['id']})": r.data() for r in users}
+    user_list, user_map = user_options(list_users())
 
     col1, col2 = st.columns(2)
 
@@ -809,14 +668,7 @@ LIMIT 50
             if user_a['id'] == user_b['id']:
                 st.warning("Please select two different users!")
             else:
-                rows = run_query("""
-                    MATCH (a:User {userId: $aid})-[:FOLLOWS]->(mutual:User)<-[:FOLLOWS]-(b:User {userId: $bid})
-                    WHERE a <> b
-                    RETURN DISTINCT
-                        mutual.userId AS id, mutual.username AS username,
-                        mutual.name AS name, mutual.bio AS bio
-                    ORDER BY mutual.username LIMIT 50
-                """, {"aid": user_a['id'], "bid": user_b['id']})
+                rows = get_repository().mutual(user_a['id'], user_b['id'], 0, 50)
 
                 df = dataframe(rows)
 
@@ -844,15 +696,7 @@ def render_uc9_friend_recommendations():
     st.subheader("UC-9: Friend Recommendations")
     st.write("Suggest new users to follow based on **friends-of-friends** (2-hop graph traversal).")
 
-    users = run_query("""
-        MATCH (u:User)
-        RETURN u.userId AS id, u.username AS username
-        ORDER BY u.username
-        LIMIT 500
-    """)
-
-    user_list = [f"{r.data()['username']} ({r.data()['id']})" for r in users]
-    user_map = {f"{r.data()['username']} ({r.data()['id']})": r.data() for r in users}
+    user_list, user_map = user_options(list_users())
 
     selected_label = st.selectbox("Select User", user_list, key="uc9_user")
     limit = st.slider("Number of Recommendations", 5, 50, 10, key="uc9_limit")
@@ -884,18 +728,19 @@ LIMIT {limit}
         st.write("### Cypher Query")
         st.code(cypher_query, language="cypher")
 
+        # Kept in session state so "Follow all" survives the rerun its click triggers
+        recs_key = f"uc9_recs_{uid}_{limit}"
+
         if st.button("Get Recommendations", key="uc9_execute"):
-            rows = run_query("""
-                MATCH (u:User {userId: $uid})-[:FOLLOWS]->(friend)-[:FOLLOWS]->(recommended)
-                WHERE NOT (u)-[:FOLLOWS]->(recommended) AND u <> recommended
-                WITH recommended, count(DISTINCT friend) AS mutualCount
-                RETURN
-                    recommended.userId AS id, recommended.username AS username,
-                    recommended.name AS name, recommended.bio AS bio, mutualCount
-                ORDER BY mutualCount DESC, recommended.username
-                LIMIT $limit
-            """, {"uid": uid, "limit": limit})
+            # The profile bundle already holds the following ids; pass them
+            # down instead of re-checking FOLLOWS for every candidate.
+            profile = load_profile(uid)
+            exclude = FollowingSet(uid, profile["followingIds"]) if profile else None
+            st.session_state[recs_key] = get_repository().recommendations(uid, limit, exclude=exclude)
+
+        rows = st.session_state.get(recs_key)
 
+        if rows is not None:
             df = dataframe(rows)
 
             st.write(f"### Recommendations for: **{username}**")
@@ -905,6 +750,14 @@ LIMIT {limit}
             else:
                 st.write(f"Found {len(df)} recommendation(s)")
 
+                if st.button(f"Follow all {len(rows)} recommended", key="uc9_follow_all"):
+                    results = follow_all(uid, [r["id"] for r in rows])
+                    del st.session_state[recs_key]
+                    st.success(f"✅ {username} now follows {sum(r['outcome'] == 'created' for r in results)} more user(s)")
+                    user_loader().prime(rows)
+                    st.dataframe(dataframe(with_usernames(results)), use_container_width=True)
+                    return
+
                 tab1, tab2 = st.tabs(["📊 Table", "🔗 Graph"])
 
                 with tab1:
@@ -915,3 +768,196 @@ LIMIT {limit}
                     with open(path) as f:
                         st.components.v1.html(f.read(), height=600)
                     st.caption("🔴 You | 🟡 Recommended Users (size = mutual connections)")
+
+
+# ==============================================================================
+# UC-12: Degrees of Separation
+# ==============================================================================
+def render_uc12_degrees_of_separation():
+    st.subheader("UC-12: Degrees of Separation")
+    st.write(
+        "Find the shortest chain of `FOLLOWS` from one user to another. "
+        "Runs a **bidirectional BFS** that always expands the smaller frontier, "
+        "instead of a `shortestPath` that fans out through every influencer."
+    )
+
+    user_list, user_map = user_options(list_users())
+
+    col1, col2 = st.columns(2)
+    with col1:
+        from_label = st.selectbox("From", user_list, key="uc12_from")
+        max_depth = st.slider("Max hops", 1, 10, PATH_MAX_DEPTH, key="uc12_depth")
+    with col2:
+        to_label = st.selectbox("To", user_list, index=min(1, len(user_list) - 1), key="uc12_to")
+        max_expansions = st.number_input(
+            "Max users expanded", 100, 1000000, PATH_MAX_EXPANSIONS, step=1000, key="uc12_expansions",
+        )
+
+    if from_label and to_label:
+        source, target = user_map[from_label], user_map[to_label]
+
+        cypher_query = f"""
+// UC-12: Degrees of Separation (equivalent single query, for reference)
+// The app runs a bidirectional BFS instead: one UNWIND query per frontier.
+MATCH p = shortestPath(
+    (a:User {{userId: '{source['id']}'}})-[:FOLLOWS*..{max_depth}]->(b:User {{userId: '{target['id']}'}})
+)
+RETURN [n IN nodes(p) | n.username] AS path, length(p) AS hops
+"""
+        st.write("### Cypher Query")
+        st.code(cypher_query, language="cypher")
+
+        if st.button("Find Path", key="uc12_execute"):
+            result = shortest_path(source["id"], target["id"], max_depth, int(max_expansions))
+            levels = result["levels"]
+            st.caption(
+                f"Expanded {result['expanded']} user(s) in "
+                f"{levels['forward']} forward / {levels['backward']} backward level(s)"
+            )
+
+            if result["path"] is None:
+                st.warning(PATH_STATUS[result["status"]].format(depth=max_depth, expanded=result["expanded"]))
+                return
+
+            users = user_loader().load_many(result["path"])
+            st.success(f"**{source['username']}** reaches **{target['username']}** in {len(users) - 1} hop(s)")
+            st.write(" → ".join(u["username"] for u in users))
+
+            path = path_graph(users)
+            with open(path) as f:
+                st.components.v1.html(f.read(), height=400)
+            st.caption("🔴 From | 🔵 Via | 🟢 To")
+
+
+# ==============================================================================
+# Graph statistics
+# ==============================================================================
+def render_graph_statistics():
+    st.subheader("Graph Statistics")
+    st.write("Degree distributions, reciprocity, clustering and connected components of the whole `FOLLOWS` graph.")
+
+    stats = cached_graph_stats()
+    label = "Recompute" if stats else "Compute Statistics"
+    if st.button(label, key="graph_stats_compute"):
+        stats = graph_stats(refresh=True)
+
+    if stats is None:
+        st.info("Not computed yet. This reads every user and edge once.")
+        return
+
+    age = time.time() - stats["computed_at"]
+    st.caption(
+        f"Computed {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats['computed_at']))} "
+        f"({age / 60:.0f} min ago) in {stats['duration']:.1f}s"
+    )
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Users", stats["users"])
+    c2.metric("Follows", stats["edges"])
+    c3.metric("Ghosts (follow nobody)", stats["ghosts"])
+    c4.metric(f"Influencers ({INFLUENCER_MIN_FOLLOWERS}+ followers)", stats["influencers"])
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Reciprocity", f"{stats['reciprocity']:.1%}")
+    c2.metric("Avg. clustering (est.)", f"{stats['avg_clustering']:.3f}")
+    c3.metric("Transitivity (est.)", f"{stats['transitivity']:.3f}")
+    c4.metric("Weak components", stats["components"]["count"])
+
+    components = stats["components"]
+    st.write(
+        f"Largest component: **{components['largest']}** user(s) "
+        f"({components['largest'] / max(stats['users'], 1):.1%}), "
+        f"isolated users: **{components['isolated']}**"
+    )
+
+    tab1, tab2 = st.tabs(["⬅️ Followers (in-degree)", "➡️ Following (out-degree)"])
+
+    for tab, key in ((tab1, "in_degree"), (tab2, "out_degree")):
+        with tab:
+            degree = stats[key]
+            st.caption(f"mean {degree['mean']:.1f} · median {degree['median']:.0f} · max {degree['max']}")
+            df = dataframe(degree["histogram"])
+            if not df.empty:
+                st.bar_chart(df, x="degree", y="users", sort=False)
+
+
+# ==============================================================================
+# Communities
+# ==============================================================================
+def render_communities():
+    st.subheader("Communities")
+    st.write(
+        "Label propagation over the `FOLLOWS` graph. Stores a `community` number on every user; "
+        "later runs start from the stored numbers and only rewrite users whose community changed."
+    )
+
+    col_a, col_b = st.columns([1, 3])
+    run = None
+    with col_a:
+        if st.button("Detect Communities", key="communities_run"):
+            run = run_community_detection()
+    with col_b:
+        if st.button("Recompute From Scratch", key="communities_cold"):
+            run = run_community_detection(cold=True)
+
+    run = run or last_community_run()
+    if run is None:
+        st.info("Not run yet in this process.")
+        return
+
+    st.caption(
+        f"{'Cold' if run['cold'] else 'Incremental'} run at "
+        f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['computed_at']))}: "
+        f"{run['rounds']} round(s), {run['duration']:.1f}s"
+    )
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Communities", run["communities"])
+    c2.metric("Singletons", run["singletons"])
+    c3.metric("Users changed", run["changed"])
+    c4.metric("Users written", run["written"])
+
+    quality = run["quality"]
+    if quality:
+        st.write(f"**Compared with the {quality['users']} users' planted clusters** (`generate_graph.py`):")
+        c1, c2, c3 = st.columns(3)
+        c1.metric("NMI", f"{quality['nmi']:.3f}")
+        c2.metric("Adjusted Rand", f"{quality['ari']:.3f}")
+        c3.metric("Purity", f"{quality['purity']:.1%}")
+    else:
+        st.caption("No users.csv found, so there are no planted clusters to compare with.")
+
+    df = dataframe([{"community": f"#{i + 1}", "users": size} for i, size in enumerate(run["sizes"])])
+    if not df.empty:
+        st.bar_chart(df, x="community", y="users", sort=False)
+
+
+# ==============================================================================
+# Activity feed
+# ==============================================================================
+def render_activity_feed():
+    st.subheader("Activity Feed")
+    st.write(
+        "Follows written by this app process, pushed into each follower's feed "
+        "(pulled at read time for supernodes)."
+    )
+
+    feed = get_feed_service()
+    stats = feed.stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Feeds", stats["inboxes"])
+    c2.metric("Copies pushed", stats["fanned_out"])
+    c3.metric("Pulled accounts", stats["pulled_actors"])
+    c4.metric("Pulled events served", stats["pulled_events"])
+
+    user_list, user_map = user_options(list_users())
+    selected = st.selectbox("Show feed of", user_list, key="feed_user")
+    if selected and st.button("Show Feed", key="feed_show"):
+        reader = user_map[selected]
+        profile = load_profile(reader["id"])
+        events = feed.page(reader["id"], profile["followingIds"]) if profile else []
+        if not events:
+            st.info("No recent activity for this user.")
+            return
+        rows = [{"when": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(e.pop("at"))), **e} for e in events]
+        st.dataframe(dataframe(with_usernames(rows, keys=("actorId", "targetId"))), use_container_width=True)
@@ -1,14 +1,104 @@
+import os
+from contextlib import contextmanager, nullcontext
 import streamlit as st
 import pandas as pd
-from db.neo4j_client import run_query
+from db.neo4j_client import run_query, stream_query, statement_type, query_timeout
+from db.cypher_guard import inject_limit, strip_explain, READ, STATEMENT_TYPES
+from db.export import export_query, export_rows, remove_export, ExportError, EXPORT_FORMATS, record_columns
+from db.repository import GRAPH_BACKEND
+from db.query_scope import current_query_scope, QueryTimeout
 from graph.graph_render import graph_from_rows
 
-def dataframe(rows):
-    return pd.DataFrame([r.data() for r in rows]) if rows else pd.DataFrame()
+# Ad-hoc Cypher (two_panel_query_ui) fetches and shows at most this
+# many rows; the rest of the result is discarded by the server.
+# Guardrails: db/cypher_guard.py.
+ADHOC_MAX_ROWS = int(os.environ.get("ADHOC_MAX_ROWS", "10000"))
+ADHOC_STREAM_CHUNK = 500   # rows per fetch; the table first renders after one chunk
 
-def two_panel_query_ui(title, default_cypher, params=None):
+# Why graph.paths.shortest_path found no path, by result["status"]
+PATH_STATUS = {
+    "no_path": "No follow path exists between these users.",
+    "depth_limit": "No path within {depth} hops.",
+    "expansion_limit": "Gave up after expanding {expanded} users without meeting; a longer path may still exist.",
+}
+
+
+def dataframe(rows, max_rows=None):
+    """
+    DataFrame from records or dicts, built column by column. With
+    max_rows, rows past the cap are dropped and df.attrs["truncated"]
+    is set (run_query(max_rows=N) fetches N + 1 rows so the cut shows).
+    """
+    truncated = max_rows is not None and len(rows) > max_rows
+    if truncated:
+        rows = rows[:max_rows]
+    df = pd.DataFrame(record_columns(rows)) if rows else pd.DataFrame()
+    df.attrs["truncated"] = truncated
+    return df
+
+def user_options(users):
+    """
+    Build selectbox labels and a label -> user dict map.
+    Accepts records or dicts with 'id' and 'username' fields.
+    """
+    user_map = {}
+    for r in users:
+        data = r.data() if hasattr(r, "data") else r
+        user_map[f"{data['username']} ({data['id']})"] = data
+    return list(user_map), user_map
+
+def lazy_tabs(labels, key):
+    """
+    Tab bar whose content is computed only for the selected tab.
+
+    st.tabs executes every tab body on each rerun; this renders a
+    horizontal radio instead and returns the selected label, so the
+    caller only runs that tab. The selection lives in session state
+    under `key` and survives reruns.
+    """
+    return st.radio(
+        key,
+        labels,
+        key=key,
+        horizontal=True,
+        label_visibility="collapsed",
+    )
+
+@contextmanager
+def optional_panel(label):
+    """
+    Wrap a panel the page can live without (graphs, recommendations).
+
+        with optional_panel("Recommendations") as ok:
+            if ok:
+                ...
+
+    When the rerun has used up its latency budget (db/query_scope.py)
+    the body is skipped with a note; otherwise its queries get at most
+    the remaining budget, and a timeout shows a warning instead of
+    failing the page.
+    """
+    scope = current_query_scope()
+    if scope is not None and scope.exhausted():
+        scope.skipped.append(label)
+        st.caption(f"⏱ {label} skipped to keep the page within its latency budget.")
+        yield False
+        return
+    try:
+        with scope.capped() if scope else nullcontext():
+            yield True
+    except QueryTimeout as e:
+        st.warning(f"⏱ {label} took too long and was stopped ({e}).")
+
+def two_panel_query_ui(title, default_cypher, params=None, fallback=None):
+    """
+    Editable Cypher on the left, results on the right. Without Neo4j
+    (GRAPH_BACKEND=memory) the editor is read-only and Run calls
+    `fallback()` for the rows instead.
+    """
     st.subheader(title)
     st.divider()
+    cypher_enabled = GRAPH_BACKEND == "neo4j"
 
     base = title.replace(" ", "_")
     # text_key = base + "_text"
@@ -35,7 +125,7 @@ def two_panel_query_ui(title, default_cypher, params=None):
 
     with left:
         st.write("### Cypher Query")
-        disabled = not st.session_state[editable_key]
+        disabled = not st.session_state[editable_key] or not cypher_enabled
 
         st.text_area("Query Editor", key=text_key, height=300, disabled=disabled)
 
@@ -51,22 +141,29 @@ def two_panel_query_ui(title, default_cypher, params=None):
 
         run_pressed = c3.button("Run", key=base+"_run")
 
+        allow_writes = st.toggle(
+            "Allow writes", key=base + "_allow_writes", disabled=not cypher_enabled,
+            help="Required for statements that create, change or delete data or schema.",
+        )
+
     with right:
         st.write("### Output")
 
         if run_pressed:
             try:
-                cypher = st.session_state[text_key]
-                rows = run_query(cypher, params)
-                df = dataframe(rows)
-
                 tab1, tab2 = st.tabs(["Table", "Graph"])
 
                 with tab1:
-                    st.dataframe(df, width="stretch")
+                    if cypher_enabled:
+                        rows = run_adhoc(st.session_state[text_key], params, allow_writes)
+                    else:
+                        st.caption(f"{GRAPH_BACKEND} backend: showing the built-in result, not the Cypher above.")
+                        rows = fallback() if fallback else []
+                        show_rows(st.empty(), rows)
+                        rows = rows[:ADHOC_MAX_ROWS]
 
                 with tab2:
-                    if df.empty:
+                    if not rows:
                         st.write("No graph results.")
                     else:
                         path = graph_from_rows(rows)
@@ -75,3 +172,120 @@ def two_panel_query_ui(title, default_cypher, params=None):
 
             except Exception as e:
                 st.error(f"Cypher Error: {e}")
+
+    export_panel(base, st.session_state[text_key] if cypher_enabled else None, params, fallback)
+
+def show_rows(placeholder, rows, streaming=False):
+    """(Re)draw a result table in placeholder, capped at ADHOC_MAX_ROWS."""
+    df = dataframe(rows, max_rows=ADHOC_MAX_ROWS)
+    with placeholder.container():
+        if streaming:
+            st.caption(f"⏳ {len(df):,} row(s) so far…")
+        elif df.attrs["truncated"]:
+            st.caption(f"✂️ Truncated: showing the first {ADHOC_MAX_ROWS:,} rows (ADHOC_MAX_ROWS).")
+        st.dataframe(df, use_container_width=True)
+
+def run_adhoc(cypher, params, allow_writes):
+    """
+    Run editor Cypher under the guardrails in db/cypher_guard.py and
+    render its table. Returns the rows shown ([] if it was refused).
+    """
+    kind = statement_type(strip_explain(cypher), params)
+    timeout = query_timeout("adhoc")
+
+    if kind != READ:
+        if not allow_writes:
+            st.error(
+                f"🔒 This is a {STATEMENT_TYPES.get(kind, kind)} statement. "
+                "Turn on **Allow writes** to run it."
+            )
+            return []
+        st.caption(f"✏️ {STATEMENT_TYPES.get(kind, kind)} statement · stops after {timeout:.0f}s")
+        try:
+            rows = run_query(cypher, params, name="adhoc", max_rows=ADHOC_MAX_ROWS)
+        except QueryTimeout as e:
+            rows = e.partial
+            st.warning(f"⏱ {e}. Showing the {len(rows)} row(s) received before it was stopped.")
+        show_rows(st.empty(), rows)
+        return rows[:ADHOC_MAX_ROWS]
+
+    # One row past the cap, so a cut result is shown as truncated.
+    cypher, injected = inject_limit(cypher, ADHOC_MAX_ROWS + 1)
+    note = f"read-only · stops after {timeout:.0f}s"
+    st.caption(note + (f" · `LIMIT {ADHOC_MAX_ROWS + 1}` added" if injected else ""))
+
+    # Redraw at 1, 2, 4, ... chunks: the first rows show at once and
+    # the total redraw work stays linear in the rows received.
+    placeholder = st.empty()
+    rows = []
+    next_draw = ADHOC_STREAM_CHUNK
+    stream = stream_query(cypher, params, name="adhoc", chunk_size=ADHOC_STREAM_CHUNK)
+    try:
+        for chunk in stream:
+            rows.extend(chunk)
+            if len(rows) > ADHOC_MAX_ROWS:
+                break
+            if len(rows) >= next_draw:
+                show_rows(placeholder, rows, streaming=True)
+                next_draw *= 2
+    except QueryTimeout as e:
+        rows.extend(e.partial)
+        st.warning(f"⏱ {e}. Showing the {len(rows)} row(s) received before it was stopped.")
+    finally:
+        stream.close()   # ends the session; the server discards what was not fetched
+    show_rows(placeholder, rows)
+    return rows[:ADHOC_MAX_ROWS]
+
+def _size(nbytes):
+    for unit in ("B", "KB", "MB"):
+        if nbytes < 1024:
+            return f"{nbytes:.0f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f} GB"
+
+def export_panel(base, cypher, params=None, fallback=None):
+    """
+    "Export full result" for a query panel: streams the whole result of
+    `cypher` (or `fallback()` rows without Neo4j) into a CSV / Parquet
+    file (db/export.py) and offers it for download. The last export of
+    each panel is kept in session state until the next one replaces it.
+    """
+    export_key = base + "_export"
+
+    with st.expander("⬇️ Export full result"):
+        c1, c2 = st.columns([2, 1])
+        fmt = c1.radio("Format", list(EXPORT_FORMATS), key=base + "_export_format", horizontal=True)
+
+        if c2.button("Export", key=base + "_export_run"):
+            previous = st.session_state.pop(export_key, None)
+            if previous:
+                remove_export(previous["path"])
+            try:
+                if cypher is not None:
+                    if statement_type(strip_explain(cypher), params) != READ:
+                        raise ExportError("only read statements can be exported")
+                    st.session_state[export_key] = export_query(cypher, params, fmt)
+                else:
+                    st.session_state[export_key] = export_rows(fallback() if fallback else [], fmt)
+            except QueryTimeout as e:
+                st.warning(f"⏱ Export stopped: {e}")
+            except ExportError as e:
+                st.error(f"Export failed: {e}")
+            except Exception as e:
+                st.error(f"Cypher Error: {e}")
+
+        result = st.session_state.get(export_key)
+        if result and os.path.exists(result["path"]):
+            st.caption(
+                f"{result['rows']:,} row(s) in {result['seconds']:.1f}s "
+                f"({result['rows_per_s']:,.0f} rows/s) · {result['format']} · {_size(result['bytes'])}"
+            )
+
+            def read(path=result["path"]):
+                with open(path, "rb") as f:
+                    return f.read()
+
+            st.download_button(
+                "Download", data=read, file_name=result["file_name"], mime=result["mime"],
+                key=base + "_export_download", on_click="ignore",
+            )
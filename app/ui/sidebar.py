@@ -1,6 +1,5 @@
 import streamlit as st
-from db.neo4j_client import run_query
-import bcrypt
+from services.auth_service import get_auth_service, AuthError, UserNotFound, InvalidPassword
 
 def render_sidebar():
     st.sidebar.title("Mode")
@@ -17,22 +16,18 @@ def render_sidebar():
         password = st.sidebar.text_input("Password", type="password")
 
         if st.sidebar.button("Login"):
-            rows = run_query("""
-                MATCH (u:User {username: $u})
-                RETURN u.userId AS id, u.username AS username, 
-                       u.passwordHash AS phash,
-                       u.name AS name, u.bio AS bio
-            """, {"u": username})
-
-            if not rows:
+            try:
+                with st.spinner("Logging in..."):
+                    data = get_auth_service().authenticate(username, password)
+            except UserNotFound:
                 st.sidebar.error("User not found.")
+            except InvalidPassword:
+                st.sidebar.error("Invalid password")
+            except AuthError as e:
+                st.sidebar.error(str(e))
             else:
-                data = rows[0].data()
-                if bcrypt.checkpw(password.encode(), data["phash"].encode()):
-                    st.session_state.logged_in_user = data
-                    st.sidebar.success("Logged in")
-                else:
-                    st.sidebar.error("Invalid password")
+                st.session_state.logged_in_user = data
+                st.sidebar.success("Logged in")
 
         if st.sidebar.button("Logout"):
             st.session_state.logged_in_user = None
@@ -1,7 +1,15 @@
+import time
 import streamlit as st
-from db.neo4j_client import run_query
-from graph.graph_render import graph_from_rows, mutual_graph, recommendation_graph
-from ui.components import dataframe
+from db.repository import get_repository
+from db.queries import load_profile, following
+from db.follows import follow, unfollow, follow_all, apply_pending_follows, apply_pending_following
+from db.following_set import following_set, record_own_write
+from db.loader import user_loader
+from graph.graph_render import graph_from_rows, mutual_graph, recommendation_graph, path_graph
+from graph.paths import shortest_path, PATH_MAX_DEPTH
+from ui.components import dataframe, user_options, lazy_tabs, optional_panel, PATH_STATUS
+from db.query_scope import QueryTimeout
+from services.feed_service import get_feed_service
 
 
 def render_user_view(user):
@@ -9,91 +17,94 @@ def render_user_view(user):
     Render the user view with profile and social graph features.
     Includes Jakob's UC-5 through UC-9 implementations.
     """
+    # Header, counts, first pages and following ids come from one
+    # cached round trip; the tabs below reuse the same bundle.
+    try:
+        profile = load_profile(user["id"])
+    except QueryTimeout:
+        st.error("Your profile is taking too long to load. Please try again in a moment.")
+        return
+    if profile is None:
+        st.error("This account no longer exists.")
+        return
+    loader = user_loader()
+    loader.prime(profile["followerPage"] + profile["followingPage"])
+    profile = apply_pending_follows(profile, loader)
+
     # Profile Header
-    st.header(f"👤 {user['username']}")
+    st.header(f"👤 {profile['username']}")
 
     col1, col2 = st.columns([2, 1])
 
     with col1:
-        st.write(f"**Name:** {user['name']}")
-        st.write(f"**Bio:** {user['bio']}")
+        st.write(f"**Name:** {profile['name']}")
+        st.write(f"**Bio:** {profile['bio']}")
 
     with col2:
-        counts = run_query("""
-            MATCH (u:User {userId: $id})
-            RETURN
-                SIZE([(u)-[:FOLLOWS]->(t) | t]) AS following,
-                SIZE([(f)-[:FOLLOWS]->(u) | f]) AS followers
-        """, {"id": user["id"]})[0].data()
-
-        st.metric("Followers", counts['followers'])
-        st.metric("Following", counts['following'])
+        st.metric("Followers", profile['followerCount'])
+        st.metric("Following", profile['followingCount'])
 
     st.divider()
 
-    # Tabs for all features
-    tabs = st.tabs([
-        "👥 My Connections",
-        "➕ Follow Users",
-        "➖ Unfollow",
-        "🤝 Mutual Friends",
-        "💡 Recommendations"
-    ])
-
-    # Tab 0: My Connections (UC-7)
-    with tabs[0]:
-        render_my_connections(user)
+    # Tabs for all features. Only the selected tab runs, so its
+    # queries are the only ones issued on a rerun.
+    tabs = {
+        "👥 My Connections": render_my_connections,   # UC-7
+        "➕ Follow Users": render_follow_user,         # UC-5
+        "➖ Unfollow": render_unfollow_user,           # UC-6
+        "🤝 Mutual Friends": render_mutual_friends,    # UC-8
+        "💡 Recommendations": render_recommendations,  # UC-9
+        "🧭 How Am I Connected?": render_connection_path,  # UC-12
+        "📰 Activity": render_activity,
+    }
 
-    # Tab 1: Follow Users (UC-5)
-    with tabs[1]:
-        render_follow_user(user)
+    selected = lazy_tabs(list(tabs), key="user_view_tab")
+    tabs[selected](user, profile)
 
-    # Tab 2: Unfollow (UC-6)
-    with tabs[2]:
-        render_unfollow_user(user)
 
-    # Tab 3: Mutual Friends (UC-8)
-    with tabs[3]:
-        render_mutual_friends(user)
-
-    # Tab 4: Recommendations (UC-9)
-    with tabs[4]:
-        render_recommendations(user)
+def _full_following(user, profile):
+    """
+    The profile bundle already holds the whole list unless it was paged;
+    a fetched list gets the same pending write-behind overlay.
+    """
+    if profile["followingCount"] <= len(profile["followingPage"]):
+        return profile["followingPage"]
+    return apply_pending_following(user["id"], following(user["id"]), user_loader())
 
 
 # ==============================================================================
 # UC-7: My Connections
 # ==============================================================================
-def render_my_connections(user):
+def render_my_connections(user, profile):
     st.subheader("My Connections")
 
-    sub_tabs = st.tabs(["👥 Followers", "➡️ Following"])
+    selected = lazy_tabs(["👥 Followers", "➡️ Following"], key="my_connections_tab")
 
-    with sub_tabs[0]:
+    if selected == "👥 Followers":
         st.write("**People who follow you:**")
-        rows = run_query("""
-            MATCH (u:User {userId: $id})<-[:FOLLOWS]-(f)
-            RETURN f.userId AS id, f.username AS username, f.name AS name, f.bio AS bio
-            ORDER BY f.username LIMIT 100
-        """, {"id": user["id"]})
+        rows = profile["followerPage"]
 
         df = dataframe(rows)
         if df.empty:
             st.info("No followers yet.")
         else:
+            if profile.get("followerPreview") == "sample":
+                st.caption(f"A sample of {len(rows)} of your {profile['followerCount']} followers.")
+                with optional_panel("Top followers") as ok:
+                    if ok:
+                        st.write("**Your most-followed followers:**")
+                        st.dataframe(dataframe(get_repository().top_followers(user["id"])), use_container_width=True)
             st.dataframe(df, use_container_width=True)
             if st.checkbox("Show Graph", key="my_followers_graph"):
-                path = graph_from_rows(rows)
-                with open(path) as f:
-                    st.components.v1.html(f.read(), height=500)
+                with optional_panel("Graph") as ok:
+                    if ok:
+                        path = graph_from_rows(rows)
+                        with open(path) as f:
+                            st.components.v1.html(f.read(), height=500)
 
-    with sub_tabs[1]:
+    else:
         st.write("**People you follow:**")
-        rows = run_query("""
-            MATCH (u:User {userId: $id})-[:FOLLOWS]->(t)
-            RETURN t.userId AS id, t.username AS username, t.name AS name, t.bio AS bio
-            ORDER BY t.username LIMIT 100
-        """, {"id": user["id"]})
+        rows = profile["followingPage"]
 
         df = dataframe(rows)
         if df.empty:
@@ -101,38 +112,34 @@ def render_my_connections(user):
         else:
             st.dataframe(df, use_container_width=True)
             if st.checkbox("Show Graph", key="my_following_graph"):
-                path = graph_from_rows(rows)
-                with open(path) as f:
-                    st.components.v1.html(f.read(), height=500)
+                with optional_panel("Graph") as ok:
+                    if ok:
+                        path = graph_from_rows(rows)
+                        with open(path) as f:
+                            st.components.v1.html(f.read(), height=500)
 
 
 # ==============================================================================
 # UC-5: Follow Users
 # ==============================================================================
-def render_follow_user(user):
+def render_follow_user(user, profile):
     st.subheader("Follow a User")
     st.write("Search for users to follow.")
 
     search = st.text_input("Search by username or name", key="follow_search")
 
     if search:
-        results = run_query("""
-            MATCH (target:User)
-            WHERE (toLower(target.username) CONTAINS toLower($q)
-               OR toLower(target.name) CONTAINS toLower($q))
-              AND target.userId <> $myId
-              AND NOT EXISTS { MATCH (me:User {userId: $myId})-[:FOLLOWS]->(target) }
-            RETURN target.userId AS id, target.username AS username,
-                   target.name AS name, target.bio AS bio
-            ORDER BY target.username LIMIT 20
-        """, {"q": search, "myId": user["id"]})
+        try:
+            results = get_repository().search(search, 0, 20, exclude=following_set(profile))
+        except QueryTimeout:
+            st.warning("⏱ Search took too long. Try a longer search term.")
+            return
 
         if not results:
             st.info("No users found matching your search (or you already follow them).")
         else:
             st.write(f"**Found {len(results)} user(s):**")
-            for r in results:
-                data = r.data()
+            for data in results:
                 col1, col2 = st.columns([3, 1])
                 with col1:
                     st.write(f"**{data['username']}** - {data['name']}")
@@ -140,10 +147,8 @@ def render_follow_user(user):
                         st.caption(data['bio'][:100])
                 with col2:
                     if st.button("Follow", key=f"follow_{data['id']}"):
-                        run_query("""
-                            MATCH (me:User {userId: $myId}), (target:User {userId: $tid})
-                            MERGE (me)-[:FOLLOWS]->(target)
-                        """, {"myId": user["id"], "tid": data["id"]})
+                        follow(user["id"], data["id"])
+                        record_own_write(user["id"], "follow", [data["id"]])
                         st.success(f"✅ Now following {data['username']}!")
                         st.rerun()
     else:
@@ -153,20 +158,15 @@ def render_follow_user(user):
 # ==============================================================================
 # UC-6: Unfollow Users
 # ==============================================================================
-def render_unfollow_user(user):
+def render_unfollow_user(user, profile):
     st.subheader("Unfollow a User")
 
-    following = run_query("""
-        MATCH (u:User {userId: $id})-[:FOLLOWS]->(t)
-        RETURN t.userId AS id, t.username AS username, t.name AS name
-        ORDER BY t.username
-    """, {"id": user["id"]})
+    my_following = _full_following(user, profile)
 
-    if not following:
+    if not my_following:
         st.info("You're not following anyone.")
     else:
-        options = [f"{r.data()['username']} ({r.data()['id']})" for r in following]
-        opt_map = {f"{r.data()['username']} ({r.data()['id']})": r.data() for r in following}
+        options, opt_map = user_options(my_following)
 
         selected = st.selectbox("Select user to unfollow", options, key="unfollow_select")
 
@@ -176,10 +176,8 @@ def render_unfollow_user(user):
             st.write(f"**Name:** {target['name']}")
 
             if st.button("🚫 Unfollow", key="confirm_unfollow"):
-                run_query("""
-                    MATCH (me:User {userId: $myId})-[r:FOLLOWS]->(t:User {userId: $tid})
-                    DELETE r
-                """, {"myId": user["id"], "tid": target["id"]})
+                unfollow(user["id"], target["id"])
+                record_own_write(user["id"], "unfollow", [target["id"]])
                 st.success(f"✅ Unfollowed {target['username']}")
                 st.rerun()
 
@@ -187,34 +185,28 @@ def render_unfollow_user(user):
 # ==============================================================================
 # UC-8: Mutual Friends
 # ==============================================================================
-def render_mutual_friends(user):
+def render_mutual_friends(user, profile):
     st.subheader("Mutual Friends")
     st.write("Find users that you and another person both follow.")
 
-    following = run_query("""
-        MATCH (u:User {userId: $id})-[:FOLLOWS]->(t)
-        RETURN t.userId AS id, t.username AS username
-        ORDER BY t.username
-    """, {"id": user["id"]})
+    my_following = _full_following(user, profile)
 
-    if not following:
+    if not my_following:
         st.info("Follow some users first to find mutual connections.")
         return
 
-    options = [f"{r.data()['username']} ({r.data()['id']})" for r in following]
-    opt_map = {f"{r.data()['username']} ({r.data()['id']})": r.data() for r in following}
+    options, opt_map = user_options(my_following)
 
     selected = st.selectbox("Select a friend to compare with", options, key="mutual_select")
 
     if selected and st.button("Find Mutual Friends", key="find_mutual"):
         other = opt_map[selected]
 
-        rows = run_query("""
-            MATCH (me:User {userId: $myId})-[:FOLLOWS]->(mutual:User)<-[:FOLLOWS]-(other:User {userId: $otherId})
-            RETURN DISTINCT mutual.userId AS id, mutual.username AS username,
-                   mutual.name AS name, mutual.bio AS bio
-            ORDER BY mutual.username LIMIT 50
-        """, {"myId": user["id"], "otherId": other["id"]})
+        try:
+            rows = get_repository().mutual(user["id"], other["id"], 0, 50)
+        except QueryTimeout:
+            st.warning("⏱ Finding mutual friends took too long. Please try again.")
+            return
 
         df = dataframe(rows)
         st.write(f"**{len(df)} mutual connection(s) with {other['username']}**")
@@ -225,33 +217,39 @@ def render_mutual_friends(user):
             tab1, tab2 = st.tabs(["📊 List", "🔗 Graph"])
             with tab1:
                 st.dataframe(df, use_container_width=True)
-            with tab2:
-                me_data = {"id": user["id"], "username": user["username"]}
-                path = mutual_graph(rows, me_data, other)
-                with open(path) as f:
-                    st.components.v1.html(f.read(), height=500)
-                st.caption("🔴 You | 🟢 Friend | 🔵 Mutual Connections")
+            with tab2, optional_panel("Graph") as ok:
+                if ok:
+                    me_data = {"id": user["id"], "username": user["username"]}
+                    path = mutual_graph(rows, me_data, other)
+                    with open(path) as f:
+                        st.components.v1.html(f.read(), height=500)
+                    st.caption("🔴 You | 🟢 Friend | 🔵 Mutual Connections")
 
 
 # ==============================================================================
 # UC-9: Recommendations
 # ==============================================================================
-def render_recommendations(user):
+def render_recommendations(user, profile):
     st.subheader("Friend Recommendations")
     st.write("People you might want to follow based on mutual connections.")
 
     limit = st.slider("Number of recommendations", 5, 30, 10, key="rec_limit")
 
+    # Results are kept in session state so the Follow buttons below
+    # still see them on the rerun their click triggers.
+    recs_key = f"recs_{user['id']}"
+    following = following_set(profile)
+
     if st.button("🔍 Get Recommendations", key="get_recs"):
-        rows = run_query("""
-            MATCH (me:User {userId: $myId})-[:FOLLOWS]->(friend)-[:FOLLOWS]->(rec)
-            WHERE NOT (me)-[:FOLLOWS]->(rec) AND me <> rec
-            WITH rec, count(DISTINCT friend) AS mutualCount
-            RETURN rec.userId AS id, rec.username AS username,
-                   rec.name AS name, rec.bio AS bio, mutualCount
-            ORDER BY mutualCount DESC LIMIT $limit
-        """, {"myId": user["id"], "limit": limit})
+        with optional_panel("Recommendations") as ok:
+            if ok:
+                st.session_state[recs_key] = get_repository().recommendations(user["id"], limit, exclude=following)
 
+    rows = st.session_state.get(recs_key)
+
+    if rows is not None:
+        # Drop anyone followed since the list was fetched.
+        rows = following.filter(rows)
         df = dataframe(rows)
 
         if df.empty:
@@ -259,11 +257,18 @@ def render_recommendations(user):
         else:
             st.write(f"**Found {len(df)} recommendation(s):**")
 
+            if st.button(f"➕ Follow all {len(rows)}", key="follow_all_recs"):
+                results = follow_all(user["id"], [r["id"] for r in rows])
+                record_own_write(user["id"], "follow", [r["id"] for r in rows])
+                created = sum(r["outcome"] == "created" for r in results)
+                st.session_state[recs_key] = None
+                st.success(f"✅ Now following {created} more user(s)!")
+                st.rerun()
+
             tab1, tab2 = st.tabs(["📊 List", "🔗 Graph"])
 
             with tab1:
-                for r in rows:
-                    data = r.data()
+                for data in rows:
                     col1, col2 = st.columns([3, 1])
                     with col1:
                         st.write(f"**{data['username']}** ({data['mutualCount']} mutual)")
@@ -271,16 +276,97 @@ def render_recommendations(user):
                             st.caption(data['name'])
                     with col2:
                         if st.button("Follow", key=f"rec_{data['id']}"):
-                            run_query("""
-                                MATCH (me:User {userId: $myId}), (t:User {userId: $tid})
-                                MERGE (me)-[:FOLLOWS]->(t)
-                            """, {"myId": user["id"], "tid": data["id"]})
+                            follow(user["id"], data["id"])
+                            record_own_write(user["id"], "follow", [data["id"]])
                             st.success(f"✅ Following {data['username']}!")
                             st.rerun()
 
-            with tab2:
-                me_data = {"id": user["id"], "username": user["username"]}
-                path = recommendation_graph(rows, me_data)
+            with tab2, optional_panel("Graph") as ok:
+                if ok:
+                    me_data = {"id": user["id"], "username": user["username"]}
+                    path = recommendation_graph(rows, me_data)
+                    with open(path) as f:
+                        st.components.v1.html(f.read(), height=500)
+                    st.caption("🔴 You | 🟡 Recommended (size = mutual count)")
+
+
+# ==============================================================================
+# UC-12: Degrees of Separation
+# ==============================================================================
+def render_connection_path(user, profile):
+    st.subheader("How Am I Connected?")
+    st.write("Find the shortest chain of people you follow that leads to someone else.")
+
+    search = st.text_input("Search by username or name", key="path_search")
+
+    if not search:
+        st.info("Enter a search term above to pick a user.")
+        return
+
+    try:
+        results = get_repository().search(search, 0, 20, exclude={user["id"]})
+    except QueryTimeout:
+        st.warning("⏱ Search took too long. Try a longer search term.")
+        return
+
+    if not results:
+        st.info("No users found matching your search.")
+        return
+
+    options, opt_map = user_options(results)
+    selected = st.selectbox("Connect to", options, key="path_target")
+
+    if selected and st.button("Find Connection", key="find_path"):
+        other = opt_map[selected]
+
+        try:
+            result = shortest_path(user["id"], other["id"])
+        except QueryTimeout:
+            st.warning("⏱ Finding a connection took too long. Please try again.")
+            return
+
+        if result["path"] is None:
+            message = PATH_STATUS[result["status"]].format(depth=PATH_MAX_DEPTH, expanded=result["expanded"])
+            if result["status"] == "no_path":
+                st.info(message)
+            else:
+                st.warning(message)
+            return
+
+        users = user_loader().load_many(result["path"])
+        hops = len(users) - 1
+        st.success(f"**{other['username']}** is {hops} hop(s) away")
+        st.write(" → ".join(u["username"] for u in users))
+
+        with optional_panel("Graph") as ok:
+            if ok:
+                path = path_graph(users)
                 with open(path) as f:
-                    st.components.v1.html(f.read(), height=500)
-                st.caption("🔴 You | 🟡 Recommended (size = mutual count)")
\ No newline at end of file
+                    st.components.v1.html(f.read(), height=400)
+                st.caption("🔴 You | 🔵 Via | 🟢 Them")
+
+
+# ==============================================================================
+# Activity feed
+# ==============================================================================
+def render_activity(user, profile):
+    st.subheader("Activity")
+    st.write("Who the people you follow started following recently.")
+
+    events = get_feed_service().page(user["id"], profile["followingIds"])
+    if not events:
+        st.info("No recent activity from the people you follow.")
+        return
+
+    loader = user_loader()
+    users = {u["id"]: u for u in loader.load_many({e[k] for e in events for k in ("actorId", "targetId")})}
+    rows = []
+    for e in events:
+        actor, target = users.get(e["actorId"]), users.get(e["targetId"])
+        if actor and target:
+            rows.append({
+                "when": time.strftime("%Y-%m-%d %H:%M", time.localtime(e["at"])),
+                "user": actor["username"],
+                "followed": target["username"],
+            })
+    st.dataframe(dataframe(rows), use_container_width=True)
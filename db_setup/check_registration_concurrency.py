@@ -0,0 +1,82 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# One sequence reservation per sign-up, so every registration races
+# the others for the Sequence node instead of drawing from a block.
+os.environ.setdefault("USER_ID_BLOCK", "1")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from db.repository import get_repository, GRAPH_BACKEND   # noqa: E402
+from db.neo4j_client import run_query                      # noqa: E402
+from db.users import register_user, DuplicateUserError     # noqa: E402
+
+WORKERS = 16
+ATTEMPTS = 64
+PREFIX = "ConcurrencyCheck"
+
+# ============================================================
+# Concurrency check for registration
+# ============================================================
+# Fires parallel sign-ups through the app's own registration path
+# (db.users.register_user -> repository.create_user, with ids from
+# db/id_allocator.py) that all race for the same 4 usernames and 4
+# emails. Passes if every sign-up either created a user or was turned
+# away as a duplicate, and the stored accounts have distinct usernames,
+# emails and userIds, one per successful sign-up.
+# Run after ingest_graph.py (or migrate_db.py); uses the app's
+# GRAPH_BACKEND and connection settings. Cleans up after itself.
+
+
+class RegistrationConcurrencyCheck:
+
+    def register(self, i):
+        # 4 usernames and 4 emails, crossed so that both constraints race
+        try:
+            return register_user(
+                f"{PREFIX}{i % 4}",
+                f"{PREFIX.lower()}{(i // 4) % 4}@example.com",
+                "Concurrency Check",
+                "",
+                "",
+            )
+        except DuplicateUserError:
+            return None
+
+    def run(self):
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            outcomes = list(pool.map(self.register, range(ATTEMPTS)))
+        created = [u for u in outcomes if u is not None]
+        print(f"[INFO] created={len(created)} rejected={outcomes.count(None)}")
+
+        repository = get_repository()
+        found = repository.search(PREFIX, 0, ATTEMPTS * 2)
+        stored = repository.get_users([u["id"] for u in found])
+        ids = {u["id"] for u in stored}
+        usernames = {u["username"] for u in stored}
+        emails = {u["email"] for u in stored}
+        print(f"[INFO] users={len(stored)} usernames={len(usernames)} emails={len(emails)} ids={len(ids)}")
+
+        ok = (
+            0 < len(created) <= 4
+            and len(stored) == len(usernames) == len(emails) == len(ids) == len(created)
+            and ids == {u["id"] for u in created}
+        )
+        print("[OK] No duplicates under parallel sign-ups." if ok else "[FAIL] Duplicates detected!")
+        return ok
+
+    def cleanup(self):
+        if GRAPH_BACKEND != "neo4j":
+            return
+        run_query("MATCH (u:User) WHERE u.username STARTS WITH $prefix DETACH DELETE u",
+                  {"prefix": PREFIX}, name="register")
+        print("[OK] Test users removed.")
+
+
+if __name__ == "__main__":
+    check = RegistrationConcurrencyCheck()
+    try:
+        passed = check.run()
+    finally:
+        check.cleanup()
+    raise SystemExit(0 if passed else 1)
@@ -0,0 +1,223 @@
+import argparse
+import os
+import sys
+import time
+from neo4j import GraphDatabase
+from ingest_graph import (
+    GraphIngestor, read_graph_csv, NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, DB_NAME, USERS_CSV, FOLLOWS_CSV,
+)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from db.snapshot import Snapshot, SnapshotError, verify_snapshot, write_snapshot   # noqa: E402
+
+# ============================================================
+# Graph snapshot / restore
+# ============================================================
+# Resetting an environment with generate_users.py, generate_graph.py
+# and ingest_graph.py spends most of its time in ingestion (MERGE per
+# row, small batches). A snapshot (app/db/snapshot.py: NumPy arrays, a
+# string table and a sha256 manifest) restores much faster:
+#
+#   python graph_snapshot.py save snapshots/base                  from users.csv / follows.csv
+#   python graph_snapshot.py save snapshots/base --source neo4j   from the live database
+#   python graph_snapshot.py verify snapshots/base
+#   python graph_snapshot.py restore snapshots/base               into Neo4j (wipes it first)
+#   python graph_snapshot.py restore snapshots/base --target memory
+#
+# The Neo4j restore creates users and edges with CREATE instead of
+# MERGE (the database was just wiped and snapshot rows are unique), in
+# large UNWIND batches, one follower with all its targets per row.
+# "--target memory" loads the snapshot into MemoryGraphStore to check
+# it; the app itself reads a snapshot with GRAPH_SNAPSHOT=<dir>.
+#
+# userIds are zero-padded strings ("0001") everywhere: read from the
+# CSVs the way ingest_graph.py reads them, padded when saved from a
+# database ingested before ids were strings, and restored as strings,
+# so a restored database has the same schema as an ingested one.
+
+USER_BATCH = 5000
+EDGE_BATCH = 20000   # edges per transaction, whole followers at a time
+
+USERS_QUERY = """
+MATCH (u:User)
+RETURN u.userId AS id, u.username AS username, u.email AS email, u.name AS name,
+       u.bio AS bio, u.passwordHash AS passwordHash, u.community AS community
+ORDER BY u.userId;
+"""
+
+EDGES_QUERY = """
+MATCH (f:User)-[:FOLLOWS]->(t:User)
+RETURN f.userId AS followerId, t.userId AS followeeId;
+"""
+
+CREATE_USERS_QUERY = """
+UNWIND $rows AS row
+CREATE (u:User {
+    userId: row.id,
+    username: row.username,
+    email: row.email,
+    name: row.name,
+    bio: row.bio,
+    passwordHash: row.passwordHash
+})
+SET u.community = row.community;
+"""
+
+CREATE_EDGES_QUERY = """
+UNWIND $rows AS row
+MATCH (f:User {userId: row.followerId})
+UNWIND row.targetIds AS targetId
+MATCH (t:User {userId: targetId})
+CREATE (f)-[:FOLLOWS]->(t);
+"""
+
+
+def _user_id(value):
+    """Zero-padded string userId, like ingest_graph.read_graph_csv."""
+    return str(value).zfill(4)
+
+
+# ============================================================
+# Save
+# ============================================================
+def users_and_edges_from_csv(users_csv=USERS_CSV, follows_csv=FOLLOWS_CSV):
+    users_df = read_graph_csv(users_csv).fillna("")
+    follows_df = read_graph_csv(follows_csv)
+    users = [
+        {
+            "id": r["userId"],
+            "username": r["username"],
+            "email": r["email"],
+            "name": r["name"],
+            "bio": r["bio"],
+            "passwordHash": r["passwordHash"],
+        }
+        for r in users_df.to_dict("records")
+    ]
+    return users, list(zip(follows_df["followerId"], follows_df["followeeId"]))
+
+
+def users_and_edges_from_neo4j(driver, db):
+    with driver.session(database=db) as session:
+        users = [r.data() for r in session.run(USERS_QUERY)]
+        pairs = [(_user_id(r["followerId"]), _user_id(r["followeeId"])) for r in session.run(EDGES_QUERY)]
+    for user in users:
+        user["id"] = _user_id(user["id"])
+        for key in ("bio", "name", "passwordHash"):
+            user[key] = user[key] or ""
+    return users, pairs
+
+
+def save(path, source):
+    started = time.monotonic()
+    if source == "neo4j":
+        driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+        try:
+            users, pairs = users_and_edges_from_neo4j(driver, DB_NAME)
+        finally:
+            driver.close()
+    else:
+        users, pairs = users_and_edges_from_csv()
+    print(f"[INFO] Read {len(users)} users / {len(pairs)} edges from {source} "
+          f"in {time.monotonic() - started:.2f}s")
+
+    row = {u["id"]: i for i, u in enumerate(users)}
+    missing = sum(1 for f, t in pairs if f not in row or t not in row)
+    if missing:
+        print(f"[WARN] Skipping {missing} edge(s) whose users are not in the snapshot")
+    edges = [(row[f], row[t]) for f, t in pairs if f in row and t in row]
+    write_snapshot(path, users, [f for f, _ in edges], [t for _, t in edges])
+    print(f"[DONE] Snapshot saved to {path} in {time.monotonic() - started:.2f}s")
+
+
+# ============================================================
+# Restore
+# ============================================================
+def restore_neo4j(snapshot):
+    started = time.monotonic()
+    users = snapshot.users()
+    ids = [u["id"] for u in users]
+    loader = GraphIngestor(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, DB_NAME)
+    try:
+        if loader.database_has_data():
+            print("[WARN] Database is not empty. Cleaning up...")
+            loader.wipe_database()
+        loader.create_constraints()
+
+        rows = [dict(u, community=u.get("community")) for u in users]
+        with loader.driver.session(database=loader.db) as session:
+            for i in range(0, len(rows), USER_BATCH):
+                session.execute_write(lambda tx, batch: tx.run(CREATE_USERS_QUERY, rows=batch).consume(),
+                                      rows[i:i + USER_BATCH])
+            print(f"[INFO] Created {len(rows)} users")
+
+            batch, size, created = [], 0, 0
+            for follower, targets in enumerate(snapshot.following()):
+                if not targets:
+                    continue
+                batch.append({"followerId": ids[follower], "targetIds": [ids[t] for t in targets]})
+                size += len(targets)
+                if size >= EDGE_BATCH:
+                    session.execute_write(lambda tx, b: tx.run(CREATE_EDGES_QUERY, rows=b).consume(), batch)
+                    created += size
+                    print(f"[INFO] Created {created} edges")
+                    batch, size = [], 0
+            if batch:
+                session.execute_write(lambda tx, b: tx.run(CREATE_EDGES_QUERY, rows=b).consume(), batch)
+                created += size
+            print(f"[INFO] Created {created} edges")
+
+        loader.seed_sequences()
+    finally:
+        loader.close()
+    print(f"[DONE] Restored {len(users)} users / {snapshot.manifest['edges']} edges into Neo4j "
+          f"in {time.monotonic() - started:.2f}s")
+
+
+def restore_memory(snapshot):
+    from db.memory_store import MemoryGraphStore
+
+    started = time.monotonic()
+    store = MemoryGraphStore.from_snapshot(snapshot)   # already verified by Snapshot()
+    edges = sum(len(ids) for ids in store._following.values())
+    print(f"[DONE] Restored {len(store._users)} users / {edges} edges into memory "
+          f"in {time.monotonic() - started:.2f}s; run the app with GRAPH_SNAPSHOT={snapshot.path}")
+
+
+# ============================================================
+# Main Executable
+# ============================================================
+def main():
+    parser = argparse.ArgumentParser(description="Save or restore a binary snapshot of the social graph.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    save_cmd = commands.add_parser("save", help="write a snapshot")
+    save_cmd.add_argument("path")
+    save_cmd.add_argument("--source", choices=["csv", "neo4j"], default="csv")
+    verify_cmd = commands.add_parser("verify", help="check a snapshot against its manifest")
+    verify_cmd.add_argument("path")
+    restore_cmd = commands.add_parser("restore", help="load a snapshot")
+    restore_cmd.add_argument("path")
+    restore_cmd.add_argument("--target", choices=["neo4j", "memory"], default="neo4j")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "save":
+            save(args.path, args.source)
+        elif args.command == "verify":
+            manifest = verify_snapshot(args.path)
+            print(f"[OK] {args.path}: {manifest['users']} users, {manifest['edges']} edges, "
+                  f"{len(manifest['files'])} files match their checksums")
+        else:
+            snapshot = Snapshot(args.path)
+            if args.target == "memory":
+                restore_memory(snapshot)
+            else:
+                restore_neo4j(snapshot)
+    except SnapshotError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
+import os
+import sys
 import pandas as pd
 from neo4j import GraphDatabase
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from db.id_allocator import SEED_USER_ID_QUERY   # noqa: E402
+
 # ============================================================
 # Neo4j Config
 # ============================================================
@@ -11,6 +17,25 @@ DB_NAME = "socialnetworkdb"
 
 USERS_CSV = "users.csv"
 FOLLOWS_CSV = "follows.csv"
+ID_COLUMNS = ("userId", "followerId", "followeeId")
+
+
+# ============================================================
+# CSV input
+# ============================================================
+def read_graph_csv(path):
+    """
+    users.csv / follows.csv with the id columns as zero-padded strings
+    ("0001"), the form the app, the API and registration use. pandas
+    would read them as integers, and follows.csv (generate_graph.py)
+    writes them unpadded.
+    """
+    df = pd.read_csv(path, dtype={c: str for c in ID_COLUMNS})
+    for column in ID_COLUMNS:
+        if column in df:
+            df[column] = df[column].str.zfill(4)
+    return df
+
 
 # ============================================================
 # Ingestion Class
@@ -59,6 +84,21 @@ class GraphIngestor:
             CREATE CONSTRAINT username_unique IF NOT EXISTS
             FOR (u:User)
             REQUIRE u.username IS UNIQUE;
+            """,
+            """
+            CREATE CONSTRAINT user_email_unique IF NOT EXISTS
+            FOR (u:User)
+            REQUIRE u.email IS UNIQUE;
+            """,
+            """
+            CREATE CONSTRAINT sequence_name_unique IF NOT EXISTS
+            FOR (s:Sequence)
+            REQUIRE s.name IS UNIQUE;
+            """,
+            """
+            CREATE INDEX user_community IF NOT EXISTS
+            FOR (u:User)
+            ON (u.community);
             """
         ]
 
@@ -95,6 +135,14 @@ class GraphIngestor:
         """
         tx.run(query, rows=rows)
 
+    # ---------------------------------------------------------
+    # Seed the userId sequence used for new registrations
+    # ---------------------------------------------------------
+    def seed_sequences(self):
+        with self.driver.session(database=self.db) as session:
+            value = session.run(SEED_USER_ID_QUERY).single()["value"]
+        print(f"[OK] userId sequence seeded at {value}.")
+
     # ---------------------------------------------------------
     # Load edges into Neo4j
     # ---------------------------------------------------------
@@ -124,8 +172,8 @@ class GraphIngestor:
 # ============================================================
 def main():
 
-    users_df = pd.read_csv(USERS_CSV)
-    follows_df = pd.read_csv(FOLLOWS_CSV)
+    users_df = read_graph_csv(USERS_CSV)
+    follows_df = read_graph_csv(FOLLOWS_CSV)
 
     loader = GraphIngestor(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, DB_NAME)
 
@@ -139,6 +187,7 @@ def main():
     loader.create_constraints()
     loader.load_users(users_df)
     loader.load_follows(follows_df)
+    loader.seed_sequences()
 
     loader.close()
     print("[DONE] All data ingested successfully. Fresh database ready!")
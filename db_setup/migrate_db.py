@@ -0,0 +1,104 @@
+import os
+import sys
+from neo4j import GraphDatabase
+from neo4j.exceptions import ClientError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from db.id_allocator import SEED_USER_ID_QUERY   # noqa: E402
+
+NEO4J_URI = "neo4j://127.0.0.1:7687"
+NEO4J_USER = "neo4j"
+NEO4J_PASSWORD = "neo4juser"     # change this
+DB_NAME = "socialnetworkdb"
+
+# ============================================================
+# Migration for databases ingested by an older ingest_graph.py
+# ============================================================
+# - email uniqueness constraint (registration and profile edits rely
+#   on it instead of looking the email up first)
+# - userId sequence used for new registrations
+# - index on User.community (app/graph/communities.py)
+# - userIds as zero-padded strings ("0001"): older ingests stored the
+#   CSV ids as integers, which the app's string ids never match
+#
+# Safe to re-run: constraints use IF NOT EXISTS and the sequence
+# counter only ever moves forward.
+
+class DBMigration:
+    def __init__(self, uri, user, password, db):
+        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.db = db
+
+    def close(self):
+        self.driver.close()
+
+    def create_constraints(self):
+        constraints = [
+            """
+            CREATE CONSTRAINT user_email_unique IF NOT EXISTS
+            FOR (u:User)
+            REQUIRE u.email IS UNIQUE;
+            """,
+            """
+            CREATE CONSTRAINT sequence_name_unique IF NOT EXISTS
+            FOR (s:Sequence)
+            REQUIRE s.name IS UNIQUE;
+            """,
+            """
+            CREATE INDEX user_community IF NOT EXISTS
+            FOR (u:User)
+            ON (u.community);
+            """
+        ]
+
+        with self.driver.session(database=self.db) as session:
+            for q in constraints:
+                try:
+                    session.run(q)
+                except ClientError as e:
+                    print(f"[ERROR] {e.message}")
+                    self.report_duplicate_emails()
+                    raise
+        print("[OK] Constraints ready.")
+
+    def report_duplicate_emails(self):
+        query = """
+        MATCH (u:User)
+        WITH u.email AS email, collect(u.userId) AS ids
+        WHERE size(ids) > 1
+        RETURN email, ids
+        LIMIT 20;
+        """
+        with self.driver.session(database=self.db) as session:
+            for r in session.run(query):
+                print(f"[WARN] Duplicate email {r['email']}: users {r['ids']}")
+
+    def normalise_user_ids(self):
+        query = """
+        MATCH (u:User)
+        WHERE u.userId IS :: INTEGER NOT NULL
+        CALL {
+            WITH u
+            SET u.userId = CASE
+                WHEN u.userId < 10000 THEN right('000' + toString(u.userId), 4)
+                ELSE toString(u.userId)
+            END
+        } IN TRANSACTIONS OF 1000 ROWS
+        RETURN count(u) AS converted;
+        """
+        with self.driver.session(database=self.db) as session:
+            converted = session.run(query).single()["converted"]
+        print(f"[OK] {converted} integer userId(s) converted to strings.")
+
+    def seed_user_ids(self):
+        with self.driver.session(database=self.db) as session:
+            value = session.run(SEED_USER_ID_QUERY).single()["value"]
+        print(f"[OK] userId sequence at {value}. Next registration gets {value + 1:04d}.")
+
+if __name__ == "__main__":
+    migration = DBMigration(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, DB_NAME)
+    migration.create_constraints()
+    migration.normalise_user_ids()
+    migration.seed_user_ids()
+    migration.close()
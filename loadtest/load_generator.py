@@ -0,0 +1,247 @@
+import argparse
+import asyncio
+import csv
+import json
+import random
+import time
+from collections import defaultdict
+
+import aiohttp
+
+# ============================================================
+# Session-based load generator
+# ============================================================
+# Drives the HTTP API (app/api/server.py) with virtual users that
+# replay realistic sessions:
+#
+#   login -> view profile -> browse followers/following -> search
+#         -> recommendations -> maybe follow / unfollow -> mutual
+#
+# Which account a virtual user logs in as (and which accounts they look
+# at) is drawn from a Zipfian popularity distribution over the users in
+# db_setup/users.csv, so a few accounts are hot and most are cold.
+#
+# Usage (API running on the default port):
+#
+#     python loadtest/load_generator.py --users 50 --duration 60
+#
+# Reports throughput, error rate and latency percentiles per use case.
+
+DEFAULT_BASE_URL = "http://127.0.0.1:8080"
+DEFAULT_USERS_CSV = "db_setup/users.csv"
+PASSWORD = "password"    # every generated user has this password
+SEED = 42
+
+# Only 2xx counts as ok, plus 409 where a conflict is an expected
+# answer (the username / email or edge already exists). 401 and 404
+# are errors: every session logs in and looks up users that exist.
+EXPECTED_CONFLICTS = {"register", "follow"}
+
+
+# ============================================================
+# Popularity model
+# ============================================================
+class ZipfUsers:
+    """Users ranked by a fixed random permutation; P(rank k) ~ 1 / k^s."""
+
+    def __init__(self, users, s, rng):
+        self.users = list(users)
+        rng.shuffle(self.users)
+        weights = [1.0 / (k ** s) for k in range(1, len(self.users) + 1)]
+        total = 0.0
+        self.cum_weights = []
+        for w in weights:
+            total += w
+            self.cum_weights.append(total)
+
+    def pick(self, rng):
+        return rng.choices(self.users, cum_weights=self.cum_weights, k=1)[0]
+
+
+def load_users(path):
+    with open(path, newline="") as f:
+        return [{"id": r["userId"].zfill(4), "username": r["username"]} for r in csv.DictReader(f)]
+
+
+# ============================================================
+# Stats
+# ============================================================
+class Stats:
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.started = time.perf_counter()
+
+    def record(self, use_case, seconds, ok):
+        self.latencies[use_case].append(seconds)
+        if not ok:
+            self.errors[use_case] += 1
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        rows = []
+        for use_case in sorted(self.latencies):
+            values = sorted(self.latencies[use_case])
+            n = len(values)
+            pct = lambda p: values[min(n - 1, int(p * n))] * 1000
+            rows.append({
+                "use_case": use_case,
+                "requests": n,
+                "rps": round(n / elapsed, 2),
+                "error_rate": round(self.errors[use_case] / n, 4),
+                "p50_ms": round(pct(0.50), 1),
+                "p90_ms": round(pct(0.90), 1),
+                "p95_ms": round(pct(0.95), 1),
+                "p99_ms": round(pct(0.99), 1),
+                "max_ms": round(values[-1] * 1000, 1),
+            })
+        total = sum(r["requests"] for r in rows)
+        return {
+            "elapsed_s": round(elapsed, 1),
+            "requests": total,
+            "rps": round(total / elapsed, 2) if elapsed else 0,
+            "errors": sum(self.errors.values()),
+            "use_cases": rows,
+        }
+
+
+def print_report(report):
+    print(f"\n[DONE] {report['requests']} requests in {report['elapsed_s']}s "
+          f"({report['rps']} req/s, {report['errors']} errors)\n")
+    header = f"{'use case':<16}{'reqs':>8}{'req/s':>9}{'err%':>8}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in report["use_cases"]:
+        print(f"{r['use_case']:<16}{r['requests']:>8}{r['rps']:>9}{r['error_rate'] * 100:>7.2f}%"
+              f"{r['p50_ms']:>9}{r['p90_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}")
+    print("\n(latencies in ms)")
+
+
+# ============================================================
+# Virtual user
+# ============================================================
+class VirtualUser:
+
+    def __init__(self, vu_id, http, base_url, popularity, stats, args):
+        self.http = http
+        self.base_url = base_url
+        self.popularity = popularity
+        self.stats = stats
+        self.args = args
+        self.rng = random.Random(SEED + vu_id)
+
+    async def call(self, use_case, method, path, **kwargs):
+        start = time.perf_counter()
+        ok = False
+        body = None
+        try:
+            async with self.http.request(method, self.base_url + path, **kwargs) as resp:
+                body = await resp.json(content_type=None)
+                ok = 200 <= resp.status < 300 or (resp.status == 409 and use_case in EXPECTED_CONFLICTS)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            pass
+        self.stats.record(use_case, time.perf_counter() - start, ok)
+        return body or {}
+
+    async def think(self):
+        if self.args.think_time > 0:
+            await asyncio.sleep(self.rng.expovariate(1.0 / self.args.think_time))
+
+    async def session(self):
+        me = self.popularity.pick(self.rng)
+        uid = me["id"]
+
+        await self.call("login", "POST", "/login", json={"username": me["username"], "password": PASSWORD})
+        await self.think()
+
+        profile = await self.call("profile", "GET", f"/users/{uid}")
+        following = profile.get("followingIds") or []
+        await self.think()
+
+        await self.call("followers", "GET", f"/users/{uid}/followers", params={"limit": 20})
+        await self.call("following", "GET", f"/users/{uid}/following", params={"limit": 20})
+        await self.think()
+
+        other = self.popularity.pick(self.rng)
+        await self.call("search", "GET", "/search", params={"q": other["username"][:5], "limit": 20})
+        await self.call("view_other", "GET", f"/users/{other['id']}")
+        await self.think()
+
+        recs = await self.call("recommendations", "GET", f"/users/{uid}/recommendations", params={"limit": 10})
+        await self.think()
+
+        if not self.args.read_only:
+            items = recs.get("items") or []
+            if items and self.rng.random() < self.args.follow_prob:
+                target = self.rng.choice(items)["id"]
+                await self.call("follow", "POST", f"/users/{uid}/following", json={"targetId": target})
+            elif following and self.rng.random() < self.args.unfollow_prob:
+                target = self.rng.choice(following)
+                await self.call("unfollow", "DELETE", f"/users/{uid}/following/{target}")
+
+        if following:
+            await self.call("mutual", "GET", f"/users/{uid}/mutual/{self.rng.choice(following)}", params={"limit": 20})
+
+        if self.rng.random() < 0.1:
+            await self.call("popular", "GET", "/popular", params={"limit": 20})
+
+    async def run(self, deadline):
+        while time.monotonic() < deadline:
+            await self.session()
+            await self.think()
+
+
+# ============================================================
+# Main
+# ============================================================
+async def run_load(args):
+    users = load_users(args.users_csv)
+    print(f"[INFO] Loaded {len(users)} users from {args.users_csv}")
+
+    popularity = ZipfUsers(users, args.zipf_s, random.Random(SEED))
+    stats = Stats()
+
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.users)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as http:
+        deadline = time.monotonic() + args.duration
+        tasks = []
+        for i in range(args.users):
+            vu = VirtualUser(i, http, args.base_url, popularity, stats, args)
+            tasks.append(asyncio.create_task(vu.run(deadline)))
+            if args.ramp_up > 0:
+                await asyncio.sleep(args.ramp_up / args.users)
+        print(f"[INFO] {args.users} virtual users running for {args.duration}s...")
+        await asyncio.gather(*tasks)
+
+    return stats.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay user sessions against the HTTP API.")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--users-csv", default=DEFAULT_USERS_CSV)
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run")
+    parser.add_argument("--ramp-up", type=float, default=5, help="seconds to start all users")
+    parser.add_argument("--think-time", type=float, default=0.5, help="mean seconds between steps (0 = none)")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent for user popularity")
+    parser.add_argument("--follow-prob", type=float, default=0.3)
+    parser.add_argument("--unfollow-prob", type=float, default=0.1)
+    parser.add_argument("--read-only", action="store_true", help="skip follow/unfollow")
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout in seconds")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load(args))
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[OK] Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from db.neo4j_client import run_read                          # noqa: E402
+from db.repository import get_repository, Neo4jRepository    # noqa: E402
+from db.supernodes import SUPERNODE_THRESHOLD, TOP_FOLLOWERS  # noqa: E402
+
+# ============================================================
+# Supernode benchmark
+# ============================================================
+# Times the use cases that touch influencer accounts with the
+# supernode handling off (threshold 0) and on (db/supernodes.py),
+# against whatever GRAPH_BACKEND is configured:
+#
+#   UC-3 profile          profile bundle of a supernode / a regular user;
+#                         a supernode's follower preview is a sample when
+#                         on, so that row is a strategy change too
+#   UC-7 followers        first follower page by username (off) vs the
+#                         cached top-follower slice (on), supernodes;
+#                         a strategy change: the two return different
+#                         users, so it is reported as such rather than
+#                         as a speed-up of one query
+#   UC-8 mutual           two followers of the same supernode, so the
+#                         supernode is a mutual user: the pattern
+#                         expansion MUTUAL_QUERY replaced (off) vs the
+#                         list intersection (on). Same result; Neo4j
+#                         backend only, the in-memory stores have always
+#                         intersected following sets
+#   UC-9 recommendations  regular users; friends capped at the threshold
+#
+# Usage (from the repository root):
+#
+#     python loadtest/supernode_bench.py --iterations 50
+#     GRAPH_BACKEND=memory python loadtest/supernode_bench.py
+#
+# Prints p50 / p95 / mean in ms per use case and mode, and the speed-up
+# (or, for a strategy change, the latency ratio).
+
+SEED = 42
+PROFILE_PAGE = 100
+MUTUAL_PAGE = 20
+
+# MUTUAL_QUERY before the supernode handling: walks every FOLLOWS into
+# the mutual user, thousands of them for an influencer.
+LEGACY_MUTUAL_QUERY = """
+MATCH (a:User {userId: $aid})-[:FOLLOWS]->(mutual:User)<-[:FOLLOWS]-(b:User {userId: $bid})
+WHERE a <> b
+RETURN DISTINCT
+    mutual.userId AS id, mutual.username AS username,
+    mutual.name AS name, mutual.bio AS bio
+ORDER BY username SKIP $skip LIMIT $limit
+"""
+
+
+def timed(fn, iterations):
+    fn()   # warm-up: connection pool, plan cache, degree cache
+    values = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        values.append((time.perf_counter() - started) * 1000)
+    values.sort()
+    n = len(values)
+    return {
+        "p50_ms": round(values[n // 2], 3),
+        "p95_ms": round(values[min(n - 1, int(0.95 * n))], 3),
+        "mean_ms": round(sum(values) / n, 3),
+    }
+
+
+def cycle(items):
+    """Callable factory: each call moves on to the next item."""
+    state = {"i": 0}
+
+    def next_item():
+        item = items[state["i"] % len(items)]
+        state["i"] += 1
+        return item
+    return next_item
+
+
+def pick_subjects(repository, threshold, supernodes, regulars, rng):
+    popular = repository.popular(supernodes)
+    hubs = [u["id"] for u in popular if u["followerCount"] >= threshold] or [u["id"] for u in popular[:1]]
+    users = [u["id"] for u in repository.list_users(2000)]
+    degrees = repository.degrees(users)
+    regular = [uid for uid in users if max(degrees.get(uid, {"": 0}).values()) < threshold]
+    rng.shuffle(regular)
+    return hubs, regular[:regulars]
+
+
+def pick_pairs(repository, hubs, count):
+    """(a, b) pairs that both follow one of the hubs, round-robin over the hubs."""
+    per_hub = -(-count // max(len(hubs), 1))   # ceil
+    pairs = []
+    for hub in hubs:
+        followers = [u["id"] for u in repository.followers_page(hub, 0, 2 * per_hub)]
+        pairs.extend(zip(followers[0::2], followers[1::2]))
+    return pairs[:count]
+
+
+# Use cases whose "on" mode returns a different result than "off".
+STRATEGY_CHANGES = {"UC-3 profile (supernode)", "UC-7 followers (supernode)"}
+
+
+def legacy_mutual(pair):
+    aid, bid = pair
+    return run_read(LEGACY_MUTUAL_QUERY, {"aid": aid, "bid": bid, "skip": 0, "limit": MUTUAL_PAGE}, name="mutual")
+
+
+def cases(repository, hubs, regular, pairs):
+    next_hub, next_user = cycle(hubs), cycle(regular)
+    next_pair = cycle(pairs) if pairs else None
+
+    uc8 = {}
+    if pairs and isinstance(repository, Neo4jRepository):
+        uc8["UC-8 mutual (supernode)"] = (
+            lambda: legacy_mutual(next_pair()),
+            lambda: repository.mutual(*next_pair(), 0, MUTUAL_PAGE),
+        )
+
+    return {
+        "UC-3 profile (supernode)": (
+            lambda: repository.profile(next_hub(), PROFILE_PAGE),
+            lambda: repository.profile(next_hub(), PROFILE_PAGE),
+        ),
+        "UC-3 profile (regular)": (
+            lambda: repository.profile(next_user(), PROFILE_PAGE),
+            lambda: repository.profile(next_user(), PROFILE_PAGE),
+        ),
+        "UC-7 followers (supernode)": (
+            lambda: repository.followers_page(next_hub(), 0, TOP_FOLLOWERS),
+            lambda: repository.top_followers(next_hub()),
+        ),
+        **uc8,
+        "UC-9 recommendations": (
+            lambda: repository.recommendations(next_user(), 10),
+            lambda: repository.recommendations(next_user(), 10),
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark supernode handling per use case.")
+    parser.add_argument("--iterations", type=int, default=30, help="timed calls per use case and mode")
+    parser.add_argument("--threshold", type=int, default=SUPERNODE_THRESHOLD or 1000)
+    parser.add_argument("--supernodes", type=int, default=10, help="most-followed users to use")
+    parser.add_argument("--regulars", type=int, default=50, help="regular users (and mutual pairs) to use")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(SEED)
+    repository = get_repository()
+    repository.supernode_threshold = args.threshold
+    hubs, regular = pick_subjects(repository, args.threshold, args.supernodes, args.regulars, rng)
+    pairs = pick_pairs(repository, hubs, args.regulars)
+    print(f"[INFO] {len(hubs)} supernode(s), {len(regular)} regular user(s), "
+          f"{len(pairs)} mutual pair(s), threshold {args.threshold}")
+    if not isinstance(repository, Neo4jRepository):
+        print("[INFO] UC-8 mutual skipped: it compares two Cypher queries (GRAPH_BACKEND=neo4j)")
+
+    report = []
+    for use_case in cases(repository, hubs, regular, pairs):
+        # Fresh cases per mode, so off and on see the same users in the same order.
+        repository.supernode_threshold = 0
+        off = timed(cases(repository, hubs, regular, pairs)[use_case][0], args.iterations)
+        repository.supernode_threshold = args.threshold
+        on = timed(cases(repository, hubs, regular, pairs)[use_case][1], args.iterations)
+        speedup = off["mean_ms"] / max(on["mean_ms"], 0.001)
+        report.append({
+            "use_case": use_case,
+            "off": off,
+            "on": on,
+            "speedup": round(speedup, 2),
+            "comparison": "strategy change" if use_case in STRATEGY_CHANGES else "same query",
+        })
+
+    print(f"\n{'use case':28} {'off p50':>9} {'off p95':>9} {'on p50':>9} {'on p95':>9} {'speed-up':>9}")
+    for r in report:
+        print(f"{r['use_case']:28} {r['off']['p50_ms']:9.3f} {r['off']['p95_ms']:9.3f} "
+              f"{r['on']['p50_ms']:9.3f} {r['on']['p95_ms']:9.3f} {r['speedup']:8.2f}x"
+              f"{' *' if r['comparison'] == 'strategy change' else ''}")
+    if any(r["comparison"] == "strategy change" for r in report):
+        print("* strategy change: off and on return different results, so this is a latency ratio, not a speed-up")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"threshold": args.threshold, "use_cases": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()